@@ -3,26 +3,23 @@
 
 import streamlit as st
 
-def metric_card(title: str, value: str = None, description: str = "", image_path: str = None):
-    st.markdown("<div class='cp-metric-card'>", unsafe_allow_html=True)
+from app.layout.shell import image_data_uri
+
 
-    # ICON AREA (server-side loading = works reliably)
+def metric_card(title: str, value: str = None, description: str = "", image_path: str = None):
+    # One markdown delta per card; icons are inlined from the per-process asset cache
     if image_path:
-        st.image(image_path, width=56)
+        icon = f'<img src="{image_data_uri(str(image_path), 56)}" width="56" style="margin-bottom: 6px;">'
     elif value:
-        st.markdown(
-            f"""
-            <div class="cp-metric-icon" style="font-size: 42px; margin-bottom: 6px;">
-                {value}
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
-
-    # TITLE
-    st.markdown(f"<div class='cp-metric-title'>{title}</div>", unsafe_allow_html=True)
-
-    # DESCRIPTION
-    st.markdown(f"<div class='cp-metric-description'>{description}</div>", unsafe_allow_html=True)
+        icon = f'<div class="cp-metric-icon" style="font-size: 42px; margin-bottom: 6px;">{value}</div>'
+    else:
+        icon = ""
 
-    st.markdown("</div>", unsafe_allow_html=True)
+    st.markdown(
+        "<div class='cp-metric-card'>"
+        f"{icon}"
+        f"<div class='cp-metric-title'>{title}</div>"
+        f"<div class='cp-metric-description'>{description}</div>"
+        "</div>",
+        unsafe_allow_html=True
+    )
@@ -0,0 +1,272 @@
+# shell.py
+# Prebuilt page chrome for ClarityPredict 2.0.
+# Global CSS, header, hero and footer HTML and inlined icons are built once per
+# process; each page then emits its static chrome as a single markdown delta.
+
+import base64
+import io
+from functools import lru_cache
+from pathlib import Path
+
+import streamlit as st
+from PIL import Image
+
+from app.layout import branding
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+LOGO_PATH = "assets/icons/logo.png"
+FAVICON_PATH = "assets/icons/ico_logo.png"
+
+
+# ---------------------------------------------------------
+# Assets
+# ---------------------------------------------------------
+@lru_cache(maxsize=None)
+def image_data_uri(path: str, width: int) -> str:
+    """
+    PNG data URI of an asset, downscaled to twice its display ``width`` so it
+    stays sharp on HiDPI screens without shipping the full-size source.
+    """
+    image = Image.open(PROJECT_ROOT / path)
+    target = min(image.width, 2 * width)
+    if image.width > target:
+        height = round(image.height * target / image.width)
+        image = image.resize((target, height), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+@lru_cache(maxsize=None)
+def favicon() -> Image.Image:
+    image = Image.open(PROJECT_ROOT / FAVICON_PATH)
+    image.thumbnail((64, 64))
+    return image
+
+
+# ---------------------------------------------------------
+# HTML fragments
+# ---------------------------------------------------------
+@lru_cache(maxsize=None)
+def global_css() -> str:
+    return f"""<style>
+
+/* Remove Streamlit top padding */
+.block-container {{
+    padding-top: 0 !important;
+}}
+
+/* Global content width */
+.cp-container {{
+    max-width: 900px;
+    margin: 0 auto;
+}}
+
+/* Global font and background */
+html, body {{
+    font-family: {branding.FONT_FAMILY};
+    background-color: {branding.BACKGROUND_COLOR};
+    color: {branding.TEXT_COLOR};
+}}
+
+/* Headings */
+h1 {{
+    font-size: {branding.FONT_SIZE_TITLE};
+    font-weight: 600;
+    color: {branding.PRIMARY_COLOR};
+    margin-top: 10px;
+}}
+
+h2 {{
+    font-size: {branding.FONT_SIZE_SUBTITLE};
+    font-weight: 500;
+    color: {branding.TEXT_COLOR};
+}}
+
+/* Card container */
+.cp-card {{
+    background-color: white;
+    padding: 20px;
+    border-radius: {branding.CARD_RADIUS};
+    box-shadow: {branding.CARD_SHADOW};
+    margin-bottom: 20px;
+}}
+
+/* Section spacing */
+.cp-section {{
+    margin-top: {branding.SECTION_SPACING};
+    margin-bottom: {branding.SECTION_SPACING};
+}}
+
+/* Footer */
+.cp-footer {{
+    text-align: center;
+    font-size: 14px;
+    color: {branding.SUBTEXT_COLOR};
+    margin-top: 40px;
+    padding: 20px 0;
+}}
+
+/* Header */
+.cp-header {{
+    display: flex;
+    justify-content: flex-start;
+    margin: 0;
+    padding: 0;
+}}
+
+.cp-header-left {{
+    display: flex;
+    flex-direction: column;
+    align-items: flex-start;
+    margin: 0;
+    padding: 0;
+}}
+
+.cp-header-logo {{
+    width: 210px;
+    margin-bottom: -5px;
+}}
+
+.cp-header-tagline {{
+    font-size: 16px;
+    color: {branding.SUBTEXT_COLOR};
+    margin-top: 5px;
+}}
+
+/* Metric card */
+.cp-metric-card {{
+    text-align: center;
+    border-top: 4px solid {branding.PRIMARY_COLOR};
+    padding: 20px;
+    border-radius: {branding.CARD_RADIUS};
+    box-shadow: {branding.CARD_SHADOW};
+    background-color: white;
+}}
+
+.cp-metric-value {{
+    color: {branding.PRIMARY_COLOR};
+    font-size: 28px;
+    font-weight: 700;
+    margin-bottom: 5px;
+}}
+
+.cp-metric-title {{
+    font-weight: 600;
+    margin-top: -10px;
+}}
+
+.cp-metric-description {{
+    color: {branding.SUBTEXT_COLOR};
+    margin-top: -5px;
+    font-size: 14px;
+}}
+
+/* Global button styles */
+.stButton > button {{
+    background-color: {branding.PRIMARY_COLOR} !important;
+    color: white !important;
+    border-radius: 6px !important;
+    padding: 0.6rem 1.2rem !important;
+    border: none !important;
+    font-weight: 600 !important;
+    font-size: 1rem !important;
+    cursor: pointer !important;
+    transition: background-color 0.2s ease-in-out;
+}}
+
+.stButton > button:hover {{
+    background-color: #3A78C2 !important;
+    color: white !important;
+}}
+
+</style>"""
+
+
+@lru_cache(maxsize=None)
+def header_html(logo_path: str = LOGO_PATH) -> str:
+    return (
+        '<div class="cp-header"><div class="cp-header-left">'
+        f'<img class="cp-header-logo" src="{image_data_uri(logo_path, 210)}" alt="ClarityPredict">'
+        '<p class="cp-header-tagline">Precision insights through biomarker-driven prediction</p>'
+        "</div></div>"
+    )
+
+
+@lru_cache(maxsize=None)
+def hero_html() -> str:
+    return f"""<div class="cp-section" style="margin-top: 5px; margin-bottom: 25px;">
+<h2 style="
+    font-size: 30px;
+    font-weight: 600;
+    color: {branding.PRIMARY_COLOR};
+    margin-bottom: 10px;
+">
+    Overview
+</h2>
+
+<p style="
+    font-size: 17px;
+    color: {branding.SUBTEXT_COLOR};
+    max-width: 750px;
+    line-height: 1.6;
+    margin-bottom: 0px;
+">
+    Explore the core features of ClarityPredict, including biomarker analytics,
+    interactive data exploration, and explainable machine‑learning predictions.
+</p>
+</div>"""
+
+
+@lru_cache(maxsize=None)
+def footer_html() -> str:
+    return """<div class="cp-footer">
+<p><strong>ClarityPredict©</strong> – Prototype for explainable biomarker prediction</p>
+<p>
+    Developed by <strong>Torbjørn Kleiven</strong><br>
+    Bachelor of Science in Computer Science<br>
+    Specialization in Machine Learning
+</p>
+<p>
+    Moss / Oslo, Norway<br>
+    <a href="mailto:tk@infera.no">tk@infera.no</a> |
+    <a href="https://github.com/torbkle" target="_blank">GitHub</a> |
+    <span style="vertical-align: middle;">MIT License</span>
+</p>
+<p style="margin-top: 10px;">
+    © 2026 Torbjørn Kleiven – For demonstration and research purposes only.
+</p>
+</div>"""
+
+
+@lru_cache(maxsize=None)
+def _page_top_html(hero: bool) -> str:
+    parts = [global_css(), "<div class='cp-container'>", header_html()]
+    if hero:
+        parts.append(hero_html())
+    return "\n".join(parts)
+
+
+@lru_cache(maxsize=None)
+def _page_bottom_html() -> str:
+    return footer_html() + "\n</div>"
+
+
+# ---------------------------------------------------------
+# Page chrome
+# ---------------------------------------------------------
+def configure_page(title: str) -> None:
+    """``st.set_page_config`` with the shared layout and the cached favicon."""
+    st.set_page_config(page_title=title, layout="wide", page_icon=favicon())
+
+
+def render_page_top(hero: bool = False) -> None:
+    """Global CSS, container and header (and optionally the hero) as one delta."""
+    st.markdown(_page_top_html(hero), unsafe_allow_html=True)
+
+
+def render_page_bottom() -> None:
+    """Footer and container close as one delta."""
+    st.markdown(_page_bottom_html(), unsafe_allow_html=True)
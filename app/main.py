@@ -3,7 +3,6 @@
 import os
 import sys
 import streamlit as st
-from PIL import Image
 
 # Ensure project root is in Python path
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -12,34 +11,13 @@ PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from app.layout.style import inject_global_styles
-from app.components.header import render_header
-from app.components.footer import render_footer
-from app.components.hero import hero_section
+from app.layout.shell import configure_page, render_page_bottom, render_page_top
 from app.components.metrics import metric_card
 
 
 def main():
-    # --- Load favicon using absolute path ---
-    favicon_path = os.path.join(PROJECT_ROOT, "assets", "icons", "ico_logo.png")
-    logo = Image.open(favicon_path)
-
-    st.set_page_config(
-        page_title="ClarityPredict",
-        layout="wide",
-        page_icon=logo
-    )
-
-    inject_global_styles()
-
-    # MAIN CONTAINER
-    st.markdown("<div class='cp-container'>", unsafe_allow_html=True)
-
-    # HEADER
-    render_header()
-
-    # HERO SECTION
-    hero_section()
+    configure_page("ClarityPredict")
+    render_page_top(hero=True)
 
     # INTRODUCTION CARD
     st.markdown("<div class='cp-section'><div class='cp-card'>", unsafe_allow_html=True)
@@ -107,9 +85,7 @@ def main():
     st.markdown("</div></div>", unsafe_allow_html=True)
 
     # FOOTER
-    render_footer()
-
-    st.markdown("</div>", unsafe_allow_html=True)
+    render_page_bottom()
 
 
 if __name__ == "__main__":
@@ -2,25 +2,13 @@
 
 import streamlit as st
 
-from app.layout.style import inject_global_styles
-from app.components.header import render_header
-from app.components.footer import render_footer
-from app.components.hero import hero_section
+from app.layout.shell import configure_page, render_page_bottom, render_page_top
 from app.components.metrics import metric_card
 
 
 def main():
-    st.set_page_config(
-        page_title="ClarityPredict – Overview",
-        layout="wide",
-        page_icon="assets/icons/ico_logo.png"
-    )
-
-    inject_global_styles()
-
-    st.markdown("<div class='cp-container'>", unsafe_allow_html=True)
-
-    render_header()
+    configure_page("ClarityPredict – Overview")
+    render_page_top()
 
 
     # ---------------------------------------------------------
@@ -85,9 +73,7 @@ def main():
 
     st.markdown("</div></div>", unsafe_allow_html=True)
 
-    render_footer()
-
-    st.markdown("</div>", unsafe_allow_html=True)
+    render_page_bottom()
 
 
 if __name__ == "__main__":
@@ -1,12 +1,15 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 
-from app.layout.style import inject_global_styles
-from app.components.header import render_header
-from app.components.footer import render_footer
-from app.services.prediction_service import PredictionService
+from app.layout.shell import configure_page, render_page_bottom, render_page_top
+from app.services.correlation import CorrelationEngine, CorrelationResult
+from app.services.dataset_viewer import DatasetViewer, RangeFilter
+from app.services.effects import EffectsTable, compute_effects
+from app.services.feature_cache import file_digest
+from app.services.prediction_service import BASE_DIR, PredictionService
 
 
 # ---------------------------------------------------------
@@ -18,28 +21,133 @@ def load_service():
 
 service = load_service()
 
+DATASET_PATH = BASE_DIR / "data/dataset.csv"
+
+# Rows drawn for the scatter plot; summaries and histograms use every row
+SCATTER_SAMPLE_ROWS = 5000
+
+
+@st.cache_resource
+def load_viewer():
+    """The dataset, parsed once into Arrow; every section of the page reads from it."""
+    return DatasetViewer.from_path(DATASET_PATH)
+
 
 @st.cache_data
-def load_data():
-    return pd.read_csv("data/dataset.csv")
+def load_dataset_hash():
+    return file_digest(DATASET_PATH)
+
+
+@st.cache_resource
+def load_correlations():
+    return CorrelationEngine()
+
+
+@st.cache_resource
+def load_effects():
+    """Effect tables for the loaded model; computed and stored once if missing or stale."""
+    path = BASE_DIR / "models/effects.npz"
+    effects = EffectsTable.load(path)
+    if effects is not None and effects.model_version == service.model_version:
+        return effects
+
+    df = load_viewer().numeric_frame()
+    df.columns = df.columns.str.lower()
+    tables = compute_effects(
+        lambda frame: service.predict_batch(service.prepare_batch(frame)),
+        df[service.expected_features].fillna(df[service.expected_features].median()),
+        service.expected_features,
+    )
+    EffectsTable.save(path, tables, service.model_version)
+    return EffectsTable.load(path)
 
 
 # ---------------------------------------------------------
-# MAIN PAGE
+# DATASET VIEWER
 # ---------------------------------------------------------
-def main():
-    st.set_page_config(
-        page_title="ClarityPredict – Explore Data",
-        layout="wide",
-        page_icon="assets/icons/ico_logo.png"
+def render_dataset_viewer(viewer: DatasetViewer):
+    """Paged table; sorting and range filters run server-side and only the visible rows are sent."""
+    columns = viewer.numeric_columns
+
+    with st.expander("Filter rows"):
+        filters = []
+        for column in st.multiselect("Biomarkers to filter", columns, key="viewer_filter_columns"):
+            lo, hi = viewer.column_range(column)
+            if lo == hi:
+                continue
+            low, high = st.slider(column, lo, hi, (lo, hi), key=f"viewer_range_{column}")
+            if (low, high) != (lo, hi):
+                filters.append(RangeFilter(column, low, high))
+
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        sort_by = st.selectbox("Sort by", [None] + columns, format_func=lambda c: "File order" if c is None else c)
+    with col2:
+        ascending = st.radio("Order", ["Ascending", "Descending"], horizontal=True) == "Ascending"
+    with col3:
+        page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+
+    n_rows = len(viewer.indices(filters)) if filters else viewer.num_rows
+    n_pages = max(-(-n_rows // page_size), 1)
+    page_number = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1)
+
+    page = viewer.page(page_number, page_size, filters, sort_by, ascending)
+    st.dataframe(page.rows, hide_index=True)
+
+    shown = f"Rows {page.start + 1:,}–{page.start + page.rows.num_rows:,} of {page.total:,}" if page.total else "No matching rows"
+    if filters:
+        shown += f" (filtered from {viewer.num_rows:,})"
+    st.caption(f"{shown} · page {page.page} of {page.n_pages}")
+
+
+# ---------------------------------------------------------
+# CORRELATION HEATMAP
+# ---------------------------------------------------------
+# Beyond this many columns tick labels overlap; the strongest pairs are listed instead
+MAX_LABELLED_COLUMNS = 60
+
+
+def render_correlation_heatmap(result: CorrelationResult, clustered: bool):
+    """Correlation matrix as one image, optionally in clustered order; readable up to hundreds of columns."""
+    labels, matrix = result.ordered() if clustered else (result.columns, result.matrix)
+    n_cols = len(labels)
+
+    size = min(max(0.4 * n_cols, 6.0), 12.0)
+    fig, ax = plt.subplots(figsize=(size + 1.5, size))
+    image = ax.imshow(np.ma.masked_invalid(matrix), cmap="RdBu_r", vmin=-1, vmax=1, interpolation="nearest")
+    if n_cols <= MAX_LABELLED_COLUMNS:
+        fontsize = 9 if n_cols <= 20 else 6
+        ax.set_xticks(range(n_cols), labels, rotation=90, fontsize=fontsize)
+        ax.set_yticks(range(n_cols), labels, fontsize=fontsize)
+    else:
+        ax.set_xticks([])
+        ax.set_yticks([])
+    fig.colorbar(image, ax=ax, shrink=0.8, label=f"{result.method.capitalize()} correlation")
+    ax.set_title("Correlation Between Biomarkers")
+    fig.tight_layout()
+    st.pyplot(fig)
+    plt.close(fig)
+
+    if n_cols > MAX_LABELLED_COLUMNS:
+        st.dataframe(
+            result.top_pairs(20).rename(columns={"a": "Biomarker A", "b": "Biomarker B", "n": "Rows"}).round(3),
+            hide_index=True,
+        )
+
+    st.caption(
+        f"{n_cols} columns; each pair uses the rows where both values are present "
+        f"(computed in {result.elapsed_ms:.0f} ms, cached per dataset version)."
     )
 
-    inject_global_styles()
 
-    st.markdown("<div class='cp-container'>", unsafe_allow_html=True)
-    render_header()
+# ---------------------------------------------------------
+# MAIN PAGE
+# ---------------------------------------------------------
+def main():
+    configure_page("ClarityPredict – Explore Data")
+    render_page_top()
 
-    df = load_data()
+    viewer = load_viewer()
 
     # ---------------------------------------------------------
     # INTRO SECTION
@@ -71,9 +179,9 @@ def main():
     st.subheader("Dataset Overview")
     st.markdown("<div class='cp-section'><div class='cp-card'>", unsafe_allow_html=True)
 
-    st.write(f"**Rows:** {df.shape[0]}")
-    st.write(f"**Columns:** {df.shape[1]}")
-    st.dataframe(df.head())
+    st.write(f"**Rows:** {viewer.num_rows}")
+    st.write(f"**Columns:** {viewer.table.num_columns}")
+    render_dataset_viewer(viewer)
 
     st.markdown("</div></div>", unsafe_allow_html=True)
 
@@ -83,7 +191,7 @@ def main():
     st.subheader("Statistical Summary")
     st.markdown("<div class='cp-section'><div class='cp-card'>", unsafe_allow_html=True)
 
-    st.dataframe(df.describe().T)
+    st.dataframe(viewer.summary())
 
     st.markdown("</div></div>", unsafe_allow_html=True)
 
@@ -93,11 +201,13 @@ def main():
     st.subheader("Distribution of Biomarkers")
     st.markdown("<div class='cp-section'><div class='cp-card'>", unsafe_allow_html=True)
 
-    numeric_cols = df.select_dtypes(include=["float64", "int64"]).columns
+    numeric_cols = viewer.numeric_columns
     selected_col = st.selectbox("Select a biomarker:", numeric_cols)
 
+    counts, edges = viewer.histogram(selected_col)
     fig, ax = plt.subplots(figsize=(6, 4))
-    sns.histplot(df[selected_col], kde=True, ax=ax, color="#457B9D")
+    ax.stairs(counts, edges, fill=True, color="#457B9D", alpha=0.6)
+    ax.stairs(counts, edges, color="#1D3557")
     ax.set_title(f"Distribution of {selected_col}")
     ax.set_xlabel(selected_col)
     ax.set_ylabel("Count")
@@ -111,10 +221,17 @@ def main():
     st.subheader("Correlation Heatmap")
     st.markdown("<div class='cp-section'><div class='cp-card'>", unsafe_allow_html=True)
 
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.heatmap(df.corr(), annot=False, cmap="Blues", ax=ax)
-    ax.set_title("Correlation Between Biomarkers")
-    st.pyplot(fig)
+    col1, col2 = st.columns(2)
+    with col1:
+        method = st.radio("Correlation", ["Pearson", "Spearman"], horizontal=True)
+    with col2:
+        clustered = st.toggle("Group related biomarkers", value=True)
+
+    engine, dataset_hash = load_correlations(), load_dataset_hash()
+    correlations = engine.cached(dataset_hash, method.lower())
+    if correlations is None:
+        correlations = engine.compute(viewer.numeric_frame(), dataset_hash, method.lower())
+    render_correlation_heatmap(correlations, clustered)
 
     st.markdown("</div></div>", unsafe_allow_html=True)
 
@@ -132,11 +249,14 @@ def main():
     with col2:
         y_var = st.selectbox("Y‑axis", numeric_cols)
 
+    points = viewer.sample([x_var, y_var], SCATTER_SAMPLE_ROWS)
     fig2, ax2 = plt.subplots(figsize=(7, 5))
-    sns.scatterplot(data=df, x=x_var, y=y_var, ax=ax2, color="#457B9D")
-    sns.regplot(data=df, x=x_var, y=y_var, scatter=False, ax=ax2, color="#1D3557")
+    sns.scatterplot(data=points, x=x_var, y=y_var, ax=ax2, color="#457B9D")
+    sns.regplot(data=points, x=x_var, y=y_var, scatter=False, ax=ax2, color="#1D3557")
     ax2.set_title(f"{x_var} vs {y_var}")
     st.pyplot(fig2)
+    if len(points) < viewer.num_rows:
+        st.caption(f"Random sample of {len(points):,} of {viewer.num_rows:,} rows.")
 
     st.markdown("</div></div>", unsafe_allow_html=True)
 
@@ -150,7 +270,7 @@ def main():
 
     if hasattr(model, "feature_importances_"):
         importance = model.feature_importances_
-        features = service.expected_features
+        features = service.model_features
 
         importance_df = pd.DataFrame({
             "Feature": features,
@@ -166,8 +286,57 @@ def main():
 
     st.markdown("</div></div>", unsafe_allow_html=True)
 
-    render_footer()
-    st.markdown("</div>", unsafe_allow_html=True)
+    # ---------------------------------------------------------
+    # POPULATION-LEVEL BIOMARKER EFFECTS
+    # ---------------------------------------------------------
+    st.subheader("Population-Level Biomarker Effects")
+    st.markdown("<div class='cp-section'><div class='cp-card'>", unsafe_allow_html=True)
+
+    effects = load_effects()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        effect_feature = st.selectbox("Biomarker", effects.features)
+    with col2:
+        effect_kind = st.radio(
+            "Method",
+            ["Partial dependence", "Accumulated local effects"],
+            horizontal=True,
+        )
+
+    if effect_kind == "Partial dependence":
+        grid, values = effects.pd(effect_feature)
+        ylabel = "Average predicted value"
+    else:
+        grid, values = effects.ale(effect_feature)
+        ylabel = "Accumulated local effect"
+
+    fig4, ax4 = plt.subplots(figsize=(7, 4))
+    ax4.plot(grid, values, color="#457B9D")
+    ax4.set_xlabel(effect_feature)
+    ax4.set_ylabel(ylabel)
+    ax4.set_title(f"{effect_kind} – {effect_feature}")
+    st.pyplot(fig4)
+
+    if effects.pairs:
+        pair = st.selectbox(
+            "Biomarker pair",
+            effects.pairs,
+            format_func=lambda p: f"{p[0]} × {p[1]}",
+        )
+        grid_a, grid_b, surface = effects.pd2(*pair)
+
+        fig5, ax5 = plt.subplots(figsize=(7, 5))
+        contour = ax5.contourf(grid_a, grid_b, surface.T, levels=20, cmap="Blues")
+        ax5.set_xlabel(pair[0])
+        ax5.set_ylabel(pair[1])
+        ax5.set_title(f"Two-way partial dependence – {pair[0]} × {pair[1]}")
+        fig5.colorbar(contour, ax=ax5, label="Average predicted value")
+        st.pyplot(fig5)
+
+    st.markdown("</div></div>", unsafe_allow_html=True)
+
+    render_page_bottom()
 
 
 if __name__ == "__main__":
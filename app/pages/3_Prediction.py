@@ -1,15 +1,22 @@
 # Prediction page for ClarityPredict 2.0
 
+import time
+
 import streamlit as st
 import shap
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 
-from app.layout.style import inject_global_styles
-from app.components.header import render_header
-from app.components.footer import render_footer
+from app.layout.shell import configure_page, render_page_bottom, render_page_top
 from app.components.metrics import metric_card
-from app.services.prediction_service import PredictionService
+from app.services.history_store import HistoryStore
+from app.services.live import LivePredictor, LiveSession
+from app.services.prediction_service import BASE_DIR, PredictionService
+from app.services.similarity import update_index
+from app.services.tracing import span, trace
+from app.utils.validators import compile_schema
+from config import settings
 
 
 # ---------------------------------------------------------
@@ -20,22 +27,147 @@ def load_service():
     return PredictionService("models/model.pkl")
 
 service = load_service()
+schema = compile_schema()
+
+
+@st.cache_resource
+def load_history():
+    return HistoryStore(
+        BASE_DIR / settings.HISTORY_DB_PATH, service.expected_features, shap_names=service.model_features
+    )
+
+history = load_history()
+
+
+@st.cache_resource
+def load_similarity():
+    """Similar-patient index over the cohort; extended with rows appended since the last build."""
+    cohort = pd.read_csv(BASE_DIR / "data/dataset.csv")
+    cohort.columns = cohort.columns.str.lower()
+    return update_index(
+        BASE_DIR / "models/similarity_index.joblib",
+        cohort,
+        outcome="target",
+        feature_names=service.expected_features,
+        transform=lambda frame: service.prepare_batch(frame).to_numpy(),
+        preprocessor_version=service.preprocessor_version,
+    )
+
+similarity = load_similarity()
+
+
+@st.cache_resource
+def load_live_predictor():
+    return LivePredictor(
+        service, cache_size=settings.LIVE_CACHE_SIZE, budget_ms=settings.LIVE_BUDGET_MS
+    )
+
+
+def live_session() -> LiveSession:
+    if "live_session" not in st.session_state:
+        st.session_state["live_session"] = LiveSession(
+            load_live_predictor(), settle_s=settings.LIVE_SETTLE_MS / 1000.0
+        )
+    return st.session_state["live_session"]
 
 
 # ---------------------------------------------------------
-# MAIN PAGE
+# INPUTS
 # ---------------------------------------------------------
-def main():
-    st.set_page_config(
-        page_title="ClarityPredict – Prediction",
-        layout="wide",
-        page_icon="assets/icons/ico_logo.png"
+def biomarker_inputs(key_prefix: str = "") -> dict:
+    return {
+        "age": st.number_input("Age", key=f"{key_prefix}age", **schema.ui_kwargs("age")),
+        "bmi": st.number_input("BMI", key=f"{key_prefix}bmi", **schema.ui_kwargs("bmi")),
+        "glucose": st.number_input("Glucose", key=f"{key_prefix}glucose", **schema.ui_kwargs("glucose")),
+        "insulin": st.number_input("Insulin", key=f"{key_prefix}insulin", **schema.ui_kwargs("insulin")),
+        "hdl": st.number_input("HDL Cholesterol", key=f"{key_prefix}hdl", **schema.ui_kwargs("hdl")),
+        "ldl": st.number_input("LDL Cholesterol", key=f"{key_prefix}ldl", **schema.ui_kwargs("ldl")),
+    }
+
+
+# ---------------------------------------------------------
+# LIVE MODE
+# ---------------------------------------------------------
+def render_live_preview(input_data):
+    """Cached preview of the current input: prediction plus occlusion attributions."""
+    with span("live.update"):
+        estimate = live_session().update(input_data)
+
+    description = f"Live preview ({estimate.elapsed_ms:.0f} ms)"
+    if estimate.interval is not None:
+        lower, upper = estimate.interval
+        description += f" · {service.intervals.coverage:.0%} interval {lower:.3f} – {upper:.3f}"
+
+    metric_card(
+        title="Predicted Value",
+        value=f"{estimate.prediction:.3f}",
+        description=description
+    )
+    st.bar_chart(
+        pd.Series(estimate.attributions, name="Effect vs. average"),
+        horizontal=True,
+        height=220,
     )
 
-    inject_global_styles()
 
-    st.markdown("<div class='cp-container'>", unsafe_allow_html=True)
-    render_header()
+@st.fragment(run_every=0.5)
+def watch_settled_input():
+    """
+    Polls for the full result (SHAP) once the live input has settled and
+    reruns the page to render it; superseded runs are cancelled.
+    """
+    session = live_session()
+    result = session.settled_result()
+    if result is None:
+        st.caption("Full explanation follows once the values stop changing…")
+        return
+
+    last = st.session_state.get("last_prediction")
+    if last is None or last[0] != session.input:
+        st.session_state["last_prediction"] = (session.input, result)
+        st.rerun()
+
+
+# ---------------------------------------------------------
+# WHAT-IF PLOTS
+# ---------------------------------------------------------
+def render_sensitivity(grid, input_data):
+    features = grid["features"]
+    axes = grid["axes"]
+    predictions = grid["predictions"]
+
+    if len(features) == 1:
+        feature = features[0]
+        fig, ax = plt.subplots(figsize=(7, 4))
+        ax.plot(axes[0], predictions, color="#457B9D")
+        ax.axvline(input_data[feature], color="#1D3557", linestyle="--", label="Current value")
+        ax.set_xlabel(feature)
+        ax.set_ylabel("Predicted value")
+        ax.set_title(f"Individual conditional expectation – {feature}")
+        ax.legend()
+    else:
+        fx, fy = features
+        fig, ax = plt.subplots(figsize=(7, 5))
+        contour = ax.contourf(axes[0], axes[1], predictions.T, levels=20, cmap="Blues")
+        ax.scatter([input_data[fx]], [input_data[fy]], color="#D0021B", zorder=3, label="Current values")
+        ax.set_xlabel(fx)
+        ax.set_ylabel(fy)
+        ax.set_title(f"Predicted response – {fx} × {fy}")
+        ax.legend()
+        fig.colorbar(contour, ax=ax, label="Predicted value")
+
+    with span("st.pyplot"):
+        st.pyplot(fig)
+    plt.close(fig)
+    st.caption(f"{grid['n_rows']:,} grid points scored in {grid['elapsed_ms']:.1f} ms")
+
+
+# ---------------------------------------------------------
+# MAIN PAGE
+# ---------------------------------------------------------
+def main():
+    configure_page("ClarityPredict – Prediction")
+    render_page_top()
 
     # ---------------------------------------------------------
     # INTRO SECTION
@@ -66,15 +198,20 @@ def main():
         st.markdown("<div class='cp-card'>", unsafe_allow_html=True)
         st.subheader("Input Biomarkers")
 
-        with st.form("prediction_form"):
-            age = st.number_input("Age", min_value=18, max_value=100, value=45)
-            bmi = st.number_input("BMI", min_value=10.0, max_value=60.0, value=24.5)
-            glucose = st.number_input("Glucose", min_value=50.0, max_value=300.0, value=90.0)
-            insulin = st.number_input("Insulin", min_value=0.0, max_value=300.0, value=80.0)
-            hdl = st.number_input("HDL Cholesterol", min_value=10.0, max_value=120.0, value=55.0)
-            ldl = st.number_input("LDL Cholesterol", min_value=10.0, max_value=300.0, value=120.0)
+        live_mode = st.toggle(
+            "Live mode",
+            help="Update the prediction while you edit values; SHAP plots follow once the values settle.",
+        )
 
-            submitted = st.form_submit_button("Predict")
+        submitted = False
+        patient_id = ""
+        if live_mode:
+            live_input = biomarker_inputs(key_prefix="live_")
+        else:
+            with st.form("prediction_form"):
+                patient_id = st.text_input("Patient ID (optional)", help="Stores the prediction in the patient's history")
+                form_input = biomarker_inputs()
+                submitted = st.form_submit_button("Predict")
 
         st.markdown("</div>", unsafe_allow_html=True)
 
@@ -83,90 +220,125 @@ def main():
         st.markdown("<div class='cp-card'>", unsafe_allow_html=True)
         st.subheader("Prediction Result")
 
-        if submitted:
-            input_data = {
-                "age": age,
-                "bmi": bmi,
-                "glucose": glucose,
-                "insulin": insulin,
-                "hdl": hdl,
-                "ldl": ldl,
-            }
-
-            result = service.run(input_data)
-
-            metric_card(
-                title="Predicted Value",
-                value=f"{result['prediction']:.3f}",
-                description="Model output based on your biomarker inputs"
-            )
-
+        if live_mode:
+            render_live_preview(live_input)
+            watch_settled_input()
         else:
-            st.info("Enter biomarker values and click **Predict** to see the result.")
+            if submitted:
+                input_data = form_input
+                result = service.run(input_data)
+
+                if patient_id:
+                    with span("history.record"):
+                        history.record(
+                            patient_id,
+                            [input_data[f] for f in service.expected_features],
+                            result["prediction"],
+                            service.model_version,
+                            shap_values=result["shap_values"][0],
+                        )
+
+                # Keep the latest result across reruns triggered by other widgets
+                st.session_state["last_prediction"] = (input_data, result)
+
+            if "last_prediction" in st.session_state:
+                input_data, result = st.session_state["last_prediction"]
+
+                description = "Model output based on your biomarker inputs"
+                if result.get("interval") is not None:
+                    lower, upper = result["interval"]
+                    description = f"{result['interval_coverage']:.0%} interval: {lower:.3f} – {upper:.3f}"
+
+                metric_card(
+                    title="Predicted Value",
+                    value=f"{result['prediction']:.3f}",
+                    description=description
+                )
+
+            else:
+                st.info("Enter biomarker values and click **Predict** to see the result.")
 
         st.markdown("</div>", unsafe_allow_html=True)
 
     st.markdown("</div>", unsafe_allow_html=True)
 
+    # In live mode this is the last settled input; previews above may be newer
+    has_result = "last_prediction" in st.session_state
+    if has_result:
+        input_data, result = st.session_state["last_prediction"]
+
     # ---------------------------------------------------------
     # SHAP EXPLANATION SECTION
     # ---------------------------------------------------------
-    if submitted:
+    if has_result:
         st.markdown("<div class='cp-section'><div class='cp-card'>", unsafe_allow_html=True)
         st.subheader("Explainability (SHAP)")
 
         shap_values = result["shap_values"]
         feature_names = result["feature_names"]
+        feature_values = pd.DataFrame(result["feature_values"], columns=feature_names)
         base_value = result["base_value"]
 
+        if not result.get("shap_converged", True):
+            st.caption(
+                "SHAP values are approximate: the explanation time budget ran out before "
+                f"they converged (max. standard error ±{np.max(result['shap_std_errors']):.4f})."
+            )
+
         tab1, tab2, tab3 = st.tabs(["Summary Plot", "Feature Impact", "Waterfall Plot"])
 
         # --- TAB 1: SUMMARY PLOT ---
-        with tab1:
+        with tab1, span("render.summary_plot"):
             try:
-                plt.figure(figsize=(7, 4))
-                shap.summary_plot(
-                    shap_values,
-                    pd.DataFrame([input_data])[feature_names],
-                    plot_type="dot",
-                    show=False
-                )
-                st.pyplot(plt.gcf())
+                with span("draw"):
+                    plt.figure(figsize=(7, 4))
+                    shap.summary_plot(
+                        shap_values,
+                        feature_values,
+                        plot_type="dot",
+                        show=False
+                    )
+                with span("st.pyplot"):
+                    st.pyplot(plt.gcf())
                 plt.clf()
             except Exception as e:
                 st.error(f"Summary plot failed: {e}")
 
         # --- TAB 2: BAR CHART ---
-        with tab2:
+        with tab2, span("render.bar_chart"):
             try:
-                shap_df = pd.DataFrame({
-                    "Feature": feature_names,
-                    "SHAP Value": shap_values[0]
-                }).sort_values("SHAP Value", key=abs, ascending=False)
-
-                fig_bar, ax_bar = plt.subplots(figsize=(6, 4))
-                ax_bar.barh(shap_df["Feature"], shap_df["SHAP Value"], color="#457B9D")
-                ax_bar.set_xlabel("Impact on Prediction")
-                ax_bar.set_title("SHAP Feature Importance")
-                plt.gca().invert_yaxis()
-
-                st.pyplot(fig_bar)
+                with span("draw"):
+                    shap_df = pd.DataFrame({
+                        "Feature": feature_names,
+                        "SHAP Value": shap_values[0]
+                    }).sort_values("SHAP Value", key=abs, ascending=False)
+
+                    fig_bar, ax_bar = plt.subplots(figsize=(6, 4))
+                    ax_bar.barh(shap_df["Feature"], shap_df["SHAP Value"], color="#457B9D")
+                    ax_bar.set_xlabel("Impact on Prediction")
+                    ax_bar.set_title("SHAP Feature Importance")
+                    plt.gca().invert_yaxis()
+
+                with span("st.pyplot"):
+                    st.pyplot(fig_bar)
             except Exception as e:
                 st.error(f"Bar chart failed: {e}")
 
         # --- TAB 3: WATERFALL PLOT ---
-        with tab3:
+        with tab3, span("render.waterfall"):
             try:
-                shap_expl = shap.Explanation(
-                    values=shap_values[0],
-                    base_values=base_value,
-                    data=pd.DataFrame([input_data])[feature_names].iloc[0],
-                    feature_names=feature_names
-                )
-
-                plt.figure(figsize=(8, 5))
-                shap.plots.waterfall(shap_expl, show=False)
-                st.pyplot(plt.gcf())
+                with span("draw"):
+                    shap_expl = shap.Explanation(
+                        values=shap_values[0],
+                        base_values=base_value,
+                        data=feature_values.iloc[0],
+                        feature_names=feature_names
+                    )
+
+                    plt.figure(figsize=(8, 5))
+                    shap.plots.waterfall(shap_expl, show=False)
+                with span("st.pyplot"):
+                    st.pyplot(plt.gcf())
                 plt.clf()
 
             except Exception as e:
@@ -174,9 +346,80 @@ def main():
 
         st.markdown("</div></div>", unsafe_allow_html=True)
 
-    render_footer()
-    st.markdown("</div>", unsafe_allow_html=True)
+    # ---------------------------------------------------------
+    # WHAT-IF SENSITIVITY SECTION
+    # ---------------------------------------------------------
+    if has_result:
+        st.markdown("<div class='cp-section'><div class='cp-card'>", unsafe_allow_html=True)
+        st.subheader("What‑If Analysis")
+        st.caption(
+            "Vary one or two biomarkers across their plausible range while keeping the "
+            "others at the entered values. The whole grid is scored in one batch."
+        )
+
+        with st.form("whatif_form"):
+            whatif_features = st.multiselect(
+                "Biomarkers to vary (one or two)",
+                service.expected_features,
+                default=["glucose"],
+                max_selections=2,
+            )
+            resolution = st.slider("Grid resolution", min_value=20, max_value=100, value=100, step=10)
+            run_whatif = st.form_submit_button("Run analysis")
+
+        if run_whatif and whatif_features:
+            grid = service.sensitivity_grid(input_data, whatif_features, n_points=resolution)
+            with span("render.sensitivity"):
+                render_sensitivity(grid, input_data)
+
+        st.markdown("</div></div>", unsafe_allow_html=True)
+
+    # ---------------------------------------------------------
+    # SIMILAR PATIENTS SECTION
+    # ---------------------------------------------------------
+    if has_result:
+        st.markdown("<div class='cp-section'><div class='cp-card'>", unsafe_allow_html=True)
+        st.subheader("Similar Patients")
+
+        start = time.perf_counter()
+        with span("similarity.query", k=5):
+            neighbors = similarity.query(result["input_df"].to_numpy()[0], k=5)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+        st.dataframe(
+            neighbors.drop(columns="row").rename(columns={"distance": "Distance", "outcome": "Outcome"}),
+            hide_index=True,
+        )
+        st.caption(
+            f"Nearest of {similarity.n_rows} cohort patients in the model's scaled feature space "
+            f"({elapsed_ms:.1f} ms)."
+        )
+
+        st.markdown("</div></div>", unsafe_allow_html=True)
+
+    # ---------------------------------------------------------
+    # PATIENT HISTORY SECTION
+    # ---------------------------------------------------------
+    if submitted and patient_id:
+        # The prediction just recorded may still be queued for the writer
+        trajectory = history.trajectory(patient_id, include_pending=True)
+
+        if len(trajectory) > 1:
+            st.markdown("<div class='cp-section'><div class='cp-card'>", unsafe_allow_html=True)
+            st.subheader(f"Prediction History – {patient_id}")
+
+            series = trajectory.set_index("ts")
+            columns = ["prediction"] + service.expected_features
+            for tab, column in zip(st.tabs([c.upper() if len(c) <= 3 else c.title() for c in columns]), columns):
+                with tab:
+                    st.line_chart(series[[column]])
+
+            st.markdown("</div></div>", unsafe_allow_html=True)
+
+    render_page_bottom()
 
 
 if __name__ == "__main__":
-    main()
+    # Sampled at TRACE_SAMPLE_RATE; ?trace=1 in the URL traces this run
+    with trace("Prediction page", force=st.query_params.get("trace") == "1"):
+        main()
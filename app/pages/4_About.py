@@ -2,22 +2,12 @@
 
 import streamlit as st
 
-from app.layout.style import inject_global_styles
-from app.components.header import render_header
-from app.components.footer import render_footer
+from app.layout.shell import configure_page, render_page_bottom, render_page_top
 
 
 def main():
-    st.set_page_config(
-        page_title="ClarityPredict – About",
-        layout="wide",
-        page_icon="assets/icons/ico_logo.png"
-    )
-
-    inject_global_styles()
-
-    st.markdown("<div class='cp-container'>", unsafe_allow_html=True)
-    render_header()
+    configure_page("ClarityPredict – About")
+    render_page_top()
 
     # ---------------------------------------------------------
     # INTRO CARD
@@ -57,7 +47,7 @@ def main():
 
         - <strong>app/components</strong> – Header, footer, metric cards, and UI elements  
         - <strong>app/layout</strong> – Global CSS, branding, and styling  
-        - <strong>app/pages</strong> – Streamlit multipage views (Overview, Explore, Prediction, About)  
+        - <strong>app/pages</strong> – Streamlit multipage views (Overview, Explore, Prediction, About, Monitoring, Batch Scoring)  
         - <strong>app/services</strong> – PredictionService, preprocessing, model inference, SHAP logic  
         - <strong>models/</strong> – Trained model and preprocessing artifacts  
         - <strong>data/</strong> – Biomarker dataset used for training  
@@ -167,8 +157,7 @@ def main():
     # ---------------------------------------------------------
     # FOOTER
     # ---------------------------------------------------------
-    render_footer()
-    st.markdown("</div>", unsafe_allow_html=True)
+    render_page_bottom()
 
 
 if __name__ == "__main__":
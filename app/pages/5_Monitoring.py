@@ -0,0 +1,185 @@
+# Monitoring page for ClarityPredict 2.0
+
+import streamlit as st
+import numpy as np
+import matplotlib.pyplot as plt
+
+from app.layout.shell import configure_page, render_page_bottom, render_page_top
+from app.components.metrics import metric_card
+from app.services.drift import PSI_MAJOR, PSI_MODERATE, Sketch, drift_report, load_window
+from app.services.feature_cache import file_digest
+from app.services.prediction_service import BASE_DIR
+from app.services.shadow import shadow_report
+from config import settings
+
+
+# ---------------------------------------------------------
+# Load drift reference
+# ---------------------------------------------------------
+@st.cache_resource
+def load_reference():
+    return Sketch.load(BASE_DIR / settings.DRIFT_REFERENCE_PATH)
+
+
+def bin_labels(edges: np.ndarray) -> list:
+    """Readable labels for the value bins of one column (padding removed)."""
+    edges = edges[np.isfinite(edges)]
+    labels = [f"< {edges[0]:.4g}"]
+    labels += [f"{lo:.4g}–{hi:.4g}" for lo, hi in zip(edges[:-1], edges[1:])]
+    labels.append(f"≥ {edges[-1]:.4g}")
+    return labels
+
+
+# ---------------------------------------------------------
+# MAIN PAGE
+# ---------------------------------------------------------
+def main():
+    configure_page("ClarityPredict – Monitoring")
+    render_page_top()
+
+    reference = load_reference()
+    if reference is None:
+        st.warning(
+            "No drift reference found. Run the training pipeline to create "
+            f"`{settings.DRIFT_REFERENCE_PATH}`."
+        )
+        render_page_bottom()
+        return
+
+    # ---------------------------------------------------------
+    # WINDOW SELECTION
+    # ---------------------------------------------------------
+    st.subheader("Input Drift Monitoring")
+    st.markdown("<div class='cp-section'><div class='cp-card'>", unsafe_allow_html=True)
+
+    days = st.slider(
+        "Monitoring window (days)", min_value=1, max_value=settings.DRIFT_RETENTION_DAYS,
+        value=min(7, settings.DRIFT_RETENTION_DAYS),
+    )
+    current = load_window(BASE_DIR / settings.DRIFT_SKETCH_DIR, reference, days=days)
+    report = drift_report(reference, current)
+
+    st.caption(
+        "Scored inputs and predictions are summarized in per-process histogram sketches "
+        f"(flushed every {settings.DRIFT_FLUSH_INTERVAL:.0f} s) and compared with the "
+        "training distribution."
+    )
+    st.markdown("</div></div>", unsafe_allow_html=True)
+
+    n_observed = int(report["n"].max())
+    if n_observed == 0:
+        st.info("No scored requests recorded in this window yet.")
+        render_shadow_section()
+        render_page_bottom()
+        return
+
+    # ---------------------------------------------------------
+    # SUMMARY
+    # ---------------------------------------------------------
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        metric_card(
+            title="Scored Requests",
+            value=f"{n_observed:,}",
+            description=f"Last {days} day(s)"
+        )
+    with col2:
+        metric_card(
+            title="Major Drift",
+            value=str(int((report["status"] == "major").sum())),
+            description=f"Columns with PSI ≥ {PSI_MAJOR}"
+        )
+    with col3:
+        metric_card(
+            title="Moderate Drift",
+            value=str(int((report["status"] == "moderate").sum())),
+            description=f"Columns with PSI ≥ {PSI_MODERATE}"
+        )
+
+    # ---------------------------------------------------------
+    # DRIFT SCORES
+    # ---------------------------------------------------------
+    st.subheader("Drift Scores")
+    st.markdown("<div class='cp-section'><div class='cp-card'>", unsafe_allow_html=True)
+
+    st.dataframe(
+        report.rename(columns={
+            "column": "Column", "n": "Observed",
+            "psi": "PSI", "ks": "KS", "status": "Status",
+        }).round(4),
+        hide_index=True,
+    )
+
+    fig, ax = plt.subplots(figsize=(7, 3.5))
+    ax.barh(report["column"], report["psi"], color="#457B9D")
+    ax.axvline(PSI_MODERATE, color="#E9C46A", linestyle="--", label="Moderate")
+    ax.axvline(PSI_MAJOR, color="#E63946", linestyle="--", label="Major")
+    ax.set_xlabel("Population stability index")
+    ax.legend(loc="lower right")
+    st.pyplot(fig)
+    plt.close(fig)
+
+    st.markdown("</div></div>", unsafe_allow_html=True)
+
+    # ---------------------------------------------------------
+    # DISTRIBUTION COMPARISON
+    # ---------------------------------------------------------
+    st.subheader("Distribution Comparison")
+    st.markdown("<div class='cp-section'><div class='cp-card'>", unsafe_allow_html=True)
+
+    column = st.selectbox("Column", reference.columns)
+    j = reference.columns.index(column)
+    labels = bin_labels(reference.edges[j])
+    n_bins = len(labels)
+
+    ref_share = reference.counts[j, :n_bins] / max(reference.totals[j], 1)
+    cur_share = current.counts[j, :n_bins] / max(current.totals[j], 1)
+
+    fig2, ax2 = plt.subplots(figsize=(8, 4))
+    positions = np.arange(n_bins)
+    ax2.bar(positions - 0.2, ref_share, width=0.4, label="Training", color="#A8DADC")
+    ax2.bar(positions + 0.2, cur_share, width=0.4, label="Live", color="#457B9D")
+    ax2.set_xticks(positions)
+    ax2.set_xticklabels(labels, rotation=60, ha="right", fontsize=8)
+    ax2.set_ylabel("Share of values")
+    ax2.legend()
+    fig2.tight_layout()
+    st.pyplot(fig2)
+    plt.close(fig2)
+
+    st.markdown("</div></div>", unsafe_allow_html=True)
+
+    render_shadow_section()
+
+    render_page_bottom()
+
+
+def render_shadow_section():
+    """Champion/challenger comparison from the shadow logs of the current model."""
+    champion_version = file_digest(BASE_DIR / "models/model.pkl")[:12]
+    report = shadow_report(BASE_DIR / settings.SHADOW_LOG_DIR / champion_version)
+    if report.empty:
+        return
+
+    st.subheader("Champion vs. Challengers")
+    st.markdown("<div class='cp-section'><div class='cp-card'>", unsafe_allow_html=True)
+
+    st.dataframe(
+        report.rename(columns={
+            "challenger": "Challenger", "n": "Requests", "mean_diff": "Mean diff",
+            "mae": "MAE vs champion", "rmse": "RMSE vs champion", "max_abs_diff": "Max |diff|",
+            "agreement": "Agreement (±0.05)", "correlation": "Correlation",
+            "p95_latency_ms": "p95 latency (ms)", "last_seen": "Last seen",
+        }).round(4),
+        hide_index=True,
+    )
+    st.caption(
+        f"Challengers score live requests in the background for champion {champion_version}; "
+        "under load their work is shed first."
+    )
+
+    st.markdown("</div></div>", unsafe_allow_html=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# Batch scoring page for ClarityPredict 2.0
+
+import streamlit as st
+
+from app.layout.shell import configure_page, render_page_bottom, render_page_top
+from app.services.batch_jobs import BatchJobManager
+from app.services.prediction_service import BASE_DIR, PredictionService
+from config import settings
+
+
+# ---------------------------------------------------------
+# Load PredictionService and the shared job queue
+# ---------------------------------------------------------
+@st.cache_resource
+def load_service():
+    return PredictionService("models/model.pkl")
+
+
+@st.cache_resource
+def load_manager():
+    return BatchJobManager(
+        load_service(),
+        BASE_DIR / settings.BATCH_WORK_DIR,
+        chunk_rows=settings.BATCH_CHUNK_ROWS,
+        workers=settings.BATCH_WORKERS,
+        retention_hours=settings.BATCH_RETENTION_HOURS,
+    )
+
+manager = load_manager()
+service = manager.service
+
+
+# ---------------------------------------------------------
+# JOBS
+# ---------------------------------------------------------
+def session_jobs():
+    jobs = [manager.get(job_id) for job_id in st.session_state.get("batch_jobs", [])]
+    return [job for job in reversed(jobs) if job is not None]
+
+
+def progress_text(job) -> str:
+    text = f"{job.done:,} / {job.total:,} rows · {job.rows_per_sec:,.0f} rows/s"
+    if job.invalid:
+        text += f" · {job.invalid:,} invalid"
+    return text
+
+
+@st.fragment(run_every=1.0)
+def render_active_jobs(job_ids):
+    """
+    Progress of running jobs. Only this fragment reruns while polling; the
+    whole page reruns once a job finishes, to show its download.
+    """
+    jobs = [job for job in (manager.get(job_id) for job_id in job_ids) if job is not None]
+    # A finished or expired job changes the page layout, not just this fragment
+    if len(jobs) < len(job_ids) or any(not job.active for job in jobs):
+        st.rerun()
+
+    for job in jobs:
+        st.markdown(f"**{job.filename}** · {job.status}")
+        st.progress(job.fraction, text=progress_text(job))
+        st.button("Cancel", key=f"cancel_{job.id}", on_click=manager.cancel, args=(job.id,))
+
+
+def render_finished_job(job):
+    st.markdown(f"**{job.filename}** · {job.status}")
+    st.caption(progress_text(job))
+
+    if job.status == "failed":
+        st.error(f"Scoring failed: {job.error}")
+    elif job.status == "done":
+        with open(job.output_path, "rb") as fh:
+            st.download_button(
+                "Download results",
+                data=fh,
+                file_name=job.download_name,
+                mime="text/csv" if job.fmt == "csv" else "application/octet-stream",
+                key=f"download_{job.id}",
+            )
+
+
+# ---------------------------------------------------------
+# MAIN PAGE
+# ---------------------------------------------------------
+def main():
+    configure_page("ClarityPredict – Batch Scoring")
+    render_page_top()
+
+    # ---------------------------------------------------------
+    # INTRO SECTION
+    # ---------------------------------------------------------
+    st.markdown("<div class='cp-section'><div class='cp-card'>", unsafe_allow_html=True)
+
+    st.markdown(
+        f"""
+        ### Batch Scoring
+        Upload a CSV or Parquet file with one patient per row. It needs the columns
+        **{", ".join(service.expected_features)}** (any letter case); other columns are kept
+        in the output. Rows are validated and scored in chunks in the background, so you can
+        keep using the app while a large file is processed.
+        """,
+        unsafe_allow_html=True
+    )
+
+    st.markdown("</div></div>", unsafe_allow_html=True)
+
+    # ---------------------------------------------------------
+    # UPLOAD SECTION
+    # ---------------------------------------------------------
+    st.markdown("<div class='cp-section'><div class='cp-card'>", unsafe_allow_html=True)
+    st.subheader("Upload")
+
+    with st.form("batch_form", clear_on_submit=True):
+        upload = st.file_uploader("Patient file", type=["csv", "parquet"])
+        with_intervals = st.checkbox(
+            "Include prediction intervals",
+            value=service.intervals is not None,
+            disabled=service.intervals is None,
+        )
+        with_shap = st.checkbox("Include SHAP columns (slower)")
+        submitted = st.form_submit_button("Start scoring")
+
+    if submitted:
+        if upload is None:
+            st.warning("Choose a file first.")
+        else:
+            try:
+                job = manager.submit(upload, upload.name, with_shap=with_shap, with_intervals=with_intervals)
+                st.session_state.setdefault("batch_jobs", []).append(job.id)
+            except ValueError as e:
+                st.error(str(e))
+
+    st.markdown("</div></div>", unsafe_allow_html=True)
+
+    # ---------------------------------------------------------
+    # JOBS SECTION
+    # ---------------------------------------------------------
+    st.markdown("<div class='cp-section'><div class='cp-card'>", unsafe_allow_html=True)
+    st.subheader("Jobs")
+    jobs = session_jobs()
+    if not jobs:
+        st.info("No batch jobs in this session yet.")
+
+    active = [job.id for job in jobs if job.active]
+    if active:
+        render_active_jobs(active)
+    for job in jobs:
+        if not job.active:
+            render_finished_job(job)
+
+    st.caption(
+        f"Files are scored {settings.BATCH_CHUNK_ROWS:,} rows at a time by "
+        f"{settings.BATCH_WORKERS} shared workers; results are kept for "
+        f"{settings.BATCH_RETENTION_HOURS:.0f} hours."
+    )
+    st.markdown("</div></div>", unsafe_allow_html=True)
+
+    render_page_bottom()
+
+
+if __name__ == "__main__":
+    main()
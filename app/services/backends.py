@@ -0,0 +1,369 @@
+# backends.py
+# Pluggable inference backends for ClarityPredict 2.0
+
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from app.services.threading_policy import ThreadingPolicy
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on (trees x rows) node indices held in memory per traversal chunk
+_TRAVERSAL_CELLS = 1 << 21
+
+
+# ---------------------------------------------------------
+# Base class
+# ---------------------------------------------------------
+class InferenceBackend:
+    """
+    Common interface for model runtimes. ``predict`` receives the imputed and
+    scaled feature matrix produced by PredictionService and returns a 1-D
+    array of predictions.
+    """
+
+    name = "base"
+
+    def predict(self, X: Any) -> np.ndarray:
+        raise NotImplementedError
+
+
+# ---------------------------------------------------------
+# Native sklearn / XGBoost
+# ---------------------------------------------------------
+class NativeBackend(InferenceBackend):
+    """Calls the estimator's own ``predict``, with threads chosen per call by ``policy`` if given."""
+
+    name = "native"
+
+    def __init__(self, model: Any, policy: Optional[ThreadingPolicy] = None):
+        self.model = model
+        self._predict = policy.predictor(model) if policy is not None else model.predict
+
+    def predict(self, X: Any) -> np.ndarray:
+        return np.asarray(self._predict(X)).reshape(-1)
+
+
+# ---------------------------------------------------------
+# Pure NumPy evaluator
+# ---------------------------------------------------------
+class TreeEnsembleArrays:
+    """
+    Padded node arrays for a tree ensemble, shape (n_trees, max_nodes).
+    All trees are traversed together, one level per step, for a whole
+    batch of rows at a time.
+    """
+
+    def __init__(
+        self,
+        left: np.ndarray,
+        right: np.ndarray,
+        missing: np.ndarray,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        value: np.ndarray,
+        depth: int,
+        strict_less: bool,
+    ):
+        self.left = left
+        self.right = right
+        self.missing = missing
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.depth = depth
+        self.strict_less = strict_less
+
+        # Flattened lookup tables: children are stored as absolute offsets
+        # into the flattened arrays, and leaves point at themselves so a
+        # fixed number of steps settles every row on its leaf.
+        n_trees, n_nodes = left.shape
+        offsets = (np.arange(n_trees) * n_nodes)[:, None]
+        own = offsets + np.arange(n_nodes)[None, :]
+        leaf = left < 0
+
+        self._left = np.where(leaf, own, offsets + left).ravel()
+        self._right = np.where(leaf, own, offsets + right).ravel()
+        self._missing = np.where(leaf, own, offsets + missing).ravel()
+        self._feature = feature.ravel()
+        self._threshold = threshold.ravel()
+        self._value = value.ravel()
+        self._roots = offsets
+
+    @property
+    def n_trees(self) -> int:
+        return self.left.shape[0]
+
+    @classmethod
+    def from_sklearn(cls, trees: list) -> "TreeEnsembleArrays":
+        """Build from fitted sklearn ``Tree`` objects (``estimator.tree_``)."""
+        n_nodes = max(t.node_count for t in trees)
+        shape = (len(trees), n_nodes)
+
+        left = np.full(shape, -1, dtype=np.int64)
+        right = np.full(shape, -1, dtype=np.int64)
+        feature = np.zeros(shape, dtype=np.int64)
+        threshold = np.zeros(shape, dtype=np.float64)
+        value = np.zeros(shape, dtype=np.float64)
+
+        for i, t in enumerate(trees):
+            n = t.node_count
+            left[i, :n] = t.children_left
+            right[i, :n] = t.children_right
+            feature[i, :n] = np.maximum(t.feature, 0)
+            threshold[i, :n] = t.threshold
+            value[i, :n] = t.value[:, 0, 0]
+
+        depth = max(t.max_depth for t in trees)
+        return cls(left, right, left, feature, threshold, value, depth, strict_less=False)
+
+    @classmethod
+    def from_xgboost(cls, booster: Any, feature_names: Optional[list] = None) -> "TreeEnsembleArrays":
+        """Build from an XGBoost booster via its JSON tree dump."""
+        dumps = [json.loads(d) for d in booster.get_dump(dump_format="json")]
+        names = feature_names or booster.feature_names
+        lookup = {name: i for i, name in enumerate(names)} if names else {}
+
+        def feature_index(split: str) -> int:
+            if split in lookup:
+                return lookup[split]
+            return int(split.lstrip("f"))
+
+        tables = []
+        for tree in dumps:
+            nodes, depth, stack = {}, 0, [(tree, 0)]
+            while stack:
+                node, level = stack.pop()
+                nodes[node["nodeid"]] = node
+                depth = max(depth, level)
+                stack.extend((child, level + 1) for child in node.get("children", []))
+            tables.append({"nodes": nodes, "depth": depth})
+
+        n_nodes = max(max(t["nodes"]) + 1 for t in tables)
+        shape = (len(tables), n_nodes)
+
+        left = np.full(shape, -1, dtype=np.int64)
+        right = np.full(shape, -1, dtype=np.int64)
+        missing = np.full(shape, -1, dtype=np.int64)
+        feature = np.zeros(shape, dtype=np.int64)
+        threshold = np.zeros(shape, dtype=np.float32)
+        value = np.zeros(shape, dtype=np.float64)
+
+        for i, table in enumerate(tables):
+            for node_id, node in table["nodes"].items():
+                if "leaf" in node:
+                    value[i, node_id] = node["leaf"]
+                    continue
+                left[i, node_id] = node["yes"]
+                right[i, node_id] = node["no"]
+                missing[i, node_id] = node["missing"]
+                feature[i, node_id] = feature_index(node["split"])
+                threshold[i, node_id] = node["split_condition"]
+
+        depth = max(t["depth"] for t in tables)
+        return cls(left, right, missing, feature, threshold, value, depth, strict_less=True)
+
+    def leaf_values(self, X: np.ndarray) -> np.ndarray:
+        """Per-tree outputs, shape (n_trees, n_rows)."""
+        X = np.asarray(X, dtype=np.float32)
+        n_rows = X.shape[0]
+        out = np.empty((self.n_trees, n_rows), dtype=np.float64)
+
+        chunk = max(1, _TRAVERSAL_CELLS // self.n_trees)
+        for start in range(0, n_rows, chunk):
+            block = X[start:start + chunk]
+            out[:, start:start + chunk] = self._traverse(block)
+
+        return out
+
+    def _traverse(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_features = X.shape
+        flat_x = X.ravel()
+        row_offsets = (np.arange(n_rows) * n_features)[None, :]
+        has_missing = bool(np.isnan(X).any())
+
+        node = np.broadcast_to(self._roots, (self.n_trees, n_rows))
+        for _ in range(self.depth):
+            x = flat_x.take(row_offsets + self._feature.take(node))
+            thr = self._threshold.take(node)
+            go_left = x < thr if self.strict_less else x <= thr
+            nxt = np.where(go_left, self._left.take(node), self._right.take(node))
+            if has_missing:
+                nxt = np.where(np.isnan(x), self._missing.take(node), nxt)
+            node = nxt
+
+        return self._value.take(node)
+
+
+def _xgboost_base_score(booster: Any) -> float:
+    config = json.loads(booster.save_config())
+    raw = config["learner"]["learner_model_param"]["base_score"]
+    # XGBoost >= 3 stores a vector such as "[5E-1]"
+    return float(str(raw).strip("[]").split(",")[0])
+
+
+class NumpyBackend(InferenceBackend):
+    """
+    Dependency-free evaluator for the model families ClarityPredict trains:
+    linear models, sklearn forests / gradient boosting, and XGBoost.
+    """
+
+    name = "numpy"
+
+    def __init__(self, model: Any):
+        self.kind = None
+        self.trees: Optional[TreeEnsembleArrays] = None
+        self.coef = None
+        self.intercept = 0.0
+        self.scale = 1.0
+        self._compile(model)
+
+    def _compile(self, model: Any) -> None:
+        kind = type(model).__name__
+
+        if hasattr(model, "coef_"):
+            self.kind = "linear"
+            self.coef = np.asarray(model.coef_, dtype=np.float64).reshape(-1)
+            self.intercept = float(np.asarray(model.intercept_).reshape(-1)[0])
+        elif kind in ("RandomForestRegressor", "ExtraTreesRegressor"):
+            self.kind = "forest"
+            self.trees = TreeEnsembleArrays.from_sklearn([e.tree_ for e in model.estimators_])
+        elif kind == "GradientBoostingRegressor":
+            self.kind = "boosting"
+            self.trees = TreeEnsembleArrays.from_sklearn(
+                [e.tree_ for e in model.estimators_[:, 0]]
+            )
+            self.scale = float(model.learning_rate)
+            self.intercept = float(np.asarray(model.init_.constant_).reshape(-1)[0])
+        elif kind == "XGBRegressor":
+            self.kind = "boosting"
+            booster = model.get_booster()
+            self.trees = TreeEnsembleArrays.from_xgboost(booster)
+            self.intercept = _xgboost_base_score(booster)
+        else:
+            raise TypeError(f"NumpyBackend does not support model type {kind}")
+
+        logger.info("NumpyBackend compiled %s as %s", kind, self.kind)
+
+    def predict(self, X: Any) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+
+        if self.kind == "linear":
+            return X @ self.coef + self.intercept
+
+        per_tree = self.trees.leaf_values(X)
+        if self.kind == "forest":
+            return per_tree.mean(axis=0)
+        return self.intercept + self.scale * per_tree.sum(axis=0)
+
+
+# ---------------------------------------------------------
+# ONNX Runtime (CPU)
+# ---------------------------------------------------------
+def export_onnx(model: Any, n_features: int, path: Path) -> bool:
+    """
+    Write ``model`` as an ONNX graph over the prepared feature matrix, the
+    same input every other backend receives; preprocessing stays in
+    PredictionService. Tree models take float32, which is what sklearn and
+    XGBoost cast to internally, so splits are unchanged; linear models keep
+    float64. Returns False if the converters are not installed.
+    """
+    try:
+        from skl2onnx import convert_sklearn, update_registered_converter
+        from skl2onnx.common.data_types import DoubleTensorType, FloatTensorType
+        from skl2onnx.common.shape_calculator import calculate_linear_regressor_output_shapes
+    except ImportError:
+        logger.info("skl2onnx not installed; skipping ONNX export.")
+        return False
+
+    if hasattr(model, "get_booster"):
+        try:
+            from onnxmltools.convert.xgboost.operator_converters.XGBoost import convert_xgboost
+        except ImportError:
+            logger.info("onnxmltools not installed; skipping ONNX export for XGBoost.")
+            return False
+        update_registered_converter(
+            type(model),
+            "XGBoostXGBRegressor",
+            calculate_linear_regressor_output_shapes,
+            convert_xgboost,
+        )
+
+    tensor = DoubleTensorType if hasattr(model, "coef_") else FloatTensorType
+    onnx_model = convert_sklearn(
+        model,
+        initial_types=[("features", tensor([None, n_features]))],
+        target_opset={"": 17, "ai.onnx.ml": 3},
+    )
+    Path(path).write_bytes(onnx_model.SerializeToString())
+    return True
+
+
+class OnnxBackend(InferenceBackend):
+    """Runs the model graph written by ``export_onnx`` on the prepared feature matrix."""
+
+    name = "onnx"
+
+    def __init__(self, onnx_path: Path, threads: int = 0):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("The ONNX backend requires the 'onnxruntime' package.") from e
+
+        if not Path(onnx_path).exists():
+            raise FileNotFoundError(f"ONNX model not found: {onnx_path}")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # ORT runs small inputs inline, so one pool sized for batches also serves single rows
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            str(onnx_path), options, providers=["CPUExecutionProvider"]
+        )
+        graph_input = self.session.get_inputs()[0]
+        self.input_name = graph_input.name
+        self.input_dtype = np.float64 if graph_input.type == "tensor(double)" else np.float32
+
+    def predict(self, X: Any) -> np.ndarray:
+        features = np.ascontiguousarray(np.asarray(X, dtype=self.input_dtype))
+        output = self.session.run(None, {self.input_name: features})[0]
+        return np.asarray(output, dtype=np.float64).reshape(-1)
+
+
+# ---------------------------------------------------------
+# Factory
+# ---------------------------------------------------------
+def create_backend(
+    name: str,
+    model: Any,
+    onnx_path: Optional[Path] = None,
+    policy: Optional[ThreadingPolicy] = None,
+) -> InferenceBackend:
+    if name == "native":
+        return NativeBackend(model, policy)
+    if name == "numpy":
+        return NumpyBackend(model)
+    if name == "onnx":
+        return OnnxBackend(onnx_path, threads=policy.batch_threads if policy is not None else 0)
+    raise ValueError(f"Unknown inference backend: {name!r}")
+
+
+def check_parity(backend: InferenceBackend, reference: InferenceBackend, X: np.ndarray, tolerance: float) -> float:
+    """Return the max relative deviation from ``reference``; raise if it exceeds ``tolerance``."""
+    expected = reference.predict(X)
+    actual = backend.predict(X)
+    deviation = float(np.max(np.abs(expected - actual) / (1.0 + np.abs(expected))))
+
+    if deviation > tolerance:
+        raise RuntimeError(
+            f"Backend '{backend.name}' deviates from native predictions by {deviation:.2e} "
+            f"(tolerance {tolerance:.1e})."
+        )
+    return deviation
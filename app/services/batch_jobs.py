@@ -0,0 +1,360 @@
+# batch_jobs.py
+# Background batch scoring of uploaded patient files for ClarityPredict 2.0
+
+from __future__ import annotations
+
+import atexit
+import logging
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from app.services.prediction_service import PredictionService
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = ("csv", "parquet")
+
+# Block size for copying uploads to disk and for streaming CSV reads
+_COPY_BLOCK_BYTES = 1 << 20
+
+
+# ---------------------------------------------------------
+# Data structures
+# ---------------------------------------------------------
+@dataclass
+class BatchJob:
+    id: str
+    filename: str
+    fmt: str
+    input_path: Path
+    output_path: Path
+    column_map: Dict[str, str]
+    with_shap: bool = False
+    with_intervals: bool = False
+    total: int = 0
+    done: int = 0
+    invalid: int = 0
+    status: str = "queued"          # queued | running | done | failed | cancelled
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    cancel_requested: bool = False
+
+    @property
+    def fraction(self) -> float:
+        return min(self.done / self.total, 1.0) if self.total else 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        if self.started is None:
+            return 0.0
+        elapsed = (self.finished or time.monotonic()) - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    @property
+    def download_name(self) -> str:
+        return f"{Path(self.filename).stem}_scored.{self.fmt}"
+
+
+# ---------------------------------------------------------
+# File helpers
+# ---------------------------------------------------------
+def file_format(filename: str) -> str:
+    fmt = Path(filename).suffix.lower().lstrip(".")
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported file type '.{fmt}'. Upload a CSV or Parquet file.")
+    return fmt
+
+
+def read_columns(path: Path, fmt: str) -> List[str]:
+    if fmt == "parquet":
+        return list(pq.ParquetFile(path).schema_arrow.names)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def count_rows(path: Path, fmt: str) -> int:
+    """
+    Row count from Parquet metadata, or by streaming the CSV through a
+    parser (quoted values may contain newlines), reading only its first
+    column as text.
+    """
+    if fmt == "parquet":
+        return pq.ParquetFile(path).metadata.num_rows
+
+    first = read_columns(path, fmt)[0]
+    reader = pacsv.open_csv(
+        path,
+        read_options=pacsv.ReadOptions(block_size=_COPY_BLOCK_BYTES),
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(include_columns=[first], column_types={first: pa.string()}),
+    )
+    return sum(batch.num_rows for batch in reader)
+
+
+def iter_chunks(path: Path, fmt: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    if fmt == "parquet":
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+
+
+def match_columns(columns: List[str], features: List[str]) -> Dict[str, str]:
+    """
+    Map file columns to the model's features, ignoring case and surrounding
+    whitespace. Raises if a feature has no column.
+    """
+    by_name = {str(c).strip().lower(): c for c in columns}
+    missing = [f for f in features if f.lower() not in by_name]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    return {by_name[f.lower()]: f for f in features}
+
+
+# ---------------------------------------------------------
+# Job manager
+# ---------------------------------------------------------
+class BatchJobManager:
+    """
+    Process-wide queue of batch scoring jobs, shared by all sessions.
+
+    Uploads are copied to ``work_dir/<job id>/`` and scored on a bounded
+    worker pool one chunk at a time: each chunk is validated, predicted
+    (optionally with intervals and SHAP columns), recorded for drift
+    monitoring and appended to the output file. Memory stays proportional
+    to ``chunk_rows`` regardless of file size; job directories older than
+    ``retention_hours`` are removed.
+    """
+
+    def __init__(
+        self,
+        service: PredictionService,
+        work_dir: Path,
+        chunk_rows: int = 5000,
+        workers: int = 2,
+        retention_hours: float = 24.0,
+    ):
+        self.service = service
+        self.work_dir = Path(work_dir)
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.chunk_rows = chunk_rows
+        self.retention_hours = retention_hours
+
+        self.jobs: Dict[str, BatchJob] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+        atexit.register(self.close)
+
+    # ---------------------------------------------------------
+    # SUBMISSION
+    # ---------------------------------------------------------
+    def submit(
+        self,
+        upload: BinaryIO,
+        filename: str,
+        with_shap: bool = False,
+        with_intervals: bool = False,
+    ) -> BatchJob:
+        """Store an upload, check its columns and queue it. Raises ValueError for unusable files."""
+        self.cleanup()
+        fmt = file_format(filename)
+
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = self.work_dir / job_id
+        job_dir.mkdir()
+        input_path = job_dir / f"input.{fmt}"
+        with open(input_path, "wb") as fh:
+            shutil.copyfileobj(upload, fh, _COPY_BLOCK_BYTES)
+
+        try:
+            column_map = match_columns(read_columns(input_path, fmt), self.service.expected_features)
+            total = count_rows(input_path, fmt)
+        except Exception as e:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            if isinstance(e, ValueError):
+                raise
+            raise ValueError(f"Could not read {filename}: {e}") from e
+
+        if with_intervals and self.service.intervals is None:
+            with_intervals = False
+
+        job = BatchJob(
+            id=job_id,
+            filename=filename,
+            fmt=fmt,
+            input_path=input_path,
+            output_path=job_dir / f"scored.{fmt}",
+            column_map=column_map,
+            with_shap=with_shap,
+            with_intervals=with_intervals,
+            total=total,
+        )
+        with self._lock:
+            self.jobs[job_id] = job
+        self._pool.submit(self._run, job)
+        logger.info("Batch job %s queued: %s (%d rows)", job_id, filename, total)
+        return job
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> None:
+        job = self.jobs.get(job_id)
+        if job is not None and job.active:
+            job.cancel_requested = True
+
+    # ---------------------------------------------------------
+    # SCORING
+    # ---------------------------------------------------------
+    def _run(self, job: BatchJob) -> None:
+        if job.cancel_requested:
+            job.status = "cancelled"
+            return
+
+        job.status, job.started = "running", time.monotonic()
+        writer = None
+        try:
+            for chunk in iter_chunks(job.input_path, job.fmt, self.chunk_rows):
+                if job.cancel_requested:
+                    job.status = "cancelled"
+                    break
+                scored = self.score_chunk(job, chunk)
+                writer = self._write(job, scored, writer)
+                job.done += len(chunk)
+            else:
+                job.status = "done"
+                job.total = job.done
+        except Exception as e:
+            logger.exception("Batch job %s failed", job.id)
+            job.status, job.error = "failed", str(e)
+        finally:
+            if writer is not None:
+                writer.close()
+            job.finished = time.monotonic()
+            job.input_path.unlink(missing_ok=True)
+
+        logger.info(
+            "Batch job %s %s: %d rows (%d invalid), %.0f rows/s",
+            job.id, job.status, job.done, job.invalid, job.rows_per_sec,
+        )
+
+    def score_chunk(self, job: BatchJob, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Input columns plus ``prediction`` (and ``lower``/``upper``,
+        ``shap_<feature>`` if requested) and an ``error`` column. Invalid
+        rows keep NaN predictions and list their problems in ``error``.
+        """
+        service = self.service
+        shap_columns = [f"shap_{f}" for f in service.model_features]
+        raw = chunk[list(job.column_map)].rename(columns=job.column_map)
+
+        report = service.validate(raw)
+        valid = report.row_valid
+        n = len(chunk)
+
+        out = chunk.copy()
+        out["prediction"] = np.full(n, np.nan, dtype=service.dtype)
+        if job.with_intervals:
+            out["lower"] = np.full(n, np.nan, dtype=service.dtype)
+            out["upper"] = np.full(n, np.nan, dtype=service.dtype)
+        if job.with_shap:
+            for column in shap_columns:
+                out[column] = np.full(n, np.nan, dtype=service.dtype)
+
+        if valid.any():
+            prepared = service.prepare_batch(raw[valid])
+            if job.with_intervals:
+                scored = service.predict_batch_with_intervals(prepared)
+                predictions = scored["prediction"].to_numpy()
+                out.loc[valid, "lower"] = scored["lower"].to_numpy()
+                out.loc[valid, "upper"] = scored["upper"].to_numpy()
+            else:
+                predictions = service.predict_batch(prepared)
+            out.loc[valid, "prediction"] = predictions
+
+            if job.with_shap:
+                shap_values = np.asarray(service.explain(prepared).values, dtype=service.dtype)
+                out.loc[valid, shap_columns] = shap_values
+
+            if service.monitor is not None:
+                values = service.schema.to_matrix(raw)[0]
+                service.observe_drift(values[valid], predictions)
+
+        errors = pd.Series(pd.NA, index=chunk.index, dtype="string")
+        invalid_rows = np.flatnonzero(~valid)
+        if len(invalid_rows):
+            errors.iloc[invalid_rows] = ["; ".join(report.row_messages(i)) for i in invalid_rows]
+        out["error"] = errors
+
+        job.invalid += len(invalid_rows)
+        return out
+
+    def output_schema(self, job: BatchJob) -> pa.Schema:
+        """
+        Schema of a Parquet job's output: the input file's declared columns
+        followed by the scored ones. Taken from the file rather than the
+        first chunk, where a column that happens to be all null has no type.
+        """
+        dtype = pa.from_numpy_dtype(self.service.dtype)
+        added = ["prediction"]
+        if job.with_intervals:
+            added += ["lower", "upper"]
+        if job.with_shap:
+            added += [f"shap_{f}" for f in self.service.model_features]
+
+        inputs = pq.ParquetFile(job.input_path).schema_arrow.remove_metadata()
+        fields = [f for f in inputs if f.name not in added and f.name != "error"]
+        fields += [pa.field(name, dtype) for name in added] + [pa.field("error", pa.string())]
+        return pa.schema(fields)
+
+    def _write(self, job: BatchJob, scored: pd.DataFrame, writer: Optional[pq.ParquetWriter]):
+        """Append a scored chunk to the job's output file; returns the open Parquet writer."""
+        if job.fmt == "csv":
+            scored.to_csv(job.output_path, mode="a", header=job.done == 0, index=False)
+            return None
+
+        if writer is None:
+            writer = pq.ParquetWriter(job.output_path, self.output_schema(job))
+        writer.write_table(pa.Table.from_pandas(scored, schema=writer.schema, preserve_index=False))
+        return writer
+
+    # ---------------------------------------------------------
+    # HOUSEKEEPING
+    # ---------------------------------------------------------
+    def cleanup(self) -> None:
+        """Remove finished jobs (and their files) older than the retention period."""
+        cutoff = time.time() - self.retention_hours * 3600
+        with self._lock:
+            expired = [j for j in self.jobs.values() if not j.active and j.created < cutoff]
+            for job in expired:
+                del self.jobs[job.id]
+
+        for job in expired:
+            shutil.rmtree(job.input_path.parent, ignore_errors=True)
+
+        # Directories left behind by earlier processes
+        for path in self.work_dir.iterdir():
+            if path.is_dir() and path.name not in self.jobs and path.stat().st_mtime < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def close(self) -> None:
+        for job in list(self.jobs.values()):
+            job.cancel_requested = True
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,261 @@
+# correlation.py
+# Missing-value-aware correlation matrices with clustered ordering for
+# ClarityPredict 2.0
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import leaves_list, linkage, optimal_leaf_ordering
+from scipy.spatial.distance import squareform
+from scipy.stats import rankdata
+
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+METHODS = ("pearson", "spearman")
+
+# Optimal leaf ordering is cubic in the number of columns; wider panels keep the plain dendrogram order
+_OLO_MAX_COLUMNS = 200
+
+# Re-ranking Spearman pairs on their shared rows costs about rows x pairs; beyond this, column ranks are kept
+_SPEARMAN_PAIRWISE_MAX_CELLS = 200_000_000
+
+
+# ---------------------------------------------------------
+# Data structures
+# ---------------------------------------------------------
+@dataclass
+class CorrelationResult:
+    """
+    Correlation matrix with the number of rows each pair was computed on.
+    ``order`` lists column positions in clustered display order.
+    """
+
+    columns: List[str]
+    matrix: np.ndarray
+    counts: np.ndarray
+    method: str
+    order: np.ndarray
+    elapsed_ms: float
+
+    def ordered(self) -> Tuple[List[str], np.ndarray]:
+        """Column names and matrix in clustered order."""
+        return [self.columns[i] for i in self.order], self.matrix[np.ix_(self.order, self.order)]
+
+    def top_pairs(self, k: int = 20) -> pd.DataFrame:
+        """The ``k`` most strongly correlated column pairs by |r|."""
+        i, j = np.triu_indices(len(self.columns), k=1)
+        r = self.matrix[i, j]
+        keep = np.isfinite(r)
+        i, j, r = i[keep], j[keep], r[keep]
+        top = np.argsort(-np.abs(r), kind="stable")[:k]
+        return pd.DataFrame({
+            "a": [self.columns[x] for x in i[top]],
+            "b": [self.columns[x] for x in j[top]],
+            "r": r[top],
+            "n": self.counts[i[top], j[top]],
+        })
+
+
+# ---------------------------------------------------------
+# Matrices
+# ---------------------------------------------------------
+def _block_sums(block: np.ndarray, missing: bool) -> Tuple[np.ndarray, ...]:
+    """
+    Cross-product sums of one row block. With missing values, each sum for
+    pair (i, j) only covers rows where both columns are present.
+    """
+    if not missing:
+        return block.T @ block, block.sum(axis=0), (block * block).sum(axis=0)
+
+    present = ~np.isnan(block)
+    values = np.where(present, block, 0.0)
+    weights = present.astype(np.float64)
+    return (
+        values.T @ values,              # sum x_i x_j
+        values.T @ weights,             # sum x_i over rows where j is present
+        (values * values).T @ weights,  # sum x_i^2 over rows where j is present
+        weights.T @ weights,            # rows where both are present
+    )
+
+
+def _missing_pattern_groups(present: np.ndarray) -> np.ndarray:
+    """Group id per column; columns in one group are missing in exactly the same rows."""
+    groups: dict = {}
+    return np.array([groups.setdefault(np.packbits(col).tobytes(), len(groups)) for col in present.T])
+
+
+def _spearman_shared_rows(
+    X: np.ndarray, matrix: np.ndarray, min_periods: int, max_cells: int,
+) -> np.ndarray:
+    """
+    Recompute Spearman for pairs whose columns are missing in different
+    rows, ranking each pair over only the rows where both are present (as
+    pandas does). Pairs with identical missing patterns already have those
+    ranks. Above ``max_cells`` the per-column ranks are kept, with a warning.
+    """
+    present = ~np.isnan(X)
+    groups = _missing_pattern_groups(present)
+    i, j = np.triu_indices(X.shape[1], k=1)
+    mismatched = groups[i] != groups[j]
+    i, j = i[mismatched], j[mismatched]
+    if len(i) == 0:
+        return matrix
+
+    cells = len(i) * len(X)
+    if cells > max_cells:
+        logger.warning(
+            "Spearman for %d pairs with different missing rows would rank %d values; "
+            "using per-column ranks for them instead", len(i), cells,
+        )
+        return matrix
+
+    for a, b in zip(i, j):
+        shared = present[:, a] & present[:, b]
+        if shared.sum() < min_periods:
+            continue
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.corrcoef(rankdata(X[shared, a]), rankdata(X[shared, b]))[0, 1]
+        matrix[a, b] = matrix[b, a] = np.clip(r, -1.0, 1.0) if np.isfinite(r) else np.nan
+    return matrix
+
+
+def pairwise_correlation(
+    X: np.ndarray,
+    method: str = "pearson",
+    min_periods: int = 3,
+    block_rows: int = 65_536,
+    workers: Optional[int] = None,
+    max_rerank_cells: int = _SPEARMAN_PAIRWISE_MAX_CELLS,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pearson or Spearman correlations of the columns of ``X`` (NaN = missing)
+    using pairwise-complete rows, plus the per-pair row counts.
+
+    Rows are processed in blocks on a thread pool (the matrix products
+    release the GIL) and the sums are combined, so memory stays bounded by
+    ``block_rows``. Spearman ranks each column over its own present values
+    (ties averaged) before the Pearson pass, which matches pandas when
+    columns are missing in the same rows; pairs missing in different rows
+    are then re-ranked on their shared rows, up to ``max_rerank_cells``.
+    Pairs with fewer than ``min_periods`` rows or a constant column are NaN.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown correlation method '{method}'. Choose from {METHODS}.")
+
+    X = np.asarray(X, dtype=np.float64)
+    raw = X
+    if method == "spearman":
+        X = pd.DataFrame(X).rank(method="average").to_numpy()
+
+    # Centering first keeps the one-pass sums well conditioned
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-missing columns
+        X = X - np.nanmean(X, axis=0)
+    n_rows, n_cols = X.shape
+    missing = bool(np.isnan(X).any())
+
+    blocks = [X[start:start + block_rows] for start in range(0, n_rows, block_rows)]
+    if len(blocks) > 1 and (workers or os.cpu_count() or 1) > 1:
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            partials = list(pool.map(lambda b: _block_sums(b, missing), blocks))
+    else:
+        partials = [_block_sums(b, missing) for b in blocks]
+    sums = [sum(parts) for parts in zip(*partials)]
+
+    if missing:
+        cross, s, ss, n = sums
+    else:
+        cross, col_sum, col_ss = sums
+        s = np.broadcast_to(col_sum[:, None], (n_cols, n_cols))
+        ss = np.broadcast_to(col_ss[:, None], (n_cols, n_cols))
+        n = np.full((n_cols, n_cols), float(n_rows))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = n * cross - s * s.T
+        var_i = n * ss - s * s
+        matrix = cov / np.sqrt(var_i * var_i.T)
+
+    matrix[(n < min_periods) | ~np.isfinite(matrix)] = np.nan
+    np.clip(matrix, -1.0, 1.0, out=matrix)
+    if method == "spearman" and missing:
+        matrix = _spearman_shared_rows(raw, matrix, min_periods, max_rerank_cells)
+    return matrix, n.astype(np.int64)
+
+
+def cluster_order(matrix: np.ndarray) -> np.ndarray:
+    """
+    Column order from average-linkage clustering on 1 - |r|, so strongly
+    (anti-)correlated biomarkers sit next to each other. Undefined
+    correlations count as unrelated.
+    """
+    n_cols = len(matrix)
+    if n_cols < 3:
+        return np.arange(n_cols)
+
+    distance = 1.0 - np.abs(np.nan_to_num(matrix, nan=0.0))
+    distance = np.clip((distance + distance.T) / 2.0, 0.0, 1.0)
+    np.fill_diagonal(distance, 0.0)
+    condensed = squareform(distance, checks=False)
+
+    tree = linkage(condensed, method="average")
+    if n_cols <= _OLO_MAX_COLUMNS:
+        tree = optimal_leaf_ordering(tree, condensed)
+    return leaves_list(tree)
+
+
+# ---------------------------------------------------------
+# Engine
+# ---------------------------------------------------------
+class CorrelationEngine:
+    """
+    Process-wide cache of correlation results keyed by dataset hash and
+    method, so pages share one computation per dataset version instead of
+    recomputing on every rerun.
+    """
+
+    def __init__(self, cache_size: int = 8, workers: Optional[int] = None):
+        self.cache = LRUCache(cache_size)
+        self.workers = workers
+
+    def cached(self, dataset_hash: str, method: str = "pearson") -> Optional[CorrelationResult]:
+        """Stored result for a dataset version, so callers can skip building the frame."""
+        return self.cache.get((dataset_hash, method))
+
+    def compute(self, df: pd.DataFrame, dataset_hash: str, method: str = "pearson") -> CorrelationResult:
+        """Correlations between the numeric columns of ``df``; ``dataset_hash`` identifies its contents."""
+        key = (dataset_hash, method)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        numeric = df.select_dtypes(include="number")
+        start = time.perf_counter()
+        matrix, counts = pairwise_correlation(numeric.to_numpy(dtype=np.float64), method, workers=self.workers)
+        order = cluster_order(matrix)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+        result = CorrelationResult(
+            columns=[str(c) for c in numeric.columns],
+            matrix=matrix,
+            counts=counts,
+            method=method,
+            order=order,
+            elapsed_ms=elapsed_ms,
+        )
+        logger.info(
+            "%s correlations for %d columns x %d rows in %.0f ms",
+            method.capitalize(), len(result.columns), len(numeric), elapsed_ms,
+        )
+        self.cache.put(key, result)
+        return result
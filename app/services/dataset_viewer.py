@@ -0,0 +1,222 @@
+# dataset_viewer.py
+# Server-side paging, sorting and range filtering of the cohort dataset for
+# ClarityPredict 2.0
+
+from __future__ import annotations
+
+import logging
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------
+# Data structures
+# ---------------------------------------------------------
+@dataclass(frozen=True)
+class RangeFilter:
+    """Keep rows whose ``column`` lies in [low, high]; open ends are None. Missing values never match."""
+
+    column: str
+    low: Optional[float] = None
+    high: Optional[float] = None
+
+    def mask(self, table: pa.Table) -> np.ndarray:
+        values = table[self.column]
+        keep = pc.is_valid(values)
+        if self.low is not None:
+            keep = pc.and_(keep, pc.greater_equal(values, self.low))
+        if self.high is not None:
+            keep = pc.and_(keep, pc.less_equal(values, self.high))
+        return pc.fill_null(keep, False).to_numpy()
+
+
+@dataclass
+class Page:
+    rows: pa.Table      # only the visible window
+    start: int          # offset of the first row within the view
+    total: int          # rows in the filtered view
+    page: int
+    n_pages: int
+
+
+# ---------------------------------------------------------
+# Viewer
+# ---------------------------------------------------------
+class DatasetViewer:
+    """
+    Read-only view over a columnar copy of the dataset, shared by all
+    sessions. Only the requested page leaves the viewer, so the browser
+    receives ``page_size`` rows whatever the cohort size.
+
+    Unsorted, unfiltered pages are zero-copy slices of the table. Otherwise
+    the view is a row-index array: sort orders are cached per column and
+    direction, filter masks per predicate set, and combining them is a
+    single gather, so paging through a view only takes its window.
+
+    Summaries and histograms are computed in Arrow and cached, and plots
+    get a row sample, so the Explore page needs no pandas copy of the file.
+    """
+
+    def __init__(self, table: pa.Table, cache_size: int = 8):
+        self.table = table.combine_chunks()
+        self._orders = LRUCache(cache_size)
+        self._masks = LRUCache(cache_size)
+        self._views = LRUCache(cache_size)
+        self._ranges: Dict[str, Tuple[float, float]] = {}
+        self._histograms = LRUCache(cache_size)
+        self._summary: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def from_path(cls, path: Path) -> "DatasetViewer":
+        path = Path(path)
+        if path.suffix.lower() == ".parquet":
+            table = pq.read_table(path)
+        else:
+            table = pacsv.read_csv(path)
+        logger.info("Dataset viewer loaded %s: %d rows x %d columns", path, table.num_rows, table.num_columns)
+        return cls(table)
+
+    @property
+    def num_rows(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def numeric_columns(self) -> list:
+        return [f.name for f in self.table.schema if pa.types.is_integer(f.type) or pa.types.is_floating(f.type)]
+
+    def column_range(self, column: str) -> Tuple[float, float]:
+        """Minimum and maximum of a numeric column, for filter widgets."""
+        if column not in self._ranges:
+            bounds = pc.min_max(self.table[column])
+            lo, hi = bounds["min"].as_py(), bounds["max"].as_py()
+            self._ranges[column] = (float(lo or 0.0), float(hi or 0.0))
+        return self._ranges[column]
+
+    # ---------------------------------------------------------
+    # SUMMARIES
+    # ---------------------------------------------------------
+    def summary(self) -> pd.DataFrame:
+        """Count, mean, std, min, quartiles and max per numeric column, as DataFrame.describe().T."""
+        if self._summary is None:
+            rows = {}
+            for column in self.numeric_columns:
+                values = pc.cast(self.table[column], pa.float64())
+                bounds = pc.min_max(values)
+                quartiles = pc.quantile(values, q=[0.25, 0.5, 0.75]).to_numpy(zero_copy_only=False)
+                rows[column] = {
+                    "count": float(pc.count(values).as_py()),
+                    "mean": pc.mean(values).as_py(),
+                    "std": pc.stddev(values, ddof=1).as_py(),
+                    "min": bounds["min"].as_py(),
+                    "25%": quartiles[0],
+                    "50%": quartiles[1],
+                    "75%": quartiles[2],
+                    "max": bounds["max"].as_py(),
+                }
+            self._summary = pd.DataFrame.from_dict(rows, orient="index", dtype=np.float64)
+        return self._summary
+
+    def histogram(self, column: str, bins: int = 40) -> Tuple[np.ndarray, np.ndarray]:
+        """Counts and bin edges of a numeric column's present values."""
+        key = (column, bins)
+        cached = self._histograms.get(key)
+        if cached is None:
+            values = pc.drop_null(pc.cast(self.table[column], pa.float64())).to_numpy()
+            cached = np.histogram(values[np.isfinite(values)], bins=bins)
+            self._histograms.put(key, cached)
+        return cached
+
+    def sample(self, columns: Sequence[str], n: int, seed: int = 0) -> pd.DataFrame:
+        """Up to ``n`` rows of ``columns`` drawn uniformly at random (in file order), for plotting."""
+        table = self.table.select(list(dict.fromkeys(columns)))
+        if table.num_rows > n:
+            rows = np.sort(np.random.default_rng(seed).choice(table.num_rows, n, replace=False))
+            table = table.take(pa.array(rows))
+        return table.to_pandas()
+
+    def numeric_frame(self) -> pd.DataFrame:
+        """All numeric columns as float64 with NaN for missing values, e.g. for correlations."""
+        return pd.DataFrame({
+            column: pc.cast(self.table[column], pa.float64()).to_numpy() for column in self.numeric_columns
+        })
+
+    # ---------------------------------------------------------
+    # VIEWS
+    # ---------------------------------------------------------
+    def _order(self, column: str, ascending: bool) -> np.ndarray:
+        key = (column, ascending)
+        order = self._orders.get(key)
+        if order is None:
+            order = pc.array_sort_indices(
+                self.table[column],
+                order="ascending" if ascending else "descending",
+                null_placement="at_end",
+            ).to_numpy()
+            self._orders.put(key, order)
+        return order
+
+    def _mask(self, filters: Tuple[RangeFilter, ...]) -> np.ndarray:
+        mask = self._masks.get(filters)
+        if mask is None:
+            mask = np.logical_and.reduce([f.mask(self.table) for f in filters])
+            self._masks.put(filters, mask)
+        return mask
+
+    def indices(
+        self,
+        filters: Sequence[RangeFilter] = (),
+        sort_by: Optional[str] = None,
+        ascending: bool = True,
+    ) -> Optional[np.ndarray]:
+        """Row indices of a view in display order; None means every row in file order."""
+        filters = tuple(sorted(filters, key=lambda f: f.column))
+        if not filters and sort_by is None:
+            return None
+
+        key = (filters, sort_by, ascending)
+        view = self._views.get(key)
+        if view is not None:
+            return view
+
+        if sort_by is None:
+            view = np.flatnonzero(self._mask(filters))
+        else:
+            view = self._order(sort_by, ascending)
+            if filters:
+                view = view[self._mask(filters)[view]]
+        self._views.put(key, view)
+        return view
+
+    def page(
+        self,
+        page: int,
+        page_size: int,
+        filters: Sequence[RangeFilter] = (),
+        sort_by: Optional[str] = None,
+        ascending: bool = True,
+    ) -> Page:
+        """One window of a view; ``page`` is 1-based and clamped to the last page."""
+        view = self.indices(filters, sort_by, ascending)
+        total = self.num_rows if view is None else len(view)
+        n_pages = max(math.ceil(total / page_size), 1)
+        page = min(max(page, 1), n_pages)
+        start = (page - 1) * page_size
+
+        if view is None:
+            rows = self.table.slice(start, page_size)
+        else:
+            rows = self.table.take(pa.array(view[start:start + page_size]))
+        return Page(rows=rows, start=start, total=total, page=page, n_pages=n_pages)
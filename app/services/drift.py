@@ -0,0 +1,269 @@
+# drift.py
+# Streaming input/prediction drift monitoring with mergeable histogram sketches
+
+from __future__ import annotations
+
+import atexit
+import hashlib
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Floor for bin proportions in PSI, so empty bins do not produce log(0)
+_PSI_EPSILON = 1e-4
+
+# Rows binned per comparison block in Sketch.update
+_UPDATE_CHUNK_ROWS = 65536
+
+# Conventional PSI thresholds
+PSI_MODERATE = 0.1
+PSI_MAJOR = 0.25
+
+
+# ---------------------------------------------------------
+# Sketch
+# ---------------------------------------------------------
+@dataclass
+class Sketch:
+    """
+    Fixed-bin histograms for several columns.
+
+    ``edges`` holds each column's bin edges, padded with +inf to a common
+    width, so a whole batch is binned with one comparison. Bin ``j`` counts
+    values with exactly ``j`` edges <= value; the last bin counts missing
+    values. Sketches with the same edges merge by adding counts, which makes
+    them safe to combine across worker processes and days.
+    """
+
+    columns: List[str]
+    edges: np.ndarray      # (n_columns, n_edges), +inf padded
+    counts: np.ndarray     # (n_columns, n_edges + 2), int64
+
+    @classmethod
+    def from_reference(
+        cls, columns: Sequence[str], values: np.ndarray, n_bins: int = 20
+    ) -> "Sketch":
+        """Quantile bin edges of the reference data, with its counts."""
+        values = np.asarray(values, dtype=np.float64)
+        quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+        per_column = [np.unique(np.nanquantile(values[:, j], quantiles)) for j in range(values.shape[1])]
+
+        edges = np.full((len(per_column), max(len(e) for e in per_column)), np.inf)
+        for j, column_edges in enumerate(per_column):
+            edges[j, :len(column_edges)] = column_edges
+
+        sketch = cls.empty(columns, edges)
+        sketch.update(values)
+        return sketch
+
+    @classmethod
+    def empty(cls, columns: Sequence[str], edges: np.ndarray) -> "Sketch":
+        counts = np.zeros((edges.shape[0], edges.shape[1] + 2), dtype=np.int64)
+        return cls(list(columns), edges, counts)
+
+    def empty_like(self) -> "Sketch":
+        return Sketch.empty(self.columns, self.edges)
+
+    @property
+    def layout_digest(self) -> str:
+        """Identifies the bin layout; only sketches with equal digests can merge."""
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update("\x00".join(self.columns).encode())
+        digest.update(self.edges.tobytes())
+        return digest.hexdigest()
+
+    @property
+    def totals(self) -> np.ndarray:
+        return self.counts.sum(axis=1)
+
+    def update(self, values: np.ndarray) -> None:
+        """Add a (n_rows, n_columns) batch."""
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(self.columns))
+        n_columns, width = self.counts.shape
+        offsets = np.arange(n_columns) * width
+
+        for start in range(0, len(values), _UPDATE_CHUNK_ROWS):
+            block = values[start:start + _UPDATE_CHUNK_ROWS]
+            bins = (block[:, :, None] >= self.edges[None, :, :]).sum(axis=2)
+            bins[np.isnan(block)] = width - 1
+            flat = (bins + offsets).ravel()
+            self.counts += np.bincount(flat, minlength=n_columns * width).reshape(n_columns, width)
+
+    def merge(self, other: "Sketch") -> None:
+        if other.layout_digest != self.layout_digest:
+            raise ValueError("Cannot merge sketches with different bin layouts.")
+        self.counts += other.counts
+
+    # ---------------------------------------------------------
+    # PERSISTENCE
+    # ---------------------------------------------------------
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as fh:
+            np.savez(fh, columns=np.array(self.columns), edges=self.edges, counts=self.counts)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["Sketch"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            return cls([str(c) for c in data["columns"]], data["edges"], data["counts"])
+
+
+# ---------------------------------------------------------
+# Drift scores
+# ---------------------------------------------------------
+def psi(reference: Sketch, current: Sketch) -> np.ndarray:
+    """Population stability index per column, missing values included as a bin."""
+    p_ref = np.maximum(reference.counts / np.maximum(reference.totals, 1)[:, None], _PSI_EPSILON)
+    p_cur = np.maximum(current.counts / np.maximum(current.totals, 1)[:, None], _PSI_EPSILON)
+    return ((p_cur - p_ref) * np.log(p_cur / p_ref)).sum(axis=1)
+
+
+def ks(reference: Sketch, current: Sketch) -> np.ndarray:
+    """
+    Kolmogorov–Smirnov statistic per column over non-missing values,
+    evaluated at the bin edges (a lower bound of the exact statistic).
+    """
+    def cdf(sketch: Sketch) -> np.ndarray:
+        observed = sketch.counts[:, :-1]
+        return np.cumsum(observed, axis=1) / np.maximum(observed.sum(axis=1), 1)[:, None]
+
+    return np.abs(cdf(reference) - cdf(current)).max(axis=1)
+
+
+def drift_report(reference: Sketch, current: Sketch) -> pd.DataFrame:
+    """Per-column drift scores with a stable/moderate/major status from PSI."""
+    scores = psi(reference, current)
+    totals = current.totals
+    status = np.where(scores >= PSI_MAJOR, "major", np.where(scores >= PSI_MODERATE, "moderate", "stable"))
+
+    return pd.DataFrame({
+        "column": current.columns,
+        "n": totals,
+        "psi": scores,
+        "ks": ks(reference, current),
+        "status": status,
+    })
+
+
+# ---------------------------------------------------------
+# Live monitoring
+# ---------------------------------------------------------
+class DriftMonitor:
+    """
+    Per-process live sketch, updated on every scored request and written to
+    ``directory`` as ``<day>-<host>-<pid>-<instance>.npz`` at most every
+    ``flush_interval`` seconds (and at exit). Files from all processes and
+    days are merged on demand by :func:`load_window`; files older than
+    ``retention_days`` are deleted at start-up and at each day change.
+    """
+
+    def __init__(
+        self,
+        reference: Sketch,
+        directory: Path,
+        flush_interval: float = 30.0,
+        retention_days: int = 30,
+    ):
+        self.reference = reference
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+
+        self._lock = threading.Lock()
+        self._day = date.today()
+        self._sketch = reference.empty_like()
+        self._last_flush = time.monotonic()
+        self._dirty = False
+        # Unique per monitor: each page caches its own service, so one process can run several
+        self._process = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        prune_sketches(self.directory, self.retention_days)
+        atexit.register(self.flush)
+
+    def _path(self, day: date) -> Path:
+        return self.directory / f"{day:%Y%m%d}-{self._process}.npz"
+
+    def observe(self, inputs: np.ndarray, predictions: np.ndarray) -> None:
+        """Record inputs (n_rows, n_features), imputed like the reference, and their predictions."""
+        values = np.column_stack([
+            np.asarray(inputs, dtype=np.float64).reshape(len(predictions), -1),
+            np.asarray(predictions, dtype=np.float64),
+        ])
+        with self._lock:
+            if date.today() != self._day:
+                self._flush_locked()
+                self._day, self._sketch = date.today(), self.reference.empty_like()
+                prune_sketches(self.directory, self.retention_days)
+            self._sketch.update(values)
+            self._dirty = True
+
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._dirty:
+            return
+        try:
+            self._sketch.save(self._path(self._day))
+            self._dirty = False
+        except OSError as e:
+            logger.error("Failed to write drift sketch: %s", e)
+
+
+def prune_sketches(directory: Path, retention_days: int) -> int:
+    """Delete live sketches from before the last ``retention_days`` days; returns how many."""
+    first_day = f"{date.today() - timedelta(days=retention_days - 1):%Y%m%d}"
+    removed = 0
+    for path in Path(directory).glob("*.npz"):
+        if path.name[:8] < first_day:
+            path.unlink(missing_ok=True)
+            removed += 1
+    if removed:
+        logger.info("Removed %d drift sketches older than %d days", removed, retention_days)
+    return removed
+
+
+def load_window(directory: Path, reference: Sketch, days: int = 7) -> Sketch:
+    """
+    Merge the live sketches of the last ``days`` days from every process.
+    Sketches with another bin layout (written against an earlier
+    reference) are skipped.
+    """
+    merged = reference.empty_like()
+    first_day = f"{date.today() - timedelta(days=days - 1):%Y%m%d}"
+
+    skipped = 0
+    for path in sorted(Path(directory).glob("*.npz")):
+        if path.name[:8] < first_day:
+            continue
+        sketch = Sketch.load(path)
+        if sketch is None or sketch.layout_digest != reference.layout_digest:
+            skipped += 1
+            continue
+        merged.merge(sketch)
+
+    if skipped:
+        logger.info("Skipped %d drift sketches with an outdated bin layout", skipped)
+    return merged
@@ -0,0 +1,190 @@
+# effects.py
+# Precomputed partial-dependence and accumulated-local-effects tables for ClarityPredict 2.0
+
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Clinically related biomarker pairs with a 2-D partial-dependence table
+KEY_PAIRS: Sequence[Tuple[str, str]] = (
+    ("glucose", "insulin"),
+    ("hdl", "ldl"),
+    ("bmi", "glucose"),
+)
+
+# Upper bound on rows sent to a single predict call
+MAX_BATCH_ROWS = 1_000_000
+
+ScoreFn = Callable[[pd.DataFrame], np.ndarray]
+
+
+# ---------------------------------------------------------
+# Computation
+# ---------------------------------------------------------
+def _grid(values: np.ndarray, n_points: int) -> np.ndarray:
+    lo, hi = np.nanquantile(values, [0.05, 0.95])
+    if lo == hi:
+        lo, hi = np.nanmin(values), np.nanmax(values)
+    return np.unique(np.linspace(lo, hi, n_points))
+
+
+def _score_in_batches(score: ScoreFn, block: np.ndarray, columns: List[str]) -> np.ndarray:
+    out = np.empty(len(block), dtype=np.float64)
+    for start in range(0, len(block), MAX_BATCH_ROWS):
+        part = block[start:start + MAX_BATCH_ROWS]
+        out[start:start + len(part)] = score(pd.DataFrame(part, columns=columns))
+    return out
+
+
+def partial_dependence(
+    score: ScoreFn, X: np.ndarray, columns: List[str], features: Sequence[str], grids: Sequence[np.ndarray]
+) -> np.ndarray:
+    """
+    Average prediction over ``X`` with ``features`` fixed at every grid
+    combination. All grid copies of the data are stacked and scored
+    together, so one feature costs one batched predict rather than one
+    call per grid point.
+    """
+    idx = [columns.index(f) for f in features]
+    mesh = np.meshgrid(*grids, indexing="ij")
+    n_points = mesh[0].size
+
+    block = np.tile(X, (n_points, 1))
+    for j, values in zip(idx, mesh):
+        block[:, j] = np.repeat(values.ravel(), len(X))
+
+    predictions = _score_in_batches(score, block, columns)
+    return predictions.reshape(n_points, len(X)).mean(axis=1).reshape(mesh[0].shape)
+
+
+def accumulated_local_effects(
+    score: ScoreFn, X: np.ndarray, columns: List[str], feature: str, n_bins: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    First-order ALE: per quantile bin, the mean change in prediction when a
+    row's value moves from the lower to the upper bin edge, accumulated and
+    centred. Both edges for every row are scored in a single call.
+    """
+    j = columns.index(feature)
+    edges = np.unique(np.nanquantile(X[:, j], np.linspace(0, 1, n_bins + 1)))
+    if len(edges) < 2:
+        return edges, np.zeros_like(edges)
+
+    bins = np.clip(np.searchsorted(edges, X[:, j], side="left") - 1, 0, len(edges) - 2)
+
+    lower, upper = X.copy(), X.copy()
+    lower[:, j] = edges[bins]
+    upper[:, j] = edges[bins + 1]
+    predictions = _score_in_batches(score, np.vstack([lower, upper]), columns)
+    deltas = predictions[len(X):] - predictions[:len(X)]
+
+    counts = np.bincount(bins, minlength=len(edges) - 1)
+    sums = np.bincount(bins, weights=deltas, minlength=len(edges) - 1)
+    local = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+    ale = np.concatenate([[0.0], np.cumsum(local)])
+    midpoints = (ale[:-1] + ale[1:]) / 2.0
+    ale -= np.average(midpoints, weights=np.maximum(counts, 1))
+    return edges, ale
+
+
+def compute_effects(
+    score: ScoreFn,
+    X: pd.DataFrame,
+    features: Sequence[str],
+    pairs: Sequence[Tuple[str, str]] = KEY_PAIRS,
+    n_points: int = 30,
+    n_points_2d: int = 20,
+    n_bins: int = 20,
+    max_rows: int = 1000,
+    random_state: int = 42,
+) -> Dict[str, np.ndarray]:
+    """PD and ALE curves for every feature plus 2-D PD for ``pairs``, as flat arrays."""
+    columns = list(X.columns)
+    data = X.to_numpy(dtype=np.float64)
+    if len(data) > max_rows:
+        rng = np.random.default_rng(random_state)
+        data = data[rng.choice(len(data), size=max_rows, replace=False)]
+
+    tables: Dict[str, np.ndarray] = {}
+    for feature in features:
+        grid = _grid(data[:, columns.index(feature)], n_points)
+        tables[f"pd/{feature}/grid"] = grid
+        tables[f"pd/{feature}/values"] = partial_dependence(score, data, columns, [feature], [grid])
+
+        edges, ale = accumulated_local_effects(score, data, columns, feature, n_bins)
+        tables[f"ale/{feature}/edges"] = edges
+        tables[f"ale/{feature}/values"] = ale
+
+    for a, b in pairs:
+        if a not in columns or b not in columns:
+            continue
+        grids = [_grid(data[:, columns.index(f)], n_points_2d) for f in (a, b)]
+        tables[f"pd2/{a}/{b}/grid_a"] = grids[0]
+        tables[f"pd2/{a}/{b}/grid_b"] = grids[1]
+        tables[f"pd2/{a}/{b}/values"] = partial_dependence(score, data, columns, [a, b], grids)
+
+    logger.info("Computed effect tables for %d features and %d pairs", len(features), len(pairs))
+    return tables
+
+
+# ---------------------------------------------------------
+# Storage
+# ---------------------------------------------------------
+class EffectsTable:
+    """Read-only view of a stored ``effects.npz`` bundle."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, str]):
+        self.arrays = arrays
+        self.meta = meta
+
+    @property
+    def model_version(self) -> Optional[str]:
+        return self.meta.get("model_version")
+
+    @property
+    def features(self) -> List[str]:
+        return sorted({k.split("/")[1] for k in self.arrays if k.startswith("pd/")})
+
+    @property
+    def pairs(self) -> List[Tuple[str, str]]:
+        return sorted({tuple(k.split("/")[1:3]) for k in self.arrays if k.startswith("pd2/")})
+
+    def pd(self, feature: str) -> Tuple[np.ndarray, np.ndarray]:
+        return self.arrays[f"pd/{feature}/grid"], self.arrays[f"pd/{feature}/values"]
+
+    def ale(self, feature: str) -> Tuple[np.ndarray, np.ndarray]:
+        return self.arrays[f"ale/{feature}/edges"], self.arrays[f"ale/{feature}/values"]
+
+    def pd2(self, a: str, b: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        prefix = f"pd2/{a}/{b}"
+        return (
+            self.arrays[f"{prefix}/grid_a"],
+            self.arrays[f"{prefix}/grid_b"],
+            self.arrays[f"{prefix}/values"],
+        )
+
+    @staticmethod
+    def save(path: Path, tables: Dict[str, np.ndarray], model_version: str) -> None:
+        compact = {key: np.asarray(value, dtype=np.float32) for key, value in tables.items()}
+        meta = json.dumps({"model_version": model_version})
+        np.savez_compressed(path, __meta__=np.array(meta), **compact)
+        logger.info("Effect tables saved to %s", path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["EffectsTable"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            meta = json.loads(str(data["__meta__"]))
+            arrays = {key: data[key] for key in data.files if key != "__meta__"}
+        return cls(arrays, meta)
@@ -0,0 +1,286 @@
+# explainers.py
+# Time-budgeted Kernel SHAP for models without a tree/linear explainer, and
+# on-disk persistence of prepared SHAP explainers
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from math import comb
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple
+
+import joblib
+import numpy as np
+import shap
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on float64 cells of the merged (rows x coalitions x background x features) block per predict call
+_EVAL_CELLS = 1 << 22
+
+
+# ---------------------------------------------------------
+# Data structures
+# ---------------------------------------------------------
+@dataclass
+class BudgetedExplanation:
+    """
+    SHAP values with an uncertainty estimate. Exposes ``values`` and
+    ``base_values`` like ``shap.Explanation`` so callers can use either.
+    """
+
+    values: np.ndarray          # (n_rows, n_features)
+    base_values: np.ndarray     # (n_rows,)
+    std_errors: np.ndarray      # (n_rows, n_features)
+    converged: np.ndarray       # (n_rows,) bool
+    n_coalitions: int
+    exact: bool
+    elapsed_ms: float
+
+
+# ---------------------------------------------------------
+# Explainer
+# ---------------------------------------------------------
+class BudgetedKernelExplainer:
+    """
+    Kernel SHAP with an explicit latency budget.
+
+    Coalitions are evaluated in batches: every coalition of a batch is
+    merged with the background set for a block of explained rows and scored
+    in one ``predict`` call, with blocks sized to keep memory bounded. When
+    all 2^k - 2 coalitions fit within ``max_coalitions`` they are enumerated
+    with exact Shapley kernel weights (the result is exact for the given
+    background), unless the first batches project that enumeration past the
+    budget. Otherwise paired coalitions are sampled from the Shapley kernel
+    distribution until the standard errors drop below ``tolerance``
+    (prediction units), the next batch would exceed the budget, or
+    ``max_coalitions`` have been used.
+    """
+
+    def __init__(
+        self,
+        predict: Callable[[np.ndarray], np.ndarray],
+        background: np.ndarray,
+        budget_ms: float = 250.0,
+        batch_coalitions: int = 64,
+        max_coalitions: int = 4096,
+        tolerance: float = 1e-3,
+        seed: int = 42,
+    ):
+        self.predict = predict
+        self.background = np.asarray(background, dtype=np.float64)
+        self.budget_ms = budget_ms
+        self.batch_coalitions = batch_coalitions
+        self.max_coalitions = max_coalitions
+        self.tolerance = tolerance
+        self.rng = np.random.default_rng(seed)
+
+        self.n_features = self.background.shape[1]
+        self.expected_value = float(np.mean(self._predict(self.background)))
+
+        # Shapley kernel distribution over coalition sizes 1..k-1
+        k = self.n_features
+        sizes = np.arange(1, k)
+        size_weights = (k - 1) / (sizes * (k - sizes))
+        self._sizes = sizes
+        self._size_probs = size_weights / size_weights.sum()
+
+    def _predict(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(self.predict(X), dtype=np.float64).reshape(-1)
+
+    # ---------------------------------------------------------
+    # COALITIONS
+    # ---------------------------------------------------------
+    def _exact_coalitions(self) -> Tuple[np.ndarray, np.ndarray]:
+        k = self.n_features
+        codes = np.arange(1, 2 ** k - 1)
+        masks = ((codes[:, None] >> np.arange(k)) & 1).astype(bool)
+        sizes = masks.sum(axis=1)
+        weights = (k - 1) / (np.array([comb(k, s) for s in sizes]) * sizes * (k - sizes))
+        # Heaviest coalitions first, so the first batches time the costliest part of the solve
+        order = np.argsort(-weights, kind="stable")
+        return masks[order], weights[order]
+
+    def _sample_coalitions(self, n: int) -> np.ndarray:
+        k = self.n_features
+        half = max(1, n // 2)
+        sizes = self.rng.choice(self._sizes, size=half, p=self._size_probs)
+        ranks = np.argsort(self.rng.random((half, k)), axis=1)
+        masks = ranks < sizes[:, None]
+        return np.vstack([masks, ~masks])  # paired sampling
+
+    def _evaluate(self, X: np.ndarray, masks: np.ndarray) -> np.ndarray:
+        """v(z) for every row and coalition, shape (n_rows, n_coalitions)."""
+        n_rows, n_masks, n_bg = len(X), len(masks), len(self.background)
+        rows_per_block = max(1, _EVAL_CELLS // (n_masks * n_bg * self.n_features))
+
+        v = np.empty((n_rows, n_masks))
+        for start in range(0, n_rows, rows_per_block):
+            rows = X[start:start + rows_per_block]
+            block = np.broadcast_to(self.background, (len(rows), n_masks, n_bg, self.n_features)).copy()
+            take_x = np.broadcast_to(masks[None, :, None, :], block.shape)
+            values_x = np.broadcast_to(rows[:, None, None, :], block.shape)
+            block[take_x] = values_x[take_x]
+
+            predictions = self._predict(block.reshape(-1, self.n_features))
+            v[start:start + len(rows)] = predictions.reshape(len(rows), n_masks, n_bg).mean(axis=2)
+        return v
+
+    # ---------------------------------------------------------
+    # EXPLANATION
+    # ---------------------------------------------------------
+    def __call__(self, X) -> BudgetedExplanation:
+        start = time.perf_counter()
+        X = np.asarray(X, dtype=np.float64)
+        n_rows, k = X.shape
+
+        base = self.expected_value
+        delta = self._predict(X) - base                    # f(x) - E[f]
+
+        # Normal equations with the efficiency constraint folded in by
+        # eliminating the last feature: phi_k = delta - sum(phi_<k)
+        def reset():
+            return np.zeros((k - 1, k - 1)), np.zeros((n_rows, k - 1)), np.zeros(n_rows), 0
+
+        A, b, yy, n_coalitions = reset()
+
+        exact = 2 ** k - 2 <= self.max_coalitions
+        if exact:
+            exact_masks, exact_weights = self._exact_coalitions()
+
+        last_batch_ms = 0.0
+        stopped_by = None
+        phi = np.zeros((n_rows, k))
+        std_errors = np.full((n_rows, k), np.inf)
+        converged = np.zeros(n_rows, dtype=bool)
+
+        while True:
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            if exact:
+                if n_coalitions == len(exact_masks):
+                    break
+                # Enumerate in batches; give up on exactness as soon as the
+                # measured cost projects the full enumeration past the budget
+                remaining = len(exact_masks) - n_coalitions
+                per_coalition_ms = last_batch_ms / self.batch_coalitions
+                if n_coalitions > 0 and elapsed_ms + remaining * per_coalition_ms > self.budget_ms:
+                    logger.info(
+                        "Exact Kernel SHAP (%d coalitions) would exceed the %.0f ms budget; sampling instead",
+                        len(exact_masks), self.budget_ms,
+                    )
+                    exact = False
+                    A, b, yy, n_coalitions = reset()
+                    continue
+                masks = exact_masks[n_coalitions:n_coalitions + self.batch_coalitions]
+                weights = exact_weights[n_coalitions:n_coalitions + self.batch_coalitions]
+            else:
+                remaining = self.max_coalitions - n_coalitions
+                if remaining < 2:
+                    stopped_by = f"the cap of {self.max_coalitions} coalitions"
+                    break
+                if n_coalitions > 0 and elapsed_ms + last_batch_ms > self.budget_ms:
+                    stopped_by = f"the {self.budget_ms:.0f} ms budget"
+                    break
+                masks = self._sample_coalitions(min(self.batch_coalitions, remaining))
+                weights = np.ones(len(masks))
+
+            batch_start = time.perf_counter()
+            v = self._evaluate(X, masks) - base             # (n_rows, n_masks)
+            last_batch_ms = (time.perf_counter() - batch_start) * 1000.0 * self.batch_coalitions / len(masks)
+
+            z = masks.astype(np.float64)
+            Z = z[:, :-1] - z[:, -1:]                          # (n_masks, k-1)
+            y = v - z[:, -1][None, :] * delta[:, None]         # (n_rows, n_masks)
+
+            A += (Z * weights[:, None]).T @ Z
+            b += (y * weights[None, :]) @ Z
+            yy += (y ** 2 * weights[None, :]).sum(axis=1)
+            n_coalitions += len(masks)
+
+            if exact:
+                continue
+            phi, std_errors = self._solve(A, b, yy, delta, n_coalitions, exact)
+            converged = std_errors.max(axis=1) <= self.tolerance
+            if converged.all():
+                break
+
+        if exact:
+            phi, std_errors = self._solve(A, b, yy, delta, n_coalitions, exact)
+            converged = np.ones(n_rows, dtype=bool)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        if not converged.all():
+            logger.warning(
+                "Kernel SHAP stopped by %s before converging (%d coalitions in %.0f ms, max std err %.2e)",
+                stopped_by, n_coalitions, elapsed_ms, float(std_errors.max()),
+            )
+
+        return BudgetedExplanation(
+            values=phi,
+            base_values=np.full(n_rows, base),
+            std_errors=std_errors,
+            converged=converged,
+            n_coalitions=n_coalitions,
+            exact=exact,
+            elapsed_ms=elapsed_ms,
+        )
+
+    def _solve(self, A, b, yy, delta, n_coalitions, exact):
+        n_rows, k = len(delta), self.n_features
+        A_inv = np.linalg.pinv(A)
+        head = b @ A_inv                                       # (n_rows, k-1)
+        phi = np.column_stack([head, delta - head.sum(axis=1)])
+
+        if exact:
+            return phi, np.zeros((n_rows, k))
+
+        dof = max(n_coalitions - (k - 1), 1)
+        rss = yy - 2 * np.einsum("ij,ij->i", head, b) + np.einsum("ij,jk,ik->i", head, A, head)
+        sigma2 = np.maximum(rss, 0.0) / dof
+
+        var_head = sigma2[:, None] * np.diag(A_inv)[None, :]
+        var_last = sigma2 * A_inv.sum()
+        std_errors = np.sqrt(np.column_stack([var_head, var_last]))
+        return phi, std_errors
+
+
+# ---------------------------------------------------------
+# Persistence
+# ---------------------------------------------------------
+def save_explainer(explainer: Any, path: Path, model_version: str) -> None:
+    """
+    Store a prepared explainer (for TreeExplainer: the converted, padded
+    tree arrays) next to the model it was built for.
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    joblib.dump(
+        {"model_version": model_version, "shap_version": shap.__version__, "explainer": explainer},
+        tmp,
+    )
+    tmp.replace(path)
+
+
+def load_explainer(path: Path, model_version: str) -> Optional[Any]:
+    """
+    Load an explainer saved by :func:`save_explainer`, or None if it is
+    missing or was built for another model or SHAP version. Arrays are
+    memory-mapped read-only, so loading costs little more than opening
+    the file and processes share the pages.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    try:
+        bundle = joblib.load(path, mmap_mode="r")
+    except Exception as e:
+        logger.warning("Could not load cached explainer %s: %s", path, e)
+        return None
+
+    if bundle.get("model_version") != model_version or bundle.get("shap_version") != shap.__version__:
+        logger.info("Cached explainer %s is stale; rebuilding.", path)
+        return None
+    return bundle["explainer"]
@@ -0,0 +1,157 @@
+# feature_cache.py
+# On-disk cache of preprocessed feature matrices for ClarityPredict 2.0 training runs
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import joblib
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_HASH_CHUNK_SIZE = 1 << 20
+_PREPROCESSORS_FILE = "preprocessors.joblib"
+_META_FILE = "meta.json"
+
+# Staging directories older than this are leftovers of interrupted runs
+_STALE_STAGING_SECONDS = 24 * 3600
+
+
+# ---------------------------------------------------------
+# Data structures
+# ---------------------------------------------------------
+@dataclass
+class CachedFeatures:
+    key: str
+    arrays: Dict[str, np.ndarray]
+    preprocessors: Dict[str, Any]
+    meta: Dict[str, Any]
+
+
+# ---------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------
+def file_digest(path: Path) -> str:
+    """Content hash of a file, read in chunks without parsing it."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def files_digest(paths) -> str:
+    """Combined content hash of several files, e.g. a set of fitted preprocessors."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        digest.update(file_digest(path).encode())
+    return digest.hexdigest()
+
+
+# ---------------------------------------------------------
+# Feature cache
+# ---------------------------------------------------------
+class FeatureCache:
+    """
+    Stores scaled feature matrices as ``.npy`` files next to the fitted
+    preprocessors, keyed by dataset content and preprocessing config.
+    Arrays are opened with ``mmap_mode="r"`` so cache hits cost neither
+    CSV parsing nor a full read into memory.
+
+    An entry that fails to load is deleted and treated as a miss. Only the
+    ``max_entries`` most recently used entries are kept.
+    """
+
+    def __init__(self, cache_dir: Path, max_entries: int = 4):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+
+    def key(self, data_path: Path, config: Dict[str, Any]) -> str:
+        config_blob = json.dumps(config, sort_keys=True).encode("utf-8")
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(file_digest(data_path).encode("ascii"))
+        digest.update(config_blob)
+        return digest.hexdigest()
+
+    def load(self, key: str) -> Optional[CachedFeatures]:
+        entry = self.cache_dir / key
+        meta_path = entry / _META_FILE
+        if not meta_path.exists():
+            return None
+
+        try:
+            meta = json.loads(meta_path.read_text())
+            arrays = {
+                name: np.load(entry / f"{name}.npy", mmap_mode="r")
+                for name in meta["arrays"]
+            }
+            preprocessors = joblib.load(entry / _PREPROCESSORS_FILE)
+        except Exception as e:
+            logger.warning("Discarding unreadable feature cache entry %s: %s", entry, e)
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+
+        now = time.time()
+        os.utime(entry, (now, now))  # recency for eviction
+        logger.info("Feature cache hit: %s", entry)
+        return CachedFeatures(key, arrays, preprocessors, meta)
+
+    def store(
+        self,
+        key: str,
+        arrays: Dict[str, np.ndarray],
+        preprocessors: Dict[str, Any],
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> CachedFeatures:
+        entry = self.cache_dir / key
+        staging = self.cache_dir / f".{key}.{uuid.uuid4().hex}"
+        staging.mkdir(parents=True)
+
+        try:
+            for name, array in arrays.items():
+                np.save(staging / f"{name}.npy", np.ascontiguousarray(array))
+            joblib.dump(preprocessors, staging / _PREPROCESSORS_FILE)
+
+            meta = dict(meta or {}, arrays=sorted(arrays))
+            (staging / _META_FILE).write_text(json.dumps(meta, indent=2))
+
+            # Publish atomically so concurrent runs never see partial entries.
+            if entry.exists():
+                shutil.rmtree(staging)
+            else:
+                staging.rename(entry)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        logger.info("Feature cache stored: %s", entry)
+        stored = self.load(key)
+        self._evict()
+        return stored
+
+    def _evict(self) -> None:
+        """Drop all but the ``max_entries`` most recently used entries, and stale staging directories."""
+        entries, now = [], time.time()
+        for path in self.cache_dir.iterdir():
+            if not path.is_dir():
+                continue
+            if path.name.startswith("."):
+                if now - path.stat().st_mtime > _STALE_STAGING_SECONDS:
+                    shutil.rmtree(path, ignore_errors=True)
+            else:
+                entries.append(path)
+
+        entries.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+        for old in entries[self.max_entries:]:
+            shutil.rmtree(old, ignore_errors=True)
+            logger.info("Feature cache evicted: %s", old)
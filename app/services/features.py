@@ -0,0 +1,204 @@
+# features.py
+# Derived-biomarker definitions and the fused impute/derive/scale pipeline
+# shared by training and PredictionService in ClarityPredict 2.0
+
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------
+# Definitions
+# ---------------------------------------------------------
+@dataclass(frozen=True)
+class DerivedFeature:
+    """
+    A feature computed from imputed raw biomarkers before scaling.
+
+    ``product`` and ``ratio`` combine two inputs and multiply by ``factor``;
+    ``bins`` maps one input to the index of its interval in ``edges``
+    (left-closed, so a value equal to an edge falls in the upper class).
+    """
+
+    name: str
+    op: str
+    inputs: Tuple[str, ...]
+    factor: float = 1.0
+    edges: Tuple[float, ...] = ()
+    description: str = ""
+
+
+DERIVED_FEATURES: Dict[str, DerivedFeature] = {
+    f.name: f
+    for f in (
+        DerivedFeature(
+            "homa_ir", "product", ("glucose", "insulin"), factor=1.0 / 405.0,
+            description="HOMA-IR insulin resistance: glucose (mg/dL) × insulin (µU/mL) / 405",
+        ),
+        DerivedFeature(
+            "ldl_hdl_ratio", "ratio", ("ldl", "hdl"),
+            description="LDL/HDL cholesterol ratio",
+        ),
+        DerivedFeature(
+            "bmi_category", "bins", ("bmi",), edges=(18.5, 25.0, 30.0),
+            description="WHO BMI class: 0 underweight, 1 normal, 2 overweight, 3 obese",
+        ),
+    )
+}
+
+
+# ---------------------------------------------------------
+# Feature spec
+# ---------------------------------------------------------
+@dataclass
+class FeatureSpec:
+    """
+    Model columns written by the training pipeline: the raw biomarkers in
+    input order, followed by the named derived features.
+    """
+
+    raw: List[str]
+    derived: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        unknown = [name for name in self.derived if name not in DERIVED_FEATURES]
+        if unknown:
+            raise ValueError(f"Unknown derived features: {unknown}. Available: {list(DERIVED_FEATURES)}")
+        for name in self.derived:
+            missing = [f for f in DERIVED_FEATURES[name].inputs if f not in self.raw]
+            if missing:
+                raise ValueError(f"Derived feature '{name}' needs raw features {missing}.")
+
+    @classmethod
+    def parse(cls, raw: Sequence[str], derived: str) -> "FeatureSpec":
+        """Spec from a comma-separated list of derived feature names (``all`` for every one)."""
+        names = list(DERIVED_FEATURES) if derived.strip() == "all" else [
+            n.strip() for n in derived.split(",") if n.strip()
+        ]
+        return cls(list(raw), names)
+
+    @property
+    def columns(self) -> List[str]:
+        return self.raw + self.derived
+
+    def save(self, path: Path) -> None:
+        Path(path).write_text(json.dumps(asdict(self), indent=2))
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["FeatureSpec"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        return cls(**json.loads(path.read_text()))
+
+
+# ---------------------------------------------------------
+# Compiled pipeline
+# ---------------------------------------------------------
+class DerivedColumns:
+    """
+    Derived definitions of a spec compiled to column-index arrays per
+    operation, so every product (and every ratio) is computed for all its
+    features in a single NumPy expression.
+    """
+
+    def __init__(self, spec: FeatureSpec):
+        position = {name: i for i, name in enumerate(spec.columns)}
+        self._pairs: Dict[str, Tuple[np.ndarray, ...]] = {}
+        self._bins: List[Tuple[int, int, np.ndarray]] = []
+        for op in ("product", "ratio"):
+            group = [DERIVED_FEATURES[n] for n in spec.derived if DERIVED_FEATURES[n].op == op]
+            if group:
+                self._pairs[op] = (
+                    np.array([position[f.name] for f in group]),
+                    np.array([position[f.inputs[0]] for f in group]),
+                    np.array([position[f.inputs[1]] for f in group]),
+                    np.array([f.factor for f in group], dtype=np.float64),
+                )
+        for name in spec.derived:
+            f = DERIVED_FEATURES[name]
+            if f.op == "bins":
+                self._bins.append((position[f.name], position[f.inputs[0]], np.asarray(f.edges, dtype=np.float64)))
+
+    def fill(self, out: np.ndarray) -> np.ndarray:
+        """Compute the derived columns of ``out`` in place from its raw columns."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if "product" in self._pairs:
+                target, a, b, factor = self._pairs["product"]
+                out[:, target] = out[:, a] * out[:, b] * factor
+            if "ratio" in self._pairs:
+                target, a, b, factor = self._pairs["ratio"]
+                out[:, target] = out[:, a] / out[:, b] * factor
+        for target, source, edges in self._bins:
+            out[:, target] = np.searchsorted(edges, out[:, source], side="right")
+        return out
+
+
+def add_derived(spec: FeatureSpec, X_imputed: np.ndarray) -> np.ndarray:
+    """Imputed raw columns followed by the spec's derived features, e.g. to fit the scaler on."""
+    out = np.empty((len(X_imputed), len(spec.columns)), dtype=np.float64)
+    out[:, :len(spec.raw)] = X_imputed
+    return DerivedColumns(spec).fill(out)
+
+
+class FeaturePipeline:
+    """
+    Imputation, derived features and scaling compiled into one vectorized
+    pass over a float64 block.
+
+    The fitted imputer and scaler are reduced to fill/mean/scale vectors,
+    so a call costs a few NumPy operations regardless of how many derived
+    features the spec adds. Raw columns give exactly the same result as
+    ``scaler.transform(imputer.transform(X))``. Derived values that are
+    undefined (e.g. a zero denominator) are set to the training mean.
+    """
+
+    def __init__(self, spec: FeatureSpec, imputer: Any, scaler: Any):
+        self.spec = spec
+        self.n_raw = len(spec.raw)
+        self.n_columns = len(spec.columns)
+        self.derived = DerivedColumns(spec)
+
+        self.fill = np.asarray(imputer.statistics_, dtype=np.float64)
+        if len(self.fill) != self.n_raw:
+            raise ValueError(f"Imputer was fitted on {len(self.fill)} columns, spec has {self.n_raw} raw features.")
+
+        n_scaled = int(scaler.n_features_in_)
+        if n_scaled != self.n_columns:
+            raise ValueError(f"Scaler was fitted on {n_scaled} columns, spec has {self.n_columns}.")
+        self.mean = np.asarray(scaler.mean_, dtype=np.float64) if scaler.with_mean else None
+        self.scale = np.asarray(scaler.scale_, dtype=np.float64) if scaler.with_std else None
+
+    @property
+    def columns(self) -> List[str]:
+        return self.spec.columns
+
+    def unscaled(self, raw: np.ndarray) -> np.ndarray:
+        """Imputed raw columns followed by derived features, before scaling."""
+        out = np.empty((len(raw), self.n_columns), dtype=np.float64)
+        values = out[:, :self.n_raw]
+        values[...] = raw
+        missing = np.isnan(values)
+        if missing.any():
+            np.copyto(values, np.broadcast_to(self.fill, values.shape), where=missing)
+        return self.derived.fill(out)
+
+    def transform(self, raw: np.ndarray) -> np.ndarray:
+        """Scaled model matrix (float64) for raw rows in ``spec.raw`` order."""
+        out = self.unscaled(raw)
+        if self.mean is not None:
+            out -= self.mean
+        if self.scale is not None:
+            out /= self.scale
+
+        if self.n_columns > self.n_raw:
+            derived = out[:, self.n_raw:]
+            derived[~np.isfinite(derived)] = 0.0
+        return out
@@ -0,0 +1,377 @@
+# history_store.py
+# Append-optimized patient prediction history for ClarityPredict 2.0
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id            INTEGER PRIMARY KEY,
+    patient_id    TEXT    NOT NULL,
+    ts            REAL    NOT NULL,
+    model_version TEXT    NOT NULL,
+    inputs        BLOB    NOT NULL,   -- float64 raw biomarker values
+    prediction    REAL    NOT NULL,
+    shap          BLOB,               -- float32 SHAP vector
+    needs_rescore INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_patient_ts ON predictions (patient_id, ts);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+# ---------------------------------------------------------
+# Data structures
+# ---------------------------------------------------------
+@dataclass
+class HistoryRecord:
+    patient_id: str
+    ts: float
+    model_version: str
+    inputs: bytes
+    prediction: float
+    shap: Optional[bytes]
+
+
+# ---------------------------------------------------------
+# History store
+# ---------------------------------------------------------
+class HistoryStore:
+    """
+    SQLite (WAL mode) store of scored predictions, indexed by patient and
+    timestamp. ``record`` only enqueues; a background writer thread commits
+    queued records in batches, so scoring requests never wait on disk I/O.
+    Queued records stay visible to ``trajectory(include_pending=True)``
+    until they are committed.
+
+    Inputs are stored per raw feature; SHAP vectors per ``shap_names``
+    (the model's columns, which include derived features if it has any).
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        feature_names: Sequence[str],
+        batch_size: int = 512,
+        flush_interval: float = 0.5,
+        shap_names: Optional[Sequence[str]] = None,
+    ):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.feature_names = list(feature_names)
+        self.shap_names = list(shap_names or feature_names)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: "queue.Queue[Optional[HistoryRecord]]" = queue.Queue()
+        # Queued records per patient, oldest first (the writer commits in queue order)
+        self._unwritten: Dict[str, Deque[HistoryRecord]] = defaultdict(deque)
+        self._unwritten_lock = threading.Lock()
+        self._local = threading.local()
+
+        conn = self._connect()
+        self._migrate(conn)
+        conn.executescript(_SCHEMA)
+        self._init_meta(conn)
+
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+        logger.info("HistoryStore ready at %s", self.db_path)
+
+    # ---------------------------------------------------------
+    # CONNECTIONS
+    # ---------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers run alongside the writer."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        """Bring stores created before needs_rescore existed up to date."""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(predictions)")}
+        if columns and "needs_rescore" not in columns:
+            with conn:
+                conn.execute(
+                    "ALTER TABLE predictions ADD COLUMN needs_rescore INTEGER NOT NULL DEFAULT 0"
+                )
+
+    def _init_meta(self, conn: sqlite3.Connection) -> None:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'feature_names'").fetchone()
+        if row is None:
+            with conn:
+                conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('feature_names', ?)",
+                    (json.dumps(self.feature_names),),
+                )
+        elif json.loads(row[0]) != self.feature_names:
+            raise ValueError(
+                f"History at {self.db_path} was written for features {json.loads(row[0])}, "
+                f"not {self.feature_names}."
+            )
+
+    # ---------------------------------------------------------
+    # WRITES
+    # ---------------------------------------------------------
+    def record(
+        self,
+        patient_id: str,
+        inputs: Sequence[float],
+        prediction: float,
+        model_version: str,
+        shap_values: Optional[Sequence[float]] = None,
+        ts: Optional[float] = None,
+    ) -> None:
+        """Queue one scored prediction for writing. Returns immediately."""
+        shap_blob = None
+        if shap_values is not None:
+            shap_blob = np.asarray(shap_values, dtype=np.float32).reshape(-1).tobytes()
+
+        record = HistoryRecord(
+            patient_id=str(patient_id),
+            ts=time.time() if ts is None else float(ts),
+            model_version=model_version,
+            inputs=np.asarray(inputs, dtype=np.float64).reshape(-1).tobytes(),
+            prediction=float(prediction),
+            shap=shap_blob,
+        )
+        with self._unwritten_lock:
+            self._unwritten[record.patient_id].append(record)
+        self._queue.put(record)
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        pending: List[HistoryRecord] = []
+        deadline = None
+        stopping = False
+
+        while not stopping:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+                if item is None:
+                    stopping = True
+                else:
+                    pending.append(item)
+                    deadline = deadline or time.monotonic() + self.flush_interval
+            except queue.Empty:
+                pass
+
+            if pending and (
+                stopping or len(pending) >= self.batch_size or time.monotonic() >= deadline
+            ):
+                self._commit(conn, pending)
+                for _ in pending:
+                    self._queue.task_done()
+                pending, deadline = [], None
+
+            if stopping:
+                self._queue.task_done()
+
+    def _commit(self, conn: sqlite3.Connection, records: List[HistoryRecord]) -> None:
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO predictions (patient_id, ts, model_version, inputs, prediction, shap) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (r.patient_id, r.ts, r.model_version, r.inputs, r.prediction, r.shap)
+                        for r in records
+                    ],
+                )
+        except sqlite3.Error as e:
+            logger.error("Failed to write %d history records: %s", len(records), e)
+
+        with self._unwritten_lock:
+            for r in records:
+                unwritten = self._unwritten[r.patient_id]
+                unwritten.popleft()
+                if not unwritten:
+                    del self._unwritten[r.patient_id]
+
+    def update_inputs(self, record_id: int, inputs: Sequence[float]) -> None:
+        """Correct the stored inputs of a record and mark it for re-scoring."""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "UPDATE predictions SET inputs = ?, needs_rescore = 1 WHERE id = ?",
+                (np.asarray(inputs, dtype=np.float64).reshape(-1).tobytes(), int(record_id)),
+            )
+
+    def flush(self) -> None:
+        """Block until every queued record has been committed."""
+        self._queue.join()
+
+    def close(self) -> None:
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+    # ---------------------------------------------------------
+    # QUERIES
+    # ---------------------------------------------------------
+    def trajectory(
+        self,
+        patient_id: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: Optional[int] = None,
+        include_pending: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Time-ordered predictions for one patient, served from the
+        (patient_id, ts) index. Inputs and SHAP vectors are decoded with a
+        single frombuffer call per column. With ``include_pending``,
+        records still queued for the writer are included (with id -1), so
+        callers can show a just-recorded prediction without flush().
+        """
+        # Snapshot the queue before reading, so a record committed meanwhile shows up once
+        pending = []
+        if include_pending:
+            with self._unwritten_lock:
+                pending = [
+                    r for r in self._unwritten.get(str(patient_id), ())
+                    if (start is None or r.ts >= start) and (end is None or r.ts <= end)
+                ]
+
+        sql = "SELECT id, ts, model_version, prediction, inputs, shap FROM predictions WHERE patient_id = ?"
+        params: list = [str(patient_id)]
+        if start is not None:
+            sql += " AND ts >= ?"
+            params.append(float(start))
+        if end is not None:
+            sql += " AND ts <= ?"
+            params.append(float(end))
+        sql += " ORDER BY ts"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        rows = self._connect().execute(sql, params).fetchall()
+        if pending:
+            committed = {row[1] for row in rows}
+            rows += [
+                (-1, r.ts, r.model_version, r.prediction, r.inputs, r.shap)
+                for r in pending if r.ts not in committed
+            ]
+            rows.sort(key=lambda row: row[1])
+            if limit is not None:
+                rows = rows[:limit]
+        columns = ["id", "ts", "model_version", "prediction"] + self.feature_names
+        if not rows:
+            return pd.DataFrame(columns=columns)
+
+        ids, ts, versions, predictions, inputs, shap = zip(*rows)
+        n_features = len(self.feature_names)
+
+        frame = pd.DataFrame({
+            "id": np.asarray(ids, dtype=np.int64),
+            "ts": pd.to_datetime(np.asarray(ts), unit="s"),
+            "model_version": versions,
+            "prediction": np.asarray(predictions, dtype=np.float64),
+        })
+        values = np.frombuffer(b"".join(inputs), dtype=np.float64).reshape(-1, n_features)
+        frame[self.feature_names] = values
+
+        # SHAP vectors written for a model with other columns are left out until re-scored
+        shap_bytes = len(self.shap_names) * np.dtype(np.float32).itemsize
+        if all(blob is not None and len(blob) == shap_bytes for blob in shap):
+            shap_values = np.frombuffer(b"".join(shap), dtype=np.float32).reshape(-1, len(self.shap_names))
+            frame[[f"shap_{name}" for name in self.shap_names]] = shap_values
+
+        return frame
+
+    def count(self) -> int:
+        return int(self._connect().execute("SELECT COUNT(*) FROM predictions").fetchone()[0])
+
+    # ---------------------------------------------------------
+    # RE-SCORING SUPPORT
+    # ---------------------------------------------------------
+    _STALE = "(model_version != ? OR needs_rescore = 1)"
+
+    def count_stale(self, model_version: str, after_id: int = 0) -> int:
+        """Records scored by another model version or with corrected inputs."""
+        return int(self._connect().execute(
+            f"SELECT COUNT(*) FROM predictions WHERE id > ? AND {self._STALE}",
+            (int(after_id), model_version),
+        ).fetchone()[0])
+
+    def stale_chunk(self, model_version: str, after_id: int, limit: int):
+        """
+        Next ``limit`` stale records with id > ``after_id`` in id order
+        (keyset pagination). Returns (ids, inputs matrix).
+        """
+        rows = self._connect().execute(
+            f"SELECT id, inputs FROM predictions WHERE id > ? AND {self._STALE} ORDER BY id LIMIT ?",
+            (int(after_id), model_version, int(limit)),
+        ).fetchall()
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty((0, len(self.feature_names)))
+
+        ids, blobs = zip(*rows)
+        inputs = np.frombuffer(b"".join(blobs), dtype=np.float64).reshape(-1, len(self.feature_names))
+        return np.asarray(ids, dtype=np.int64), inputs
+
+    def apply_rescore(
+        self,
+        ids: np.ndarray,
+        inputs: np.ndarray,
+        predictions: np.ndarray,
+        model_version: str,
+        shap_values: Optional[np.ndarray] = None,
+    ) -> int:
+        """
+        Write re-scored predictions for ``ids`` in one transaction. A record
+        is only updated if its stored inputs still equal the ``inputs`` it
+        was scored from, so a correction made meanwhile stays stale for the
+        next run. Returns the number of records written.
+        """
+        blobs = [row.tobytes() for row in np.asarray(inputs, dtype=np.float64)]
+        if shap_values is None:
+            sql = (
+                "UPDATE predictions SET prediction = ?, model_version = ?, needs_rescore = 0 "
+                "WHERE id = ? AND inputs = ?"
+            )
+            params = [
+                (float(p), model_version, int(i), blob) for i, p, blob in zip(ids, predictions, blobs)
+            ]
+        else:
+            sql = (
+                "UPDATE predictions SET prediction = ?, shap = ?, model_version = ?, needs_rescore = 0 "
+                "WHERE id = ? AND inputs = ?"
+            )
+            shap32 = np.asarray(shap_values, dtype=np.float32)
+            params = [
+                (float(p), shap32[k].tobytes(), model_version, int(i), blob)
+                for k, (i, p, blob) in enumerate(zip(ids, predictions, blobs))
+            ]
+
+        conn = self._connect()
+        with conn:
+            written = conn.executemany(sql, params).rowcount
+        return int(written)
@@ -0,0 +1,228 @@
+# intervals.py
+# Prediction intervals for ClarityPredict 2.0: split-conformal calibration
+# and per-tree quantiles of forest ensembles
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+from app.services.threading_policy import ThreadingPolicy
+
+logger = logging.getLogger(__name__)
+
+# Forest types whose per-tree outputs are samples around the ensemble mean
+FOREST_TYPES = ("RandomForestRegressor", "ExtraTreesRegressor")
+
+# Below this many rows the per-tree loop runs inline; thread hand-off costs more
+_PARALLEL_MIN_ROWS = 2048
+
+
+# ---------------------------------------------------------
+# Per-tree outputs
+# ---------------------------------------------------------
+class ForestMembers:
+    """
+    Per-tree outputs of a fitted sklearn forest for a whole batch, from each
+    tree's compiled ``predict`` (the same kernels the forest's own
+    ``predict`` runs, which release the GIL). Their row means are the
+    forest's predictions, so one pass yields both predictions and spread.
+
+    Large batches split the trees into as many groups as ``policy`` grants
+    the call, on one executor of ``policy.batch_threads`` threads shared by
+    all callers, so concurrent batch jobs stay within the same budget.
+    Without a policy (offline use) every core is available.
+    """
+
+    def __init__(self, model: Any, policy: Optional[ThreadingPolicy] = None):
+        self.trees = [e.tree_ for e in model.estimators_]
+        self.policy = policy or ThreadingPolicy(batch_threads=os.cpu_count() or 1)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    @classmethod
+    def from_model(cls, model: Any, policy: Optional[ThreadingPolicy] = None) -> Optional["ForestMembers"]:
+        """None for anything but a sklearn forest."""
+        if type(model).__name__ not in FOREST_TYPES:
+            return None
+        return cls(model, policy)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.trees)
+
+    def outputs(self, X: np.ndarray) -> np.ndarray:
+        """Per-tree predictions, shape (n_trees, n_rows)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        out = np.empty((self.n_trees, len(X)), dtype=np.float64)
+
+        def fill(indices: range) -> None:
+            for i in indices:
+                out[i] = self.trees[i].predict(X)[:, 0]
+
+        workers = 1 if len(X) < _PARALLEL_MIN_ROWS else min(self.policy.threads_for(len(X)), self.n_trees)
+        if workers == 1:
+            fill(range(self.n_trees))
+        else:
+            groups = [range(k, self.n_trees, workers) for k in range(workers)]
+            list(self._executor().map(fill, groups))
+        return out
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.policy.batch_threads, thread_name_prefix="forest-members"
+                )
+            return self._pool
+
+
+def conformal_quantile(scores: np.ndarray, alpha: float) -> float:
+    """
+    Finite-sample split-conformal quantile: the ceil((n + 1)(1 - alpha))-th
+    smallest score, which guarantees coverage >= 1 - alpha on exchangeable data.
+    """
+    scores = np.sort(np.asarray(scores, dtype=np.float64))
+    rank = math.ceil((len(scores) + 1) * (1.0 - alpha))
+    if rank > len(scores):
+        return float("inf")
+    return float(scores[rank - 1])
+
+
+# ---------------------------------------------------------
+# Calibration
+# ---------------------------------------------------------
+@dataclass
+class IntervalCalibration:
+    """
+    Conformal calibration written by the training pipeline from hold-out
+    residuals. With ``method == "normalized"`` the residuals were divided by
+    the per-tree spread plus ``beta``, so interval widths adapt per row;
+    ``"absolute"`` gives the same half-width ``q_hat`` to every row.
+    """
+
+    method: str
+    alpha: float
+    q_hat: float
+    beta: float
+    n: int
+    model_version: str
+
+    @classmethod
+    def fit(
+        cls,
+        y_true: np.ndarray,
+        predictions: np.ndarray,
+        alpha: float,
+        model_version: str,
+        spread: Optional[np.ndarray] = None,
+    ) -> "IntervalCalibration":
+        residuals = np.abs(np.asarray(y_true, dtype=np.float64) - np.asarray(predictions, dtype=np.float64))
+
+        if spread is None:
+            return cls("absolute", alpha, conformal_quantile(residuals, alpha), 0.0, len(residuals), model_version)
+
+        spread = np.asarray(spread, dtype=np.float64)
+        beta = max(0.1 * float(np.median(spread)), 1e-9)
+        scores = residuals / (spread + beta)
+        return cls("normalized", alpha, conformal_quantile(scores, alpha), beta, len(residuals), model_version)
+
+    def save(self, path: Path) -> None:
+        Path(path).write_text(json.dumps(asdict(self), indent=2))
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["IntervalCalibration"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        return cls(**json.loads(path.read_text()))
+
+
+# ---------------------------------------------------------
+# Interval estimator
+# ---------------------------------------------------------
+class IntervalEstimator:
+    """
+    Two-sided (1 - alpha) prediction intervals for a whole batch.
+
+    A matching conformal calibration is preferred; without one, forests fall
+    back to the alpha/2 and 1 - alpha/2 quantiles of their per-tree outputs
+    (an uncalibrated spread, not a coverage guarantee). For forests, the
+    per-tree outputs are computed once per batch and give the predictions
+    as well as the interval.
+    """
+
+    def __init__(
+        self,
+        members: Optional[ForestMembers],
+        calibration: Optional[IntervalCalibration] = None,
+        alpha: float = 0.1,
+    ):
+        if calibration is None and members is None:
+            raise ValueError("Intervals need a conformal calibration or a forest.")
+        if calibration is not None and calibration.method == "normalized" and members is None:
+            raise ValueError("Normalized calibration needs the forest's trees.")
+
+        self.members = members
+        self.calibration = calibration
+        self.alpha = calibration.alpha if calibration is not None else alpha
+
+    @property
+    def method(self) -> str:
+        if self.calibration is not None:
+            return f"conformal ({self.calibration.method})"
+        return "tree quantiles"
+
+    @property
+    def coverage(self) -> float:
+        return 1.0 - self.alpha
+
+    @property
+    def needs_members(self) -> bool:
+        """Whether intervals depend on per-tree outputs rather than only the prediction."""
+        return self.calibration is None or self.calibration.method == "normalized"
+
+    def spread(self, X: np.ndarray) -> np.ndarray:
+        """Standard deviation of the per-tree outputs for each row."""
+        return self.members.outputs(X).std(axis=0)
+
+    def predict(
+        self, X: np.ndarray, predictions: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Predictions with lower and upper bounds for prepared rows ``X``.
+        ``predictions`` may be passed in; forests otherwise derive them from
+        the same per-tree pass as the bounds.
+        """
+        calibration = self.calibration
+
+        if predictions is None and self.members is None:
+            raise ValueError("Predictions are required for models without per-tree outputs.")
+
+        per_tree = None
+        if self.needs_members or predictions is None:
+            per_tree = self.members.outputs(X)
+        if predictions is None:
+            predictions = per_tree.mean(axis=0)
+        predictions = np.asarray(predictions, dtype=np.float64).reshape(-1)
+
+        if calibration is not None:
+            half_width = calibration.q_hat
+            if calibration.method == "normalized":
+                half_width = calibration.q_hat * (per_tree.std(axis=0) + calibration.beta)
+            return predictions, predictions - half_width, predictions + half_width
+
+        n_trees = per_tree.shape[0]
+        lo = int(np.floor(self.alpha / 2 * (n_trees - 1)))
+        hi = int(np.ceil((1.0 - self.alpha / 2) * (n_trees - 1)))
+        per_tree.partition([lo, hi], axis=0)
+        return predictions, per_tree[lo], per_tree[hi]
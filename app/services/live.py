@@ -0,0 +1,201 @@
+# live.py
+# Live-as-you-type predictions for ClarityPredict 2.0: cached low-latency
+# previews and debounced full explanations
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.prediction_service import PredictionService
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------
+# Data structures
+# ---------------------------------------------------------
+@dataclass
+class LiveEstimate:
+    """
+    Preview for one input. ``attributions`` are occlusion effects: the
+    change in prediction when a feature is moved to its training mean.
+    """
+
+    prediction: float
+    attributions: Dict[str, float]
+    interval: Optional[Tuple[float, float]]
+    elapsed_ms: float
+
+
+# ---------------------------------------------------------
+# Shared predictor
+# ---------------------------------------------------------
+class LivePredictor:
+    """
+    Process-wide part of live mode, shared by all sessions: preview and
+    full-result caches keyed by model version and input values, and a small
+    executor for full runs (prediction, SHAP, monitoring) of settled inputs.
+
+    A preview scores the input and one occluded copy per model column
+    (derived features included) in a single batched call, so prediction
+    and attribution cost one predict.
+    """
+
+    def __init__(
+        self,
+        service: PredictionService,
+        cache_size: int = 256,
+        budget_ms: float = 50.0,
+        workers: int = 2,
+    ):
+        self.service = service
+        self.features = list(service.expected_features)
+        self.columns = list(service.model_features)
+        self.budget_ms = budget_ms
+        self.previews = LRUCache(cache_size)
+        self.results = LRUCache(cache_size)
+
+        # The scaler centers every feature on its training mean
+        self.reference = np.zeros(len(self.columns), dtype=service.dtype)
+
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="live")
+        atexit.register(self.close)
+
+    def key(self, input_dict: Dict[str, Any]) -> Tuple:
+        return (self.service.model_version,) + tuple(float(input_dict[f]) for f in self.features)
+
+    # ---------------------------------------------------------
+    # PREVIEW
+    # ---------------------------------------------------------
+    def estimate(self, input_dict: Dict[str, Any]) -> LiveEstimate:
+        key = self.key(input_dict)
+        cached = self.previews.get(key)
+        if cached is not None:
+            return cached
+
+        start = time.perf_counter()
+        frame = pd.DataFrame([input_dict])[self.features]
+        report = self.service.validate(frame)
+        if not report.row_valid[0]:
+            raise ValueError(f"Invalid input: {report.row_messages(0)}")
+
+        x = self.service.prepare_batch(frame).to_numpy()
+        rows = np.repeat(x, len(self.columns) + 1, axis=0)
+        rows[np.arange(1, len(rows)), np.arange(len(self.columns))] = self.reference
+        scores = self._score(rows)
+
+        interval = None
+        if self.service.intervals is not None:
+            lower, upper = self.service.predict_interval(
+                pd.DataFrame(x, columns=self.columns), scores[:1]
+            )
+            interval = (float(lower[0]), float(upper[0]))
+
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        if elapsed_ms > self.budget_ms:
+            logger.warning("Live preview took %.1f ms (budget %.0f ms)", elapsed_ms, self.budget_ms)
+
+        estimate = LiveEstimate(
+            prediction=float(scores[0]),
+            attributions=dict(zip(self.columns, (scores[0] - scores[1:]).tolist())),
+            interval=interval,
+            elapsed_ms=elapsed_ms,
+        )
+        self.previews.put(key, estimate)
+        return estimate
+
+    def _score(self, rows: np.ndarray) -> np.ndarray:
+        """Student model in fast mode, the configured backend otherwise."""
+        return self.service.preview_batch(pd.DataFrame(rows, columns=self.columns))
+
+    # ---------------------------------------------------------
+    # FULL RESULTS
+    # ---------------------------------------------------------
+    def submit(self, input_dict: Dict[str, Any]) -> Future:
+        key = self.key(input_dict)
+        return self._pool.submit(self._full_run, key, dict(input_dict))
+
+    def _full_run(self, key: Tuple, input_dict: Dict[str, Any]) -> Dict[str, Any]:
+        cached = self.results.get(key)
+        if cached is not None:
+            return cached
+        result = self.service.run(input_dict)
+        self.results.put(key, result)
+        return result
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ---------------------------------------------------------
+# Per-session state
+# ---------------------------------------------------------
+class LiveSession:
+    """
+    One user's live-mode state. Every input change restarts the settle
+    timer and cancels the pending full run for the previous input; the full
+    run for the current input starts only once it has been unchanged for
+    ``settle_s`` seconds.
+    """
+
+    def __init__(self, predictor: LivePredictor, settle_s: float = 0.5):
+        self.predictor = predictor
+        self.settle_s = settle_s
+        self.input: Optional[Dict[str, Any]] = None
+        self._key: Optional[Tuple] = None
+        self._changed_at = 0.0
+        self._future: Optional[Future] = None
+        self._future_key: Optional[Tuple] = None
+        self._lock = threading.Lock()
+
+    def update(self, input_dict: Dict[str, Any]) -> LiveEstimate:
+        """Record the current input and return its preview."""
+        key = self.predictor.key(input_dict)
+        with self._lock:
+            if key != self._key:
+                self.input, self._key = dict(input_dict), key
+                self._changed_at = time.monotonic()
+                self._cancel_superseded()
+        return self.predictor.estimate(input_dict)
+
+    def _cancel_superseded(self) -> None:
+        if self._future is not None and self._future_key != self._key:
+            # A run that already started still completes and fills the shared cache
+            self._future.cancel()
+            self._future, self._future_key = None, None
+
+    @property
+    def settled(self) -> bool:
+        return self._key is not None and time.monotonic() - self._changed_at >= self.settle_s
+
+    def settled_result(self) -> Optional[Dict[str, Any]]:
+        """
+        Full result for the current input once it has settled and the run
+        has finished; None while the input is changing or the run is pending.
+        """
+        with self._lock:
+            if not self.settled:
+                return None
+
+            cached = self.predictor.results.get(self._key)
+            if cached is not None:
+                return cached
+
+            if self._future is None:
+                self._future, self._future_key = self.predictor.submit(self.input), self._key
+            if not self._future.done():
+                return None
+
+            future, self._future, self._future_key = self._future, None, None
+
+        return future.result()
@@ -3,19 +3,39 @@
 
 from __future__ import annotations
 
+import json
 import logging
+import os
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Sequence, Tuple
 
 import joblib
 import numpy as np
 import pandas as pd
 import shap
+from sklearn.linear_model import LinearRegression
+
+from app.services.backends import InferenceBackend, NativeBackend, check_parity, create_backend
+from app.services.drift import DriftMonitor, Sketch
+from app.services.explainers import BudgetedKernelExplainer, load_explainer, save_explainer
+from app.services.feature_cache import file_digest, files_digest
+from app.services.features import FeaturePipeline, FeatureSpec
+from app.services.intervals import ForestMembers, IntervalCalibration, IntervalEstimator
+from app.services.shadow import ShadowScorer, load_challengers
+from app.services.threading_policy import ThreadingPolicy, default_batch_threads, single_threaded
+from app.services.tracing import span, traced
+from app.utils.validators import CompiledSchema, ValidationReport, compile_schema
+from config import settings
 
 # Project root (two levels up from this file: app/services/ -> app/ -> project root)
 BASE_DIR = Path(__file__).resolve().parents[2]
 
+# Rows imputed/scaled per float64 block before casting to the output dtype
+PREPROCESS_CHUNK_ROWS = 65_536
+
 # ---------------------------------------------------------
 # Logging configuration
 # ---------------------------------------------------------
@@ -52,6 +72,10 @@ class PredictionService:
         expected_features: Optional[List[str]] = None,
         background_sample_size: int = 200,
         background_shap_sample: int = 50,
+        fast_mode: Optional[bool] = None,
+        student_path: str = "models/student.pkl",
+        backend: Optional[str] = None,
+        dtype: Optional[str] = None,
     ):
         # Resolve model path relative to project root
         self.model_path = BASE_DIR / model_path
@@ -60,29 +84,72 @@ class PredictionService:
         self.model = None
         self.scaler = None
         self.imputer = None
+        self.feature_spec: Optional[FeatureSpec] = None
+        self.features: Optional[FeaturePipeline] = None
         self.explainer = None
-
-        # Feature schema
+        self.student = None
+        self.monitor: Optional[DriftMonitor] = None
+        self.shadow: Optional[ShadowScorer] = None
+        self.backend: Optional[InferenceBackend] = None
+        self.intervals: Optional[IntervalEstimator] = None
+        self.threading: Optional[ThreadingPolicy] = None
+        self.backend_name = backend or settings.INFERENCE_BACKEND
+
+        # Set once warm_up() has exercised every request path
+        self.ready = threading.Event()
+        self.warmup_ms: Dict[str, float] = {}
+
+        # Numeric precision of prepared inputs, background data and SHAP arrays
+        self.dtype = np.dtype(dtype or settings.INFERENCE_DTYPE)
+        if self.dtype not in (np.float32, np.float64):
+            raise ValueError(f"Unsupported dtype: {self.dtype}")
+
+        # Feature schema: raw inputs, and the columns the model sees (raw + derived)
         self.expected_features = expected_features
+        self.model_features: List[str] = []
 
         # SHAP background settings
         self.background_sample_size = background_sample_size
         self.background_shap_sample = background_shap_sample
         self._background_data: Optional[np.ndarray] = None
 
+        # Fast mode: distilled student model for previews (CLARITY_FAST_MODE by default)
+        self.fast_mode = settings.FAST_MODE if fast_mode is None else fast_mode
+        self.student_path = BASE_DIR / student_path
+
         logger.info("Initializing PredictionService with model_path=%s", self.model_path)
 
         # Load components
         self._load_model()
+        self._init_threading()
         self._load_preprocessors()
+        if self.fast_mode:
+            self._load_student()
 
         # Ensure expected_features is set BEFORE SHAP initialization
         self._set_expected_features()
+        self._init_feature_pipeline()
+        self.schema: CompiledSchema = compile_schema().subset(self.expected_features)
 
         # Initialize SHAP components
         self._init_background_data()
         self._init_explainer()
 
+        # Inference runtime (needs background data for the parity check)
+        self._init_backend()
+
+        if settings.PREDICTION_INTERVALS:
+            self._init_intervals()
+        if settings.DRIFT_MONITORING:
+            self._init_monitor()
+        if settings.SHADOW_CHALLENGERS:
+            self._init_shadow()
+
+        if settings.WARM_UP:
+            self.warm_up()
+        else:
+            self._mark_ready()
+
     # ---------------------------------------------------------
     # MODEL LOADING
     # ---------------------------------------------------------
@@ -93,13 +160,24 @@ class PredictionService:
 
         logger.info("Loading model from %s", self.model_path)
         self.model = joblib.load(self.model_path)
+        self.model_version = file_digest(self.model_path)[:12]
         print("MODEL FEATURES:", getattr(self.model, "feature_names_in_", None))
-        logger.info("Model loaded successfully: %s", type(self.model))
+        logger.info("Model loaded successfully: %s (version %s)", type(self.model), self.model_version)
+
+    def _init_threading(self) -> None:
+        """Replace the thread settings pickled with the model by the per-call inference policy."""
+        self.threading = ThreadingPolicy(
+            small_rows=settings.INFERENCE_SMALL_ROWS,
+            batch_threads=settings.INFERENCE_BATCH_THREADS or default_batch_threads(settings.BATCH_WORKERS),
+            native_threads=settings.INFERENCE_NATIVE_THREADS,
+        )
+        self.threading.apply_process_limits()
 
     def _load_preprocessors(self) -> None:
-        """Load scaler and imputer saved during training."""
+        """Load scaler, imputer and (if written by training) the feature spec."""
         scaler_path = BASE_DIR / "models/scaler.pkl"
         imputer_path = BASE_DIR / "models/imputer.pkl"
+        spec_path = BASE_DIR / settings.FEATURE_SPEC_PATH
 
         if not scaler_path.exists() or not imputer_path.exists():
             raise FileNotFoundError(
@@ -108,10 +186,27 @@ class PredictionService:
 
         self.scaler = joblib.load(scaler_path)
         self.imputer = joblib.load(imputer_path)
+        self.feature_spec = FeatureSpec.load(spec_path)
+
+        versioned = [scaler_path, imputer_path] + ([spec_path] if self.feature_spec is not None else [])
+        self.preprocessor_version = files_digest(versioned)[:12]
 
         logger.info("Scaler loaded: %s", type(self.scaler))
         logger.info("Imputer loaded: %s", type(self.imputer))
 
+    def _load_student(self) -> None:
+        """Load the distilled preview model written by the training pipeline."""
+        if not self.student_path.exists():
+            logger.warning(
+                "Fast mode requested but no student model at %s. "
+                "Previews will use the full model.",
+                self.student_path,
+            )
+            return
+
+        self.student = single_threaded(joblib.load(self.student_path))
+        logger.info("Student model loaded for previews: %s", type(self.student))
+
     # ---------------------------------------------------------
     # FEATURE HANDLING
     # ---------------------------------------------------------
@@ -120,13 +215,19 @@ class PredictionService:
         Ensures expected_features is set before SHAP initialization.
         Priority:
         1. Explicitly provided by user
-        2. Inferred from model.feature_names_in_
-        3. Hardcoded fallback (training schema)
+        2. Raw features of the training feature spec
+        3. Inferred from model.feature_names_in_
+        4. Hardcoded fallback (training schema)
         """
         if self.expected_features:
             logger.info("Using explicitly provided expected_features: %s", self.expected_features)
             return
 
+        if self.feature_spec is not None:
+            self.expected_features = list(self.feature_spec.raw)
+            logger.info("Using raw features from the feature spec: %s", self.expected_features)
+            return
+
         if hasattr(self.model, "feature_names_in_"):
             self.expected_features = list(self.model.feature_names_in_)
             logger.info("Inferred expected_features from model: %s", self.expected_features)
@@ -139,14 +240,22 @@ class PredictionService:
             self.expected_features,
         )
 
+    def _init_feature_pipeline(self) -> None:
+        """Compile imputation, derived features and scaling into one pass over raw inputs."""
+        spec = self.feature_spec or FeatureSpec(list(self.expected_features))
+        self.features = FeaturePipeline(spec, self.imputer, self.scaler)
+        self.model_features = self.features.columns
+        if spec.derived:
+            logger.info("Derived features: %s", spec.derived)
+
     # ---------------------------------------------------------
     # BACKGROUND DATA FOR SHAP
     # ---------------------------------------------------------
     def _init_background_data(self) -> None:
-        if not self.expected_features:
-            raise RuntimeError("expected_features must be set before initializing background data.")
+        if not self.model_features:
+            raise RuntimeError("model_features must be set before initializing background data.")
 
-        n_features = len(self.expected_features)
+        n_features = len(self.model_features)
         logger.info(
             "Initializing synthetic background data: rows=%d, features=%d",
             self.background_sample_size,
@@ -154,7 +263,7 @@ class PredictionService:
         )
 
         rng = np.random.default_rng(seed=42)
-        self._background_data = rng.random((self.background_sample_size, n_features))
+        self._background_data = rng.random((self.background_sample_size, n_features)).astype(self.dtype)
 
     # ---------------------------------------------------------
     # SHAP EXPLAINER INITIALIZATION
@@ -162,22 +271,257 @@ class PredictionService:
     def _init_explainer(self) -> None:
         logger.info("Initializing SHAP explainer...")
 
+        cache_path = BASE_DIR / settings.EXPLAINER_CACHE_PATH
+        if settings.EXPLAINER_CACHE:
+            cached = load_explainer(cache_path, self.model_version)
+            if cached is not None:
+                self.explainer = cached
+                logger.info("Using cached SHAP explainer from %s", cache_path)
+                return
+
         try:
+            start = time.perf_counter()
             self.explainer = shap.TreeExplainer(self.model)
-            logger.info("Using SHAP TreeExplainer.")
+            build_ms = (time.perf_counter() - start) * 1000.0
+            logger.info("Using SHAP TreeExplainer (built in %.0f ms).", build_ms)
+
+            # Loading has a fixed per-tree cost, so only slow conversions are worth caching
+            if settings.EXPLAINER_CACHE and build_ms >= settings.EXPLAINER_CACHE_MIN_MS:
+                self._save_explainer(cache_path)
+            return
         except Exception as e:
-            logger.warning("TreeExplainer failed (%s). Falling back to KernelExplainer.", e)
+            logger.warning("TreeExplainer failed (%s). Falling back to a model-agnostic explainer.", e)
+
+        if self._background_data is None:
+            raise RuntimeError("No background data available for the SHAP explainer.")
+
+        background = shap.sample(self._background_data, self.background_shap_sample).astype(np.float64)
 
-            if self._background_data is None:
-                raise RuntimeError("No background data available for KernelExplainer.")
+        # Linear models have closed-form SHAP values
+        if isinstance(self.model, LinearRegression):
+            self.explainer = shap.LinearExplainer(self.model, background)
+            logger.info("Using exact SHAP LinearExplainer.")
+            return
 
-            background = shap.sample(self._background_data, self.background_shap_sample)
-            self.explainer = shap.KernelExplainer(self.model.predict, background)
-            logger.info("Using SHAP KernelExplainer with background shape=%s", background.shape)
+        def score(X: np.ndarray) -> np.ndarray:
+            return self.model.predict(pd.DataFrame(X, columns=self.model_features))
+
+        self.explainer = BudgetedKernelExplainer(
+            score,
+            background,
+            budget_ms=settings.EXPLAIN_BUDGET_MS,
+            tolerance=settings.EXPLAIN_TOLERANCE,
+        )
+        logger.info(
+            "Using budgeted Kernel SHAP (%.0f ms budget) with background shape=%s",
+            settings.EXPLAIN_BUDGET_MS, background.shape,
+        )
+
+    def _save_explainer(self, path: Path) -> None:
+        """Persist the converted tree explainer so later processes skip the conversion."""
+        try:
+            save_explainer(self.explainer, path, self.model_version)
+            logger.info("SHAP explainer cached at %s", path)
+        except (OSError, TypeError) as e:
+            logger.warning("Could not cache SHAP explainer at %s: %s", path, e)
+
+    # ---------------------------------------------------------
+    # INFERENCE BACKEND
+    # ---------------------------------------------------------
+    def _init_backend(self) -> None:
+        """
+        Create the configured inference backend and verify it against the
+        native model on real cohort rows. Falls back to the native backend
+        if the runtime is unavailable or disagrees.
+        """
+        native = NativeBackend(self.model, self.threading)
+        if self.backend_name == "native":
+            self.backend = native
+            return
+
+        try:
+            backend = create_backend(
+                self.backend_name,
+                self.model,
+                onnx_path=BASE_DIR / settings.ONNX_MODEL_PATH,
+                policy=self.threading,
+            )
+            deviation = check_parity(
+                backend, native, self._parity_rows(), settings.BACKEND_PARITY_TOLERANCE
+            )
+        except Exception as e:
+            logger.error(
+                "Inference backend '%s' unavailable (%s). Using native backend.",
+                self.backend_name, e,
+            )
+            self.backend = native
+            return
+
+        self.backend = backend
+        logger.info(
+            "Using inference backend '%s' (parity deviation %.2e)", backend.name, deviation
+        )
+
+    def _parity_rows(self, max_rows: int = 2000) -> pd.DataFrame:
+        """
+        Prepared rows for the backend parity check: a sample of the cohort
+        (data/dataset.csv), whose values sit on and around the learned split
+        thresholds, plus the synthetic background rows.
+        """
+        rows = [self._background_data]
+        cohort_path = BASE_DIR / "data/dataset.csv"
+        if cohort_path.exists():
+            cohort = pd.read_csv(cohort_path)
+            cohort.columns = cohort.columns.str.lower()
+            if set(self.expected_features) <= set(cohort.columns):
+                cohort = cohort.sample(min(len(cohort), max_rows), random_state=0)
+                rows.insert(0, self._preprocess(cohort))
+        return pd.DataFrame(np.vstack(rows), columns=self.model_features)
+
+    # ---------------------------------------------------------
+    # PREDICTION INTERVALS
+    # ---------------------------------------------------------
+    def _init_intervals(self) -> None:
+        """
+        Use the conformal calibration written for this model version if there
+        is one; forests can fall back to per-tree quantiles without it.
+        """
+        calibration = IntervalCalibration.load(BASE_DIR / settings.INTERVAL_CALIBRATION_PATH)
+        if calibration is not None and calibration.model_version != self.model_version:
+            logger.warning(
+                "Interval calibration was fitted for model %s, not %s; ignoring it.",
+                calibration.model_version, self.model_version,
+            )
+            calibration = None
+
+        members = ForestMembers.from_model(self.model, self.threading)
+        if calibration is None and members is None:
+            logger.info("No interval calibration for %s; prediction intervals disabled.", type(self.model).__name__)
+            return
+
+        self.intervals = IntervalEstimator(members, calibration, alpha=settings.INTERVAL_ALPHA)
+        logger.info(
+            "Prediction intervals enabled: %.0f%% %s",
+            100 * self.intervals.coverage, self.intervals.method,
+        )
+
+    # ---------------------------------------------------------
+    # DRIFT MONITORING
+    # ---------------------------------------------------------
+    def _init_monitor(self) -> None:
+        """Attach a live drift sketch if the training run wrote a reference."""
+        reference = Sketch.load(BASE_DIR / settings.DRIFT_REFERENCE_PATH)
+        if reference is None:
+            logger.info("No drift reference at %s; drift monitoring disabled.", settings.DRIFT_REFERENCE_PATH)
+            return
+        if reference.columns != self.expected_features + ["prediction"]:
+            logger.warning("Drift reference columns %s do not match the model.", reference.columns)
+            return
+
+        self.monitor = DriftMonitor(
+            reference,
+            BASE_DIR / settings.DRIFT_SKETCH_DIR,
+            settings.DRIFT_FLUSH_INTERVAL,
+            retention_days=settings.DRIFT_RETENTION_DAYS,
+        )
+        logger.info("Drift monitoring enabled (sketches in %s)", settings.DRIFT_SKETCH_DIR)
+
+    def observe_drift(self, raw: np.ndarray, predictions: np.ndarray) -> None:
+        """
+        Add raw rows and their predictions to the live drift sketch. Inputs
+        are imputed first, like the training reference, so a rise in missing
+        values shows up as extra mass at the imputed value.
+        """
+        if self.monitor is None:
+            return
+        imputed = self.features.unscaled(np.asarray(raw, dtype=np.float64))[:, :len(self.expected_features)]
+        self.monitor.observe(imputed, predictions)
+
+    # ---------------------------------------------------------
+    # SHADOW SCORING
+    # ---------------------------------------------------------
+    def _init_shadow(self) -> None:
+        """Load challenger bundles; their paired predictions are logged per champion version."""
+        names = None
+        if settings.SHADOW_CHALLENGERS != "all":
+            names = [n.strip() for n in settings.SHADOW_CHALLENGERS.split(",") if n.strip()]
+
+        challengers = load_challengers(BASE_DIR / settings.SHADOW_CHALLENGER_DIR, names)
+        if not challengers:
+            logger.warning("Shadow scoring requested but no challengers were loaded.")
+            return
+
+        self.shadow = ShadowScorer(
+            challengers,
+            BASE_DIR / settings.SHADOW_LOG_DIR / self.model_version,
+            max_pending=settings.SHADOW_MAX_PENDING,
+        )
+        logger.info("Shadow scoring enabled for challengers: %s", list(challengers))
+
+    # ---------------------------------------------------------
+    # WARM-UP AND READINESS
+    # ---------------------------------------------------------
+    def warm_up(self, batch_rows: int = 64) -> Dict[str, float]:
+        """
+        Run the schema's default patient through every request path once
+        (preparation, prediction, SHAP, batch scoring, intervals, preview),
+        so one-off costs such as lazy imports, first-call allocations and
+        thread-pool start-up are paid before the first real request. Drift
+        monitoring and shadow scoring are bypassed. Marks the service ready.
+        """
+        timings: Dict[str, float] = {}
+
+        def timed(name: str, step):
+            start = time.perf_counter()
+            out = step()
+            timings[name] = (time.perf_counter() - start) * 1000.0
+            return out
+
+        row = {field.name: field.default for field in self.schema.fields}
+        batch = pd.DataFrame(self._background_data[:batch_rows], columns=self.model_features)
+
+        df = timed("prepare", lambda: self.prepare_input(row))
+        prediction = timed("predict", lambda: self.predict(df))
+        timed("explain", lambda: self.explain(df))
+        timed("predict_batch", lambda: self.predict_batch(batch))
+        if self.intervals is not None:
+            timed("interval", lambda: self.predict_interval(df, np.array([prediction])))
+        if self.student is not None:
+            timed("preview", lambda: self.preview(df))
+
+        self.warmup_ms = timings
+        logger.info(
+            "Warm-up finished in %.0f ms: %s",
+            sum(timings.values()), ", ".join(f"{k}={v:.1f}ms" for k, v in timings.items()),
+        )
+        self._mark_ready()
+        return timings
+
+    def _mark_ready(self) -> None:
+        """Set the ready flag and, if configured, write the readiness file for external probes."""
+        self.ready.set()
+        if not settings.READINESS_FILE:
+            return
+
+        path = BASE_DIR / settings.READINESS_FILE
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({
+                "ready": True,
+                "pid": os.getpid(),
+                "model_version": self.model_version,
+                "ts": time.time(),
+                "warmup_ms": self.warmup_ms,
+            }, indent=2))
+            tmp.replace(path)
+        except OSError as e:
+            logger.error("Failed to write readiness file %s: %s", path, e)
 
     # ---------------------------------------------------------
     # INPUT PREPARATION
     # ---------------------------------------------------------
+    @traced()
     def prepare_input(self, input_dict: Dict[str, Any]) -> pd.DataFrame:
         print("INPUT RECEIVED:", input_dict)
         print("EXPECTED FEATURES:", self.expected_features)
@@ -194,29 +538,190 @@ class PredictionService:
         # Ensure correct feature order
         df = df[self.expected_features]
 
-        # Convert to numeric
-        df = df.apply(pd.to_numeric, errors="coerce")
+        with span("validate"):
+            report = self.schema.validate(df)
+        if not report.row_valid[0]:
+            raise ValueError(f"Invalid input: {report.row_messages(0)}")
+
+        with span("preprocess", features=len(self.model_features)):
+            return pd.DataFrame(self._preprocess(df), columns=self.model_features)
+
+    def validate(self, frame: pd.DataFrame) -> ValidationReport:
+        """
+        Vectorized schema check for a raw batch. Returns per-row, per-field
+        error masks instead of raising, so callers can drop or report bad
+        rows before prepare_batch().
+        """
+        return self.schema.validate(frame)
+
+    @traced()
+    def prepare_batch(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Vectorized counterpart of prepare_input for many rows at once."""
+        missing = [f for f in self.expected_features if f not in frame.columns]
+        if missing:
+            raise ValueError(f"Missing required features: {missing}")
+
+        logger.info("Preparing batch of %d rows", len(frame))
+        return pd.DataFrame(self._preprocess(frame), columns=self.model_features)
+
+    def _preprocess(self, frame: pd.DataFrame, dtype: Optional[np.dtype] = None) -> np.ndarray:
+        """
+        Convert raw rows, then impute, add derived features and scale them
+        into a matrix of ``dtype`` (the service dtype by default).
 
-        # Impute missing values
-        df_imputed = self.imputer.transform(df)
+        The compiled feature pipeline always runs in float64, one block at a
+        time, and only the result is stored in the target dtype. Tree models
+        cast their input to float32 anyway, so float32 mode yields the same
+        splits as float64 while halving the size of the prepared matrix.
+        """
+        dtype = np.dtype(dtype or self.dtype)
+        raw = frame[self.expected_features].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
 
-        # Scale values
-        df_scaled = self.scaler.transform(df_imputed)
+        out = np.empty((len(raw), len(self.model_features)), dtype=dtype)
+        for start in range(0, len(raw), PREPROCESS_CHUNK_ROWS):
+            block = raw[start:start + PREPROCESS_CHUNK_ROWS]
+            out[start:start + len(block)] = self.features.transform(block)
 
-        return pd.DataFrame(df_scaled, columns=self.expected_features)
+        return out
 
     # ---------------------------------------------------------
     # PREDICTION
     # ---------------------------------------------------------
+    @traced()
     def predict(self, input_df: pd.DataFrame) -> float:
         logger.info("Running prediction on input shape %s", input_df.shape)
-        pred = float(self.model.predict(input_df)[0])
+        pred = float(self.backend.predict(input_df)[0])
         logger.info("Prediction result: %f", pred)
         return pred
 
+    def preview(self, input_df: pd.DataFrame) -> float:
+        """
+        Low-latency estimate for interactive use. Uses the distilled student
+        in fast mode and the full model otherwise; final results should
+        always come from predict().
+        """
+        if self.student is None:
+            return self.predict(input_df)
+
+        return float(self.preview_batch(input_df)[0])
+
+    def preview_batch(self, input_df: pd.DataFrame) -> np.ndarray:
+        """Batched preview(): student predictions in fast mode, the backend otherwise."""
+        if self.student is None:
+            return self.backend.predict(input_df)
+        return np.asarray(self.student.predict(input_df.to_numpy())).reshape(-1)
+
+    @traced()
+    def predict_batch(self, input_df: pd.DataFrame) -> np.ndarray:
+        """Predictions for a prepared batch, in the service dtype."""
+        logger.info("Running batch prediction on input shape %s", input_df.shape)
+        return self.backend.predict(input_df).astype(self.dtype, copy=False)
+
+    @traced()
+    def predict_interval(
+        self, input_df: pd.DataFrame, predictions: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Lower and upper interval bounds for a prepared batch and its predictions."""
+        if self.intervals is None:
+            raise RuntimeError("Prediction intervals are not available for this model.")
+        if predictions is None:
+            predictions = self.backend.predict(input_df)
+
+        _, lower, upper = self.intervals.predict(input_df.to_numpy(), predictions)
+        return lower.astype(self.dtype, copy=False), upper.astype(self.dtype, copy=False)
+
+    @traced()
+    def predict_batch_with_intervals(self, input_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Predictions with interval bounds for a prepared batch. For forests the
+        predictions come from the same per-tree pass as the bounds, so the
+        interval costs little more than the prediction itself.
+        """
+        if self.intervals is None:
+            raise RuntimeError("Prediction intervals are not available for this model.")
+
+        logger.info("Running batch prediction with intervals on input shape %s", input_df.shape)
+        predictions = None if self.intervals.members is not None else self.backend.predict(input_df)
+        predictions, lower, upper = self.intervals.predict(input_df.to_numpy(), predictions)
+        return pd.DataFrame(
+            {"prediction": predictions, "lower": lower, "upper": upper},
+            index=input_df.index,
+            dtype=self.dtype,
+        )
+
+    @traced()
+    def sensitivity_grid(
+        self,
+        input_dict: Dict[str, Any],
+        features: Sequence[str],
+        n_points: int = 100,
+    ) -> Dict[str, Any]:
+        """
+        What-if analysis around one input: sweep one biomarker (ICE curve)
+        or two (response surface) across their schema range, keeping the
+        other values fixed, and score the whole grid in one batched predict.
+        """
+        if not 1 <= len(features) <= 2:
+            raise ValueError("Sensitivity analysis supports one or two features.")
+
+        base = pd.DataFrame([input_dict])[self.expected_features]
+        report = self.schema.validate(base)
+        if not report.row_valid[0]:
+            raise ValueError(f"Invalid input: {report.row_messages(0)}")
+
+        axes = [
+            np.linspace(self.schema[f].min_value, self.schema[f].max_value, n_points)
+            for f in features
+        ]
+        mesh = np.meshgrid(*axes, indexing="ij")
+        n_rows = mesh[0].size
+
+        start = time.perf_counter()
+        grid = pd.DataFrame(
+            np.repeat(base.to_numpy(dtype=np.float64), n_rows, axis=0),
+            columns=self.expected_features,
+        )
+        for feature, values in zip(features, mesh):
+            grid[feature] = values.ravel()
+
+        prepared = pd.DataFrame(self._preprocess(grid), columns=self.model_features)
+        predictions = self.backend.predict(prepared).reshape(mesh[0].shape)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+        logger.info("Scored %d-point sensitivity grid in %.1f ms", n_rows, elapsed_ms)
+        return {
+            "features": list(features),
+            "axes": axes,
+            "predictions": predictions,
+            "n_rows": n_rows,
+            "elapsed_ms": elapsed_ms,
+        }
+
+    def dtype_accuracy_report(self, frame: pd.DataFrame) -> Dict[str, float]:
+        """
+        Compare predictions in the service dtype against the float64
+        reference pipeline on raw rows ``frame`` (e.g. data/dataset.csv).
+        """
+        X_ref = pd.DataFrame(self._preprocess(frame, np.float64), columns=self.model_features)
+        X = pd.DataFrame(self._preprocess(frame), columns=self.model_features)
+
+        reference = self.backend.predict(X_ref)
+        compact = self.backend.predict(X)
+        diff = np.abs(reference - compact)
+
+        return {
+            "dtype": self.dtype.name,
+            "rows": int(len(frame)),
+            "max_abs_diff": float(diff.max()) if len(diff) else 0.0,
+            "mean_abs_diff": float(diff.mean()) if len(diff) else 0.0,
+            "input_bytes_float64": int(X_ref.memory_usage(index=False).sum()),
+            "input_bytes": int(X.memory_usage(index=False).sum()),
+        }
+
     # ---------------------------------------------------------
     # SHAP EXPLANATION
     # ---------------------------------------------------------
+    @traced()
     def explain(self, input_df: pd.DataFrame):
         if self.explainer is None:
             raise RuntimeError("SHAP explainer is not initialized.")
@@ -231,18 +736,42 @@ class PredictionService:
     # ---------------------------------------------------------
     # FULL PIPELINE
     # ---------------------------------------------------------
+    @traced()
     def run(self, input_dict: Dict[str, Any]) -> Dict[str, Any]:
         logger.info("Running full prediction pipeline.")
         df = self.prepare_input(input_dict)
         prediction = self.predict(df)
         shap_explanation = self.explain(df)
 
+        interval = None
+        if self.intervals is not None:
+            lower, upper = self.predict_interval(df, np.array([prediction]))
+            interval = (float(lower[0]), float(upper[0]))
+
+        raw = np.asarray([[input_dict[f] for f in self.expected_features]], dtype=np.float64)
+        if self.monitor is not None:
+            with span("drift.observe"):
+                self.observe_drift(raw, np.array([prediction]))
+
+        # Challengers score the same prepared row in the background
+        if self.shadow is not None:
+            with span("shadow.submit"):
+                self.shadow.submit(df.to_numpy(), np.array([prediction]))
+
         return {
             "input_df": df,
             "prediction": prediction,
-            "shap_values": shap_explanation.values,  # array (1, n_features)
+            "shap_values": np.asarray(shap_explanation.values, dtype=self.dtype),  # array (1, n_features)
             "base_value": float(shap_explanation.base_values[0]),  # <-- THIS MUST EXIST
-            "feature_names": self.expected_features,
+            "feature_names": self.model_features,
+            # Unscaled values of the model features (raw inputs plus derived), for display
+            "feature_values": self.features.unscaled(raw),
+            # Only set by the budgeted Kernel SHAP explainer; exact explainers leave them None
+            "shap_std_errors": getattr(shap_explanation, "std_errors", None),
+            "shap_converged": bool(np.all(getattr(shap_explanation, "converged", True))),
+            # (lower, upper) at interval_coverage, or None without calibration or a forest
+            "interval": interval,
+            "interval_coverage": self.intervals.coverage if self.intervals is not None else None,
         }
 
 
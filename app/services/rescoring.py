@@ -0,0 +1,159 @@
+# rescoring.py
+# Incremental re-scoring of stored prediction history after model updates
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.history_store import HistoryStore
+from app.services.prediction_service import BASE_DIR, PredictionService
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------
+# Data structures
+# ---------------------------------------------------------
+@dataclass
+class RescoreProgress:
+    model_version: str
+    total: int
+    done: int = 0
+    last_id: int = 0  # last record written in this run
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def rows_per_sec(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def fraction(self) -> float:
+        return self.done / self.total if self.total else 1.0
+
+
+# ---------------------------------------------------------
+# Re-scoring job
+# ---------------------------------------------------------
+class RescoringJob:
+    """
+    Re-scores only the history records that are stale for the live model:
+    scored by a different model version, or flagged after an input
+    correction. Stale records are read in id order (keyset pagination),
+    scored as vectorized chunks on a thread pool, and written back chunk by
+    chunk in order. Written records stop being stale, so an interrupted
+    job simply continues with the rest on its next run, and records whose
+    inputs are corrected later are picked up whatever their id.
+    """
+
+    def __init__(
+        self,
+        store: HistoryStore,
+        service: PredictionService,
+        chunk_size: int = 5000,
+        workers: int = 4,
+        with_shap: bool = True,
+    ):
+        self.store = store
+        self.service = service
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.with_shap = with_shap
+
+    # ---------------------------------------------------------
+    # SCORING
+    # ---------------------------------------------------------
+    def _score(self, inputs: np.ndarray):
+        frame = pd.DataFrame(inputs, columns=self.store.feature_names)
+        prepared = self.service.prepare_batch(frame)
+        predictions = self.service.predict_batch(prepared)
+
+        shap_values = None
+        if self.with_shap:
+            shap_values = np.asarray(self.service.explain(prepared).values)
+        return predictions, shap_values
+
+    def run(self, on_progress: Optional[Callable[[RescoreProgress], None]] = None) -> RescoreProgress:
+        version = self.service.model_version
+        progress = RescoreProgress(model_version=version, total=self.store.count_stale(version))
+        logger.info("Re-scoring %d stale records for model %s", progress.total, version)
+
+        in_flight: Deque[Tuple[np.ndarray, np.ndarray, Future]] = deque()
+        cursor = 0
+        exhausted = False
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="rescore") as pool:
+            while not exhausted or in_flight:
+                # Keep the pool busy without reading the whole history ahead
+                while not exhausted and len(in_flight) < 2 * self.workers:
+                    ids, inputs = self.store.stale_chunk(version, cursor, self.chunk_size)
+                    if len(ids) == 0:
+                        exhausted = True
+                        break
+                    cursor = int(ids[-1])
+                    in_flight.append((ids, inputs, pool.submit(self._score, inputs)))
+
+                if not in_flight:
+                    break
+
+                # Write back in id order, so an interruption leaves a stale suffix only
+                ids, inputs, future = in_flight.popleft()
+                predictions, shap_values = future.result()
+                written = self.store.apply_rescore(ids, inputs, predictions, version, shap_values)
+                if written < len(ids):
+                    logger.info(
+                        "%d records were corrected while being scored; left for the next run",
+                        len(ids) - written,
+                    )
+
+                progress.done += written
+                progress.last_id = int(ids[-1])
+
+                if on_progress is not None:
+                    on_progress(progress)
+
+        logger.info(
+            "Re-scoring complete: %d records at %.0f rows/s", progress.done, progress.rows_per_sec
+        )
+        return progress
+
+
+# ---------------------------------------------------------
+# Command line
+# ---------------------------------------------------------
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-score stale prediction history.")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--no-shap", action="store_true", help="Only update predictions.")
+    args = parser.parse_args()
+
+    service = PredictionService("models/model.pkl")
+    store = HistoryStore(
+        BASE_DIR / settings.HISTORY_DB_PATH, service.expected_features, shap_names=service.model_features
+    )
+
+    job = RescoringJob(
+        store,
+        service,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        with_shap=not args.no_shap,
+    )
+    job.run(lambda p: logger.info(
+        "Progress: %d/%d (%.0f%%, %.0f rows/s)", p.done, p.total, 100 * p.fraction, p.rows_per_sec
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# shadow.py
+# Champion/challenger shadow scoring off the request path for ClarityPredict 2.0
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.services.threading_policy import single_threaded
+
+logger = logging.getLogger(__name__)
+
+# One fixed-size record per scored row, appended to <log_dir>/<challenger>.bin
+LOG_DTYPE = np.dtype([
+    ("ts", "<f8"),
+    ("champion", "<f4"),
+    ("challenger", "<f4"),
+    ("latency_ms", "<f4"),
+])
+
+
+# ---------------------------------------------------------
+# Challenger loading
+# ---------------------------------------------------------
+def load_challengers(directory: Path, names: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Load ``<directory>/<name>/model.pkl`` bundles (all of them if ``names``
+    is None). Challengers are forced to a single thread so background
+    scoring cannot compete with the champion for every core.
+    """
+    directory = Path(directory)
+    if names is None:
+        names = sorted(p.name for p in directory.glob("*") if (p / "model.pkl").exists())
+
+    challengers = {}
+    for name in names:
+        path = directory / name / "model.pkl"
+        if not path.exists():
+            logger.warning("Challenger bundle not found: %s", path)
+            continue
+        model = single_threaded(joblib.load(path))
+        challengers[name] = model
+        logger.info("Challenger loaded: %s (%s)", name, type(model).__name__)
+    return challengers
+
+
+# ---------------------------------------------------------
+# Shadow scorer
+# ---------------------------------------------------------
+class ShadowScorer:
+    """
+    Scores live requests with challenger models in a bounded background
+    executor. ``submit`` never blocks: when ``max_pending`` requests are
+    already queued or running, the new one is shed (and counted), so
+    overload drops challenger work before it can delay the champion.
+    """
+
+    def __init__(
+        self,
+        challengers: Dict[str, Any],
+        log_dir: Path,
+        max_pending: int = 64,
+        workers: int = 1,
+    ):
+        self.challengers = challengers
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shadow")
+        self._write_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self.counters: Counter = Counter()
+        atexit.register(self.close)
+
+    def _count(self, key: str) -> None:
+        with self._counter_lock:
+            self.counters[key] += 1
+
+    def submit(self, X: np.ndarray, champion: np.ndarray) -> bool:
+        """Queue prepared rows and the champion's predictions; False if shed."""
+        if not self._slots.acquire(blocking=False):
+            self._count("shed")
+            return False
+
+        try:
+            self._pool.submit(self._score, np.array(X, copy=True), np.asarray(champion), time.time())
+        except RuntimeError:  # executor already shut down
+            self._slots.release()
+            return False
+
+        self._count("submitted")
+        return True
+
+    def _score(self, X: np.ndarray, champion: np.ndarray, ts: float) -> None:
+        try:
+            for name, model in self.challengers.items():
+                start = time.perf_counter()
+                predictions = np.asarray(model.predict(X)).reshape(-1)
+                latency_ms = (time.perf_counter() - start) * 1000.0
+
+                records = np.empty(len(predictions), dtype=LOG_DTYPE)
+                records["ts"] = ts
+                records["champion"] = champion
+                records["challenger"] = predictions
+                records["latency_ms"] = latency_ms
+                self._append(name, records)
+            self._count("completed")
+        except Exception:
+            logger.exception("Shadow scoring failed")
+            self._count("failed")
+        finally:
+            self._slots.release()
+
+    def _append(self, name: str, records: np.ndarray) -> None:
+        with self._write_lock, open(self.log_dir / f"{name}.bin", "ab") as fh:
+            fh.write(records.tobytes())
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
+# ---------------------------------------------------------
+# Aggregation
+# ---------------------------------------------------------
+def read_log(path: Path) -> np.ndarray:
+    """Records of one challenger log; a partially written last record is ignored."""
+    data = Path(path).read_bytes()
+    usable = len(data) - len(data) % LOG_DTYPE.itemsize
+    return np.frombuffer(data[:usable], dtype=LOG_DTYPE)
+
+
+def shadow_report(log_dir: Path, tolerance: float = 0.05) -> pd.DataFrame:
+    """
+    Agreement and deviation of every logged challenger against the
+    champion. ``agreement`` is the share of rows whose predictions differ
+    by at most ``tolerance``.
+    """
+    rows = []
+    for path in sorted(Path(log_dir).glob("*.bin")):
+        records = read_log(path)
+        if len(records) == 0:
+            continue
+
+        champion = records["champion"].astype(np.float64)
+        challenger = records["challenger"].astype(np.float64)
+        diff = challenger - champion
+        corr = np.corrcoef(champion, challenger)[0, 1] if len(records) > 1 else np.nan
+
+        rows.append({
+            "challenger": path.stem,
+            "n": len(records),
+            "mean_diff": diff.mean(),
+            "mae": np.abs(diff).mean(),
+            "rmse": np.sqrt((diff ** 2).mean()),
+            "max_abs_diff": np.abs(diff).max(),
+            "agreement": (np.abs(diff) <= tolerance).mean(),
+            "correlation": corr,
+            "p95_latency_ms": np.percentile(records["latency_ms"], 95),
+            "last_seen": pd.to_datetime(records["ts"].max(), unit="s"),
+        })
+
+    return pd.DataFrame(rows, columns=[
+        "challenger", "n", "mean_diff", "mae", "rmse", "max_abs_diff",
+        "agreement", "correlation", "p95_latency_ms", "last_seen",
+    ])
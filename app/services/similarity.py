@@ -0,0 +1,240 @@
+# similarity.py
+# Nearest-neighbor retrieval of similar cohort patients for ClarityPredict 2.0
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+
+logger = logging.getLogger(__name__)
+
+TransformFn = Callable[[pd.DataFrame], np.ndarray]
+
+
+# ---------------------------------------------------------
+# Index
+# ---------------------------------------------------------
+class SimilarityIndex:
+    """
+    KD-tree over cohort rows in the model's imputed/scaled feature space.
+
+    Rows added after the tree was built go to an append-only delta buffer
+    that is scanned by brute force and merged with the tree results. Once
+    the buffer exceeds ``max_delta_fraction`` of the indexed rows (or
+    ``max_delta_rows``), the tree is rebuilt over everything, so queries
+    stay logarithmic without a rebuild per added row.
+    """
+
+    def __init__(
+        self,
+        feature_names: Sequence[str],
+        preprocessor_version: str,
+        leaf_size: int = 40,
+        max_delta_fraction: float = 0.05,
+        max_delta_rows: int = 50_000,
+    ):
+        self.feature_names = list(feature_names)
+        self.preprocessor_version = preprocessor_version
+        self.leaf_size = leaf_size
+        self.max_delta_fraction = max_delta_fraction
+        self.max_delta_rows = max_delta_rows
+
+        n_features = len(self.feature_names)
+        self._tree: Optional[KDTree] = None
+        self._raw = np.empty((0, n_features))
+        self._outcomes = np.empty(0)
+
+        self._delta_points: List[np.ndarray] = []
+        self._delta_raw: List[np.ndarray] = []
+        self._delta_outcomes: List[np.ndarray] = []
+        self._delta_cache: Optional[tuple] = None
+
+    # ---------------------------------------------------------
+    # SIZE
+    # ---------------------------------------------------------
+    @property
+    def n_indexed(self) -> int:
+        return len(self._raw)
+
+    @property
+    def n_delta(self) -> int:
+        return sum(len(p) for p in self._delta_points)
+
+    @property
+    def n_rows(self) -> int:
+        return self.n_indexed + self.n_delta
+
+    # ---------------------------------------------------------
+    # UPDATES
+    # ---------------------------------------------------------
+    def add(self, points: np.ndarray, raw: np.ndarray, outcomes: np.ndarray) -> None:
+        """Append rows: ``points`` in scaled space, ``raw`` as entered, and their outcomes."""
+        points = np.asarray(points, dtype=np.float64)
+        if len(points) == 0:
+            return
+
+        self._delta_points.append(points)
+        self._delta_raw.append(np.asarray(raw, dtype=np.float64))
+        self._delta_outcomes.append(np.asarray(outcomes, dtype=np.float64))
+        self._delta_cache = None
+
+        limit = min(self.max_delta_rows, self.max_delta_fraction * self.n_indexed)
+        if self._tree is None or self.n_delta > limit:
+            self.rebuild()
+
+    def rebuild(self) -> None:
+        """Fold the delta buffer into a freshly built tree."""
+        points = np.vstack([self._indexed_points()] + self._delta_points)
+        self._raw = np.vstack([self._raw] + self._delta_raw)
+        self._outcomes = np.concatenate([self._outcomes] + self._delta_outcomes)
+
+        self._tree = KDTree(points, leaf_size=self.leaf_size)
+        self._delta_points, self._delta_raw, self._delta_outcomes = [], [], []
+        self._delta_cache = None
+        logger.info("Similarity index rebuilt over %d rows", self.n_indexed)
+
+    def _delta(self):
+        """Delta buffer stacked into (points, raw, outcomes), cached until the next add."""
+        if self._delta_cache is None:
+            self._delta_cache = (
+                np.vstack(self._delta_points),
+                np.vstack(self._delta_raw),
+                np.concatenate(self._delta_outcomes),
+            )
+        return self._delta_cache
+
+    def _indexed_points(self) -> np.ndarray:
+        # The scaled space may have more columns than the raw features (derived features)
+        if self._tree is None:
+            width = self._delta_points[0].shape[1] if self._delta_points else len(self.feature_names)
+            return np.empty((0, width))
+        return np.asarray(self._tree.get_arrays()[0])
+
+    # ---------------------------------------------------------
+    # QUERIES
+    # ---------------------------------------------------------
+    def query(self, point: np.ndarray, k: int = 5) -> pd.DataFrame:
+        """
+        The ``k`` nearest cohort rows to one scaled input, closest first,
+        with their raw biomarker values, outcome and Euclidean distance in
+        the scaled space.
+        """
+        point = np.asarray(point, dtype=np.float64).reshape(1, -1)
+        k = min(k, self.n_rows)
+        if k == 0:
+            return pd.DataFrame(columns=["row", "distance"] + self.feature_names + ["outcome"])
+
+        distances = np.empty(0)
+        rows = np.empty(0, dtype=np.int64)
+        if self._tree is not None:
+            distances, rows = self._tree.query(point, k=min(k, self.n_indexed))
+            distances, rows = distances[0], rows[0]
+
+        if self._delta_points:
+            delta_points = self._delta()[0]
+            delta = np.sqrt(((delta_points - point) ** 2).sum(axis=1))
+            nearest = np.argpartition(delta, min(k, len(delta)) - 1)[:k]
+            distances = np.concatenate([distances, delta[nearest]])
+            rows = np.concatenate([rows, nearest + self.n_indexed])
+
+        order = np.argsort(distances, kind="stable")[:k]
+        rows, distances = rows[order], distances[order]
+
+        raw = np.empty((len(rows), len(self.feature_names)))
+        outcomes = np.empty(len(rows))
+        in_tree = rows < self.n_indexed
+        raw[in_tree] = self._raw[rows[in_tree]]
+        outcomes[in_tree] = self._outcomes[rows[in_tree]]
+        if not in_tree.all():
+            _, delta_raw, delta_outcomes = self._delta()
+            raw[~in_tree] = delta_raw[rows[~in_tree] - self.n_indexed]
+            outcomes[~in_tree] = delta_outcomes[rows[~in_tree] - self.n_indexed]
+
+        result = pd.DataFrame({"row": rows, "distance": distances})
+        result[self.feature_names] = raw
+        result["outcome"] = outcomes
+        return result
+
+    # ---------------------------------------------------------
+    # PERSISTENCE
+    # ---------------------------------------------------------
+    def save(self, path: Path) -> None:
+        """Persist the tree and the pending delta rows; the delta is not folded in."""
+        state = {
+            "feature_names": self.feature_names,
+            "preprocessor_version": self.preprocessor_version,
+            "tree": self._tree,
+            "raw": self._raw,
+            "outcomes": self._outcomes,
+            "delta": self._delta() if self._delta_points else None,
+        }
+        joblib.dump(state, path)
+        logger.info("Similarity index (%d rows) saved to %s", self.n_rows, path)
+
+    @classmethod
+    def load(cls, path: Path, preprocessor_version: Optional[str] = None) -> Optional["SimilarityIndex"]:
+        """Stored index, or None if missing or built for other preprocessors."""
+        path = Path(path)
+        if not path.exists():
+            return None
+
+        state = joblib.load(path)
+        if preprocessor_version is not None and state["preprocessor_version"] != preprocessor_version:
+            logger.info("Similarity index at %s is stale for the current preprocessors", path)
+            return None
+
+        index = cls(state["feature_names"], state["preprocessor_version"])
+        index._tree = state["tree"]
+        index._raw = state["raw"]
+        index._outcomes = state["outcomes"]
+        if state["delta"] is not None:
+            points, raw, outcomes = state["delta"]
+            index._delta_points, index._delta_raw, index._delta_outcomes = [points], [raw], [outcomes]
+        return index
+
+
+# ---------------------------------------------------------
+# Build / incremental update
+# ---------------------------------------------------------
+def update_index(
+    path: Path,
+    cohort: pd.DataFrame,
+    outcome: str,
+    feature_names: Sequence[str],
+    transform: TransformFn,
+    preprocessor_version: str,
+) -> SimilarityIndex:
+    """
+    Bring the stored index in line with ``cohort``. The cohort is treated as
+    append-only (like the incremental training data): rows beyond those
+    already indexed are added, and the index is only rebuilt from scratch
+    when the preprocessors changed or the cohort shrank.
+    """
+    feature_names = list(feature_names)
+    index = SimilarityIndex.load(path, preprocessor_version)
+    if index is not None and (index.feature_names != feature_names or index.n_rows > len(cohort)):
+        index = None
+
+    if index is None:
+        index = SimilarityIndex(feature_names, preprocessor_version)
+        new_rows = cohort
+    else:
+        new_rows = cohort.iloc[index.n_rows:]
+
+    if new_rows.empty:
+        return index
+
+    index.add(
+        transform(new_rows[feature_names]),
+        new_rows[feature_names].to_numpy(dtype=np.float64),
+        new_rows[outcome].to_numpy(dtype=np.float64),
+    )
+    index.save(path)
+    logger.info("Similarity index updated with %d rows", len(new_rows))
+    return index
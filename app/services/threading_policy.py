@@ -0,0 +1,109 @@
+# threading_policy.py
+# Per-call thread budgets for model inference in ClarityPredict 2.0
+
+from __future__ import annotations
+
+import copy
+import logging
+import os
+from typing import Any, Callable
+
+import numpy as np
+from joblib import parallel_config
+from threadpoolctl import threadpool_limits
+
+logger = logging.getLogger(__name__)
+
+# Environment variables read by BLAS/OpenMP runtimes that are loaded after start-up
+_NATIVE_THREAD_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def default_batch_threads(batch_workers: int = 1) -> int:
+    """Cores per concurrently running batch job, so parallel jobs together fill the machine once."""
+    return max((os.cpu_count() or 1) // max(batch_workers, 1), 1)
+
+
+def single_threaded(model: Any) -> Any:
+    """Pin a model loaded from disk to one thread, e.g. a student or challenger pickled with ``n_jobs=-1``."""
+    if hasattr(model, "get_booster"):
+        model.set_params(n_jobs=1)
+    elif hasattr(model, "n_jobs"):
+        model.n_jobs = 1
+    return model
+
+
+# ---------------------------------------------------------
+# Policy
+# ---------------------------------------------------------
+class ThreadingPolicy:
+    """
+    Thread budget per call type, instead of the ``n_jobs`` pickled with
+    the model.
+
+    Inputs of up to ``small_rows`` rows are scored single-threaded on the
+    calling session's thread: dispatching a one-row forest prediction to a
+    joblib pool costs more than the trees themselves, and with several
+    sessions scoring at once the pools only compete for the same cores.
+    Larger batches get ``batch_threads`` workers. BLAS and OpenMP pools
+    are capped process-wide at ``native_threads``, since parallelism
+    comes from the sessions and batch workers rather than from inside
+    one matrix operation.
+    """
+
+    def __init__(self, small_rows: int = 256, batch_threads: int = 1, native_threads: int = 1):
+        self.small_rows = small_rows
+        self.batch_threads = max(batch_threads, 1)
+        self.native_threads = max(native_threads, 1)
+
+    def threads_for(self, n_rows: int) -> int:
+        if n_rows <= self.small_rows:
+            return 1
+        return min(self.batch_threads, -(-n_rows // self.small_rows))
+
+    def apply_process_limits(self) -> None:
+        """Cap the BLAS/OpenMP pools of loaded libraries, and of those loaded later via the environment."""
+        for var in _NATIVE_THREAD_VARS:
+            os.environ.setdefault(var, str(self.native_threads))
+        threadpool_limits(limits=self.native_threads)
+        logger.info(
+            "Inference threads: 1 up to %d rows, %d for larger batches; BLAS/OpenMP capped at %d",
+            self.small_rows, self.batch_threads, self.native_threads,
+        )
+
+    def predictor(self, model: Any) -> Callable[[Any], np.ndarray]:
+        """
+        ``predict`` for ``model`` that applies the policy per call. Adjusts
+        the model's own thread setting, so call it once per loaded model.
+        """
+        if hasattr(model, "get_booster"):
+            return self._xgboost_predictor(model)
+        if hasattr(model, "n_jobs"):
+            return self._joblib_predictor(model)
+        return model.predict
+
+    def _joblib_predictor(self, model: Any) -> Callable[[Any], np.ndarray]:
+        # With n_jobs=None, sklearn takes the worker count from the calling
+        # thread's joblib configuration, so concurrent calls don't interfere
+        model.n_jobs = None
+
+        def predict(X: Any) -> np.ndarray:
+            threads = self.threads_for(len(X))
+            if threads == 1:
+                return model.predict(X)
+            with parallel_config(backend="threading", n_jobs=threads):
+                return model.predict(X)
+
+        return predict
+
+    def _xgboost_predictor(self, model: Any) -> Callable[[Any], np.ndarray]:
+        # The thread count is a booster parameter shared by all callers, so
+        # the fast path gets its own single-threaded copy of the booster
+        model.set_params(n_jobs=self.batch_threads)
+        single = copy.deepcopy(model)
+        single.set_params(n_jobs=1)
+
+        def predict(X: Any) -> np.ndarray:
+            return (single if self.threads_for(len(X)) == 1 else model).predict(X)
+
+        return predict
+
@@ -0,0 +1,224 @@
+# tracing.py
+# Sampled per-request tracing with Chrome trace-event (Perfetto) export for
+# ClarityPredict 2.0
+
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Project root, which relative trace directories resolve against (tracing is imported by prediction_service)
+_BASE_DIR = Path(__file__).resolve().parents[2]
+
+# Trace of the request running in the current thread (Streamlit runs each script run in its own thread)
+_active: ContextVar[Optional["Trace"]] = ContextVar("clarity_trace", default=None)
+
+
+# ---------------------------------------------------------
+# Trace
+# ---------------------------------------------------------
+class Trace:
+    """
+    Spans recorded during one request, as Chrome trace-event "complete"
+    events. Spans on the same thread nest by their start and duration, so
+    a trace viewer draws them as a flame chart without explicit parents.
+    """
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.pid = os.getpid()
+        self.started = time.time()
+        self.events: List[Dict[str, Any]] = []
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start_ns: int, end_ns: int, args: Optional[Dict[str, Any]] = None) -> None:
+        tid = threading.get_ident()
+        event = {
+            "name": name,
+            "cat": "clarity",
+            "ph": "X",
+            "ts": start_ns / 1000.0,
+            "dur": (end_ns - start_ns) / 1000.0,
+            "pid": self.pid,
+            "tid": tid,
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+            self._threads.setdefault(tid, threading.current_thread().name)
+
+    def to_json(self) -> Dict[str, Any]:
+        """Trace-event JSON object, loadable by ui.perfetto.dev and chrome://tracing."""
+        with self._lock:
+            metadata = [{"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": "ClarityPredict"}}]
+            metadata += [
+                {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+                for tid, name in self._threads.items()
+            ]
+            events = sorted(self.events, key=lambda e: e["ts"])
+        return {
+            "traceEvents": metadata + events,
+            "displayTimeUnit": "ms",
+            "otherData": {"trace": self.name, "id": self.id, "started": self.started},
+        }
+
+
+# ---------------------------------------------------------
+# Spans
+# ---------------------------------------------------------
+class _Span:
+    __slots__ = ("trace", "name", "args", "start")
+
+    def __init__(self, trace: Trace, name: str, args: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.args = args
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.trace.add(self.name, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+    def set(self, **args: Any) -> None:
+        """Attach arguments (shown in the viewer's detail pane) to the span."""
+        self.args.update(args)
+
+
+class _NoSpan:
+    """Shared stand-in when the current request is not traced; costs one context lookup."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+    def set(self, **args: Any) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str, **args: Any):
+    """Context manager timing a block as a span of the active trace; a no-op outside one."""
+    trace = _active.get()
+    if trace is None:
+        return _NO_SPAN
+    return _Span(trace, name, args)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator recording every call of a function as a span (named after its qualname by default)."""
+
+    def decorate(fn: Callable) -> Callable:
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = _active.get()
+            if trace is None:
+                return fn(*args, **kwargs)
+            with _Span(trace, label, {}):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def current_trace() -> Optional[Trace]:
+    return _active.get()
+
+
+# ---------------------------------------------------------
+# Requests
+# ---------------------------------------------------------
+def _sampled(force: bool) -> bool:
+    if force:
+        return True
+    rate = settings.TRACE_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+@contextmanager
+def trace(name: str, force: bool = False, **args: Any) -> Iterator[Optional[Trace]]:
+    """
+    Trace one request: with probability ``TRACE_SAMPLE_RATE`` (or always
+    with ``force``) every span opened inside the block is recorded, and the
+    trace is written to ``TRACE_DIR`` when the block exits. Yields the
+    trace, or None when the request is not sampled. Inside an active trace
+    this is just a nested span.
+    """
+    parent = _active.get()
+    if parent is not None:
+        with _Span(parent, name, args):
+            yield parent
+        return
+
+    if not _sampled(force):
+        yield None
+        return
+
+    current = Trace(name)
+    token = _active.set(current)
+    try:
+        with _Span(current, name, args):
+            yield current
+    finally:
+        _active.reset(token)
+        write_trace(current)
+
+
+def write_trace(trace: Trace, directory: Optional[Path] = None, max_files: Optional[int] = None) -> Optional[Path]:
+    """
+    Write a trace as ``<time>_<name>_<id>.json`` and drop the oldest files
+    beyond ``max_files``. Failures are logged, never raised into the request.
+    """
+    directory = Path(directory) if directory is not None else _BASE_DIR / settings.TRACE_DIR
+    max_files = settings.TRACE_MAX_FILES if max_files is None else max_files
+    label = re.sub(r"[^A-Za-z0-9]+", "-", trace.name).strip("-").lower() or "trace"
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(trace.started))
+    path = directory / f"{stamp}_{label}_{trace.id}.json"
+
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(trace.to_json(), default=str))
+        tmp.replace(path)
+
+        if max_files > 0:
+            files = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+            for old in files[:-max_files]:
+                old.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning("Could not write trace %s: %s", path, e)
+        return None
+
+    logger.info("Trace written to %s", path)
+    return path
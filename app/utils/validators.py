@@ -0,0 +1,177 @@
+# validators.py
+# Declarative biomarker schema and vectorized input validation for ClarityPredict 2.0.
+# The same schema drives the UI input bounds, single-row checks and batch validation.
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# ---------------------------------------------------------
+# Schema definition
+# ---------------------------------------------------------
+@dataclass(frozen=True)
+class BiomarkerField:
+    name: str
+    label: str
+    unit: str
+    min_value: float
+    max_value: float
+    default: float
+    dtype: str = "float"          # "float" | "int"
+    missing: str = "impute"       # "impute" (filled by the model's imputer) | "reject"
+
+
+BIOMARKER_SCHEMA: Sequence[BiomarkerField] = (
+    BiomarkerField("age", "Age", "years", 18, 100, 45, dtype="int"),
+    BiomarkerField("bmi", "BMI", "kg/m²", 10.0, 60.0, 24.5),
+    BiomarkerField("glucose", "Glucose", "mg/dL", 50.0, 300.0, 90.0),
+    BiomarkerField("insulin", "Insulin", "µU/mL", 0.0, 300.0, 80.0),
+    BiomarkerField("hdl", "HDL Cholesterol", "mg/dL", 10.0, 120.0, 55.0),
+    BiomarkerField("ldl", "LDL Cholesterol", "mg/dL", 10.0, 300.0, 120.0),
+)
+
+
+# ---------------------------------------------------------
+# Validation result
+# ---------------------------------------------------------
+@dataclass
+class ValidationReport:
+    """
+    Per-row, per-field boolean masks of shape (n_rows, n_fields).
+    ``missing`` cells are only errors for fields with missing="reject".
+    """
+
+    fields: List[str]
+    missing: np.ndarray
+    non_numeric: np.ndarray
+    out_of_range: np.ndarray
+    not_integer: np.ndarray
+    reject_missing: np.ndarray
+
+    @property
+    def errors(self) -> np.ndarray:
+        return (
+            self.non_numeric
+            | self.out_of_range
+            | self.not_integer
+            | (self.missing & self.reject_missing)
+        )
+
+    @property
+    def row_valid(self) -> np.ndarray:
+        return ~self.errors.any(axis=1)
+
+    @property
+    def n_invalid(self) -> int:
+        return int((~self.row_valid).sum())
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """Error counts per field and error kind."""
+        kinds = {
+            "missing": self.missing & self.reject_missing,
+            "non_numeric": self.non_numeric,
+            "out_of_range": self.out_of_range,
+            "not_integer": self.not_integer,
+        }
+        return {
+            field: {kind: int(mask[:, j].sum()) for kind, mask in kinds.items()}
+            for j, field in enumerate(self.fields)
+        }
+
+    def row_messages(self, row: int) -> List[str]:
+        """Human-readable errors for a single row."""
+        messages = []
+        for j, field in enumerate(self.fields):
+            if self.missing[row, j] and self.reject_missing[j]:
+                messages.append(f"{field}: value is required")
+            if self.non_numeric[row, j]:
+                messages.append(f"{field}: not a number")
+            if self.out_of_range[row, j]:
+                messages.append(f"{field}: outside plausible range")
+            if self.not_integer[row, j]:
+                messages.append(f"{field}: must be a whole number")
+        return messages
+
+
+# ---------------------------------------------------------
+# Compiled schema
+# ---------------------------------------------------------
+class CompiledSchema:
+    """
+    Schema compiled into column-aligned NumPy arrays, so a batch of any
+    size is validated with a handful of vectorized comparisons instead of
+    per-row Python checks.
+    """
+
+    def __init__(self, fields: Iterable[BiomarkerField]):
+        self.fields = list(fields)
+        self.names = [f.name for f in self.fields]
+        self.lower = np.array([f.min_value for f in self.fields], dtype=np.float64)
+        self.upper = np.array([f.max_value for f in self.fields], dtype=np.float64)
+        self.is_int = np.array([f.dtype == "int" for f in self.fields])
+        self.reject_missing = np.array([f.missing == "reject" for f in self.fields])
+        self._by_name = {f.name: f for f in self.fields}
+
+    def __getitem__(self, name: str) -> BiomarkerField:
+        return self._by_name[name]
+
+    def subset(self, names: Sequence[str]) -> "CompiledSchema":
+        """Schema restricted to (and ordered like) ``names``; unknown names are skipped."""
+        return CompiledSchema(self._by_name[n] for n in names if n in self._by_name)
+
+    def to_matrix(self, frame: pd.DataFrame):
+        """Return (values, missing, non_numeric) for the schema columns of ``frame``."""
+        n_rows, n_fields = len(frame), len(self.fields)
+        values = np.full((n_rows, n_fields), np.nan, dtype=np.float64)
+        non_numeric = np.zeros((n_rows, n_fields), dtype=bool)
+
+        for j, name in enumerate(self.names):
+            if name not in frame.columns:
+                continue
+            column = frame[name]
+            if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+                values[:, j] = column.to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                coerced = pd.to_numeric(column, errors="coerce")
+                values[:, j] = coerced.to_numpy(dtype=np.float64, na_value=np.nan)
+                non_numeric[:, j] = (coerced.isna() & column.notna()).to_numpy()
+
+        missing = np.isnan(values) & ~non_numeric
+        return values, missing, non_numeric
+
+    def validate(self, frame: pd.DataFrame) -> ValidationReport:
+        values, missing, non_numeric = self.to_matrix(frame)
+
+        with np.errstate(invalid="ignore"):
+            out_of_range = (values < self.lower) | (values > self.upper)
+            not_integer = self.is_int & (values != np.floor(values))
+        not_integer &= ~np.isnan(values)
+
+        return ValidationReport(
+            fields=list(self.names),
+            missing=missing,
+            non_numeric=non_numeric,
+            out_of_range=out_of_range,
+            not_integer=not_integer,
+            reject_missing=self.reject_missing,
+        )
+
+    def ui_kwargs(self, name: str, value: Optional[float] = None) -> Dict[str, object]:
+        """Keyword arguments for ``st.number_input`` derived from the schema."""
+        field = self._by_name[name]
+        cast = int if field.dtype == "int" else float
+        return {
+            "min_value": cast(field.min_value),
+            "max_value": cast(field.max_value),
+            "value": cast(field.default if value is None else value),
+            "help": f"{field.unit}, plausible range {field.min_value}–{field.max_value}",
+        }
+
+
+def compile_schema(fields: Iterable[BiomarkerField] = BIOMARKER_SCHEMA) -> CompiledSchema:
+    return CompiledSchema(fields)
@@ -0,0 +1,258 @@
+# streamlit_load.py
+# In-process load test for the ClarityPredict 2.0 Streamlit pages.
+#
+# Simulates N concurrent sessions with Streamlit's AppTest (no browser, no
+# websocket): prediction sessions submit the prediction form with random
+# biomarker values, explore sessions switch the Explore page widgets. All
+# sessions share one process, so st.cache_resource objects (model, SHAP
+# explainer, history store) are shared exactly as on a real server.
+#
+#   python benchmarks/streamlit_load.py --sessions 8 --iterations 10
+#   python benchmarks/streamlit_load.py --sessions 16 --json load.json
+
+import argparse
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+# Keep load-test traffic out of the real history, drift, shadow, trace and
+# batch artifacts under data/. Must be set before config.settings is first
+# imported by a page.
+_SCRATCH = Path(tempfile.mkdtemp(prefix="clarity-load-"))
+os.environ.setdefault("CLARITY_HISTORY_DB_PATH", str(_SCRATCH / "history.sqlite"))
+os.environ.setdefault("CLARITY_DRIFT_SKETCH_DIR", str(_SCRATCH / "monitoring"))
+os.environ.setdefault("CLARITY_SHADOW_LOG_DIR", str(_SCRATCH / "shadow"))
+os.environ.setdefault("CLARITY_TRACE_DIR", str(_SCRATCH / "traces"))
+os.environ.setdefault("CLARITY_BATCH_WORK_DIR", str(_SCRATCH / "batch_jobs"))
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from streamlit.testing.v1 import AppTest
+
+from app.utils.validators import compile_schema
+
+SCHEMA = compile_schema()
+
+PAGES = {
+    "prediction": BASE_DIR / "app" / "pages" / "3_Prediction.py",
+    "explore": BASE_DIR / "app" / "pages" / "2_Explore.py",
+}
+
+
+# ---------------------------------------------------------
+# Resource sampling
+# ---------------------------------------------------------
+def current_rss_mb() -> float:
+    """Resident set size from /proc; falls back to the peak on other platforms."""
+    try:
+        with open("/proc/self/statm") as fh:
+            pages = int(fh.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+class Sampler(threading.Thread):
+    """Samples RSS and open matplotlib figures while the load runs."""
+
+    def __init__(self, interval: float = 0.05):
+        super().__init__(name="load-sampler", daemon=True)
+        self.interval = interval
+        self.max_rss_mb = current_rss_mb()
+        self.max_open_figures = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            self.max_rss_mb = max(self.max_rss_mb, current_rss_mb())
+            self.max_open_figures = max(self.max_open_figures, len(plt.get_fignums()))
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+# ---------------------------------------------------------
+# Sessions
+# ---------------------------------------------------------
+def count_elements(at: AppTest) -> Counter:
+    counts: Counter = Counter()
+
+    def walk(node) -> None:
+        for child in getattr(node, "children", {}).values():
+            counts[child.type] += 1
+            walk(child)
+
+    walk(at._tree)
+    return counts
+
+
+class Session:
+    """One simulated user: a page, a random generator and timing records."""
+
+    def __init__(self, scenario: str, session_id: int, seed: int, timeout: float):
+        self.scenario = scenario
+        self.session_id = session_id
+        self.rng = random.Random(seed)
+        self.timeout = timeout
+        self.latencies: List[float] = []
+        self.figures = 0
+        self.errors = 0
+
+    def _run(self, at: AppTest) -> None:
+        start = time.perf_counter()
+        at.run(timeout=self.timeout)
+        self.latencies.append((time.perf_counter() - start) * 1000.0)
+        self.figures += count_elements(at)["image"]
+        self.errors += len(at.exception)
+
+    def prediction_step(self, at: AppTest) -> None:
+        at.text_input[0].set_value(f"load-{self.session_id}")
+        for widget, field in zip(at.number_input, SCHEMA.fields):
+            value = self.rng.uniform(field.min_value, field.max_value)
+            widget.set_value(int(value) if field.dtype == "int" else round(value, 1))
+        at.button[0].click()
+        self._run(at)
+
+    def explore_step(self, at: AppTest) -> None:
+        widgets = list(at.selectbox) + list(at.radio)
+        widget = self.rng.choice(widgets)
+        widget.set_value(self.rng.choice(widget.options))
+        self._run(at)
+
+    def run(self, iterations: int) -> "Session":
+        at = AppTest.from_file(str(PAGES[self.scenario]), default_timeout=self.timeout)
+        self._run(at)
+
+        step = self.prediction_step if self.scenario == "prediction" else self.explore_step
+        for _ in range(iterations):
+            step(at)
+        return self
+
+
+# ---------------------------------------------------------
+# Load test
+# ---------------------------------------------------------
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    values = np.asarray(latencies)
+    return {
+        "reruns": int(len(values)),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p90_ms": float(np.percentile(values, 90)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+
+def run_load(sessions: int, iterations: int, scenarios: List[str], timeout: float, seed: int) -> Dict:
+    # Warm the shared caches once so the first sessions do not measure model loading
+    for scenario in scenarios:
+        AppTest.from_file(str(PAGES[scenario]), default_timeout=timeout).run()
+
+    plans = [
+        Session(scenarios[i % len(scenarios)], i, seed + i, timeout) for i in range(sessions)
+    ]
+
+    sampler = Sampler()
+    sampler.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="session") as pool:
+        finished = list(pool.map(lambda s: s.run(iterations), plans))
+    wall = time.perf_counter() - start
+    sampler.stop()
+
+    by_scenario: Dict[str, List[float]] = defaultdict(list)
+    for session in finished:
+        by_scenario[session.scenario].extend(session.latencies)
+
+    total_reruns = sum(len(s.latencies) for s in finished)
+    return {
+        "sessions": sessions,
+        "iterations": iterations,
+        "wall_s": wall,
+        "throughput_reruns_per_s": total_reruns / wall,
+        "latency": {name: summarize(values) for name, values in by_scenario.items()},
+        "latency_all": summarize([v for s in finished for v in s.latencies]),
+        "errors": sum(s.errors for s in finished),
+        "figures_rendered": sum(s.figures for s in finished),
+        "max_open_figures": sampler.max_open_figures,
+        "open_figures_after": len(plt.get_fignums()),
+        "peak_rss_mb": max(sampler.max_rss_mb, peak_rss_mb()),
+    }
+
+
+def print_report(report: Dict) -> None:
+    print(
+        f"\n{report['sessions']} sessions x {report['iterations']} iterations "
+        f"in {report['wall_s']:.1f} s ({report['throughput_reruns_per_s']:.1f} reruns/s)"
+    )
+    print(f"{'scenario':<12}{'reruns':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    rows = list(report["latency"].items()) + [("all", report["latency_all"])]
+    for name, stats in rows:
+        print(
+            f"{name:<12}{stats['reruns']:>8}{stats['p50_ms']:>10.0f}{stats['p90_ms']:>10.0f}"
+            f"{stats['p99_ms']:>10.0f}{stats['max_ms']:>10.0f}"
+        )
+    print(
+        f"errors: {report['errors']}  figures rendered: {report['figures_rendered']}  "
+        f"max open figures: {report['max_open_figures']}  open after run: {report['open_figures_after']}  "
+        f"peak RSS: {report['peak_rss_mb']:.0f} MB"
+    )
+
+
+# ---------------------------------------------------------
+# Command line
+# ---------------------------------------------------------
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the Streamlit pages.")
+    parser.add_argument("--sessions", type=int, default=8, help="Concurrent simulated sessions.")
+    parser.add_argument("--iterations", type=int, default=10, help="Interactions per session.")
+    parser.add_argument(
+        "--scenario", nargs="+", choices=sorted(PAGES), default=["prediction", "explore"],
+        help="Scenarios assigned to sessions round-robin.",
+    )
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-rerun timeout in seconds.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", type=Path, help="Also write the report to this file.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(message)s")
+    args = parse_args()
+
+    # Pages resolve data and asset paths relative to the project root
+    os.chdir(BASE_DIR)
+    report = run_load(args.sessions, args.iterations, args.scenario, args.timeout, args.seed)
+    print_report(report)
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# settings.py
+# Deployment configuration for ClarityPredict 2.0.
+# Every value can be overridden per deployment through an environment variable.
+
+import os
+
+
+# --- Inference ---
+
+INFERENCE_BACKEND = os.getenv("CLARITY_INFERENCE_BACKEND", "native")   # native | numpy | onnx
+ONNX_MODEL_PATH = os.getenv("CLARITY_ONNX_MODEL_PATH", "models/model.onnx")
+BACKEND_PARITY_TOLERANCE = float(os.getenv("CLARITY_BACKEND_PARITY_TOLERANCE", "1e-4"))
+INFERENCE_DTYPE = os.getenv("CLARITY_INFERENCE_DTYPE", "float64")             # float64 | float32
+# Inputs up to this many rows are scored single-threaded; larger batches get
+# INFERENCE_BATCH_THREADS workers (0 = CPU cores / BATCH_WORKERS)
+INFERENCE_SMALL_ROWS = int(os.getenv("CLARITY_INFERENCE_SMALL_ROWS", "256"))
+INFERENCE_BATCH_THREADS = int(os.getenv("CLARITY_INFERENCE_BATCH_THREADS", "0"))
+# Process-wide cap for BLAS and OpenMP thread pools
+INFERENCE_NATIVE_THREADS = int(os.getenv("CLARITY_INFERENCE_NATIVE_THREADS", "1"))
+
+
+# --- Features ---
+
+# Written by the training pipeline; absent for models trained on the raw biomarkers only
+FEATURE_SPEC_PATH = os.getenv("CLARITY_FEATURE_SPEC_PATH", "models/feature_spec.json")
+# Derived features to train with: comma-separated names from app/services/features.py, or "all"
+DERIVED_FEATURES = os.getenv("CLARITY_DERIVED_FEATURES", "")
+
+
+# --- Prediction history ---
+
+HISTORY_DB_PATH = os.getenv("CLARITY_HISTORY_DB_PATH", "data/history.sqlite")
+
+
+# --- Explanations ---
+
+# Latency budget and target standard error for Kernel SHAP on non-tree models
+EXPLAIN_BUDGET_MS = float(os.getenv("CLARITY_EXPLAIN_BUDGET_MS", "250"))
+EXPLAIN_TOLERANCE = float(os.getenv("CLARITY_EXPLAIN_TOLERANCE", "1e-3"))
+
+
+# --- Live prediction mode ---
+
+# Inputs must stay unchanged this long before the full SHAP run starts
+LIVE_SETTLE_MS = float(os.getenv("CLARITY_LIVE_SETTLE_MS", "500"))
+LIVE_BUDGET_MS = float(os.getenv("CLARITY_LIVE_BUDGET_MS", "50"))
+LIVE_CACHE_SIZE = int(os.getenv("CLARITY_LIVE_CACHE_SIZE", "256"))
+# Score live previews with the distilled student (models/student.pkl) instead of the full model
+FAST_MODE = os.getenv("CLARITY_FAST_MODE", "0") == "1"
+
+
+# --- Batch scoring ---
+
+BATCH_WORK_DIR = os.getenv("CLARITY_BATCH_WORK_DIR", "data/batch_jobs")
+BATCH_CHUNK_ROWS = int(os.getenv("CLARITY_BATCH_CHUNK_ROWS", "5000"))
+BATCH_WORKERS = int(os.getenv("CLARITY_BATCH_WORKERS", "2"))
+BATCH_RETENTION_HOURS = float(os.getenv("CLARITY_BATCH_RETENTION_HOURS", "24"))
+
+
+# --- Prediction intervals ---
+
+PREDICTION_INTERVALS = os.getenv("CLARITY_PREDICTION_INTERVALS", "1") == "1"
+INTERVAL_CALIBRATION_PATH = os.getenv("CLARITY_INTERVAL_CALIBRATION_PATH", "models/interval_calibration.json")
+# Miscoverage for per-tree quantile intervals; a conformal calibration carries its own
+INTERVAL_ALPHA = float(os.getenv("CLARITY_INTERVAL_ALPHA", "0.1"))
+
+
+# --- Start-up ---
+
+# Reuse the converted TreeExplainer across processes (rebuilt when the model changes)
+EXPLAINER_CACHE = os.getenv("CLARITY_EXPLAINER_CACHE", "1") == "1"
+EXPLAINER_CACHE_PATH = os.getenv("CLARITY_EXPLAINER_CACHE_PATH", "models/explainer.joblib")
+EXPLAINER_CACHE_MIN_MS = float(os.getenv("CLARITY_EXPLAINER_CACHE_MIN_MS", "250"))
+# Exercise every request path once before the service reports ready
+WARM_UP = os.getenv("CLARITY_WARM_UP", "1") == "1"
+# Written after warm-up for readiness probes; empty disables it
+READINESS_FILE = os.getenv("CLARITY_READINESS_FILE", "")
+
+
+# --- Drift monitoring ---
+
+DRIFT_MONITORING = os.getenv("CLARITY_DRIFT_MONITORING", "1") == "1"
+DRIFT_REFERENCE_PATH = os.getenv("CLARITY_DRIFT_REFERENCE_PATH", "models/drift_reference.npz")
+DRIFT_SKETCH_DIR = os.getenv("CLARITY_DRIFT_SKETCH_DIR", "data/monitoring")
+DRIFT_FLUSH_INTERVAL = float(os.getenv("CLARITY_DRIFT_FLUSH_INTERVAL", "30"))
+# Days of live sketches kept on disk; also the longest window the Monitoring page offers
+DRIFT_RETENTION_DAYS = int(os.getenv("CLARITY_DRIFT_RETENTION_DAYS", "30"))
+
+
+# --- Shadow scoring ---
+
+# Challenger bundles under models/challengers/ to shadow-score live requests with:
+# empty (off), "all", or a comma-separated list of names
+SHADOW_CHALLENGERS = os.getenv("CLARITY_SHADOW_CHALLENGERS", "")
+SHADOW_CHALLENGER_DIR = os.getenv("CLARITY_SHADOW_CHALLENGER_DIR", "models/challengers")
+SHADOW_LOG_DIR = os.getenv("CLARITY_SHADOW_LOG_DIR", "data/shadow")
+SHADOW_MAX_PENDING = int(os.getenv("CLARITY_SHADOW_MAX_PENDING", "64"))
+
+
+# --- Tracing ---
+
+# Fraction of page requests traced to TRACE_DIR in Chrome trace-event format (0 = off);
+# append ?trace=1 to a page URL to trace that request regardless
+TRACE_SAMPLE_RATE = float(os.getenv("CLARITY_TRACE_SAMPLE_RATE", "0"))
+TRACE_DIR = os.getenv("CLARITY_TRACE_DIR", "data/traces")
+TRACE_MAX_FILES = int(os.getenv("CLARITY_TRACE_MAX_FILES", "500"))
@@ -15,23 +15,89 @@ It performs:
 5. Selection of the best model
 6. Saving of model, scaler, and imputer for production use
 
+Incremental mode (``--incremental``) skips the full retrain and only
+consumes rows appended to the dataset since the last run:
+- The saved imputer and scaler are reused as they are, not updated from
+  the new rows, so the feature space the existing trees were split on
+  stays fixed. Preprocessing statistics change only with a full retrain.
+- XGBoost continues boosting from the previous booster, the Random
+  Forest grows extra trees with ``warm_start``, and Linear Regression
+  is refit in closed form. Challenger bundles are updated the same way.
+- The updated model is scored on the original hold-out rows and only
+  saved if it still meets the previous validation metrics. Everything
+  derived from the model (ONNX graph, effects tables, student, interval
+  calibration, explainer cache, drift reference) is then regenerated.
+
+Preprocessed feature matrices are cached under .cache/features/, keyed by
+the dataset content hash and the preprocessing config, so repeated runs on
+unchanged data skip CSV parsing and preprocessing (disable with --no-cache).
+The most recently used entries are kept; unreadable ones are recomputed.
+
+After selection, a small student model (shallow gradient-boosted trees) is
+distilled from the best model on real and augmented inputs. Its fidelity
+(R² vs teacher, max deviation) and single-row latency are written to
+models/student_report.json; PredictionService uses the student for fast
+previews (disable with --skip-distill).
+
+When skl2onnx is installed, the model is also exported as an ONNX graph
+(models/model.onnx) over the prepared feature matrix, for the ONNX Runtime
+inference backend (see config/settings.py).
+
+Partial-dependence and accumulated-local-effects tables for every feature
+(and key feature pairs) are computed once per trained model with batched
+prediction and stored in models/effects.npz for the Explore page.
+
+Derived biomarkers (HOMA-IR, LDL/HDL ratio, BMI class; see
+app/services/features.py) are added with ``--derived-features`` (default
+CLARITY_DERIVED_FEATURES). They are computed from the imputed values and
+scaled with the raw ones; the chosen columns are written to
+models/feature_spec.json so PredictionService builds the same compiled
+impute/derive/scale pass.
+
+The hold-out residuals of the saved model calibrate split-conformal
+prediction intervals (models/interval_calibration.json). For forests the
+residuals are normalized by the per-tree spread, so interval widths adapt
+to each input; other models get a constant half-width.
+
 The output files are stored in: models/
 """
 
+import argparse
+import copy
+import json
 import logging
+import shutil
+import sys
+import time
 from pathlib import Path
 
 import joblib
 import numpy as np
 import pandas as pd
+import shap
+import sklearn
 from sklearn.impute import SimpleImputer
 from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from xgboost import XGBRegressor
 
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from app.services.backends import OnnxBackend, export_onnx as export_model_onnx
+from app.services.drift import Sketch
+from app.services.effects import EffectsTable, compute_effects
+from app.services.explainers import save_explainer
+from app.services.feature_cache import FeatureCache, file_digest, files_digest
+from app.services.features import FeaturePipeline, FeatureSpec, add_derived
+from app.services.intervals import ForestMembers, IntervalCalibration, IntervalEstimator
+from app.services.similarity import update_index
+from config import settings
+
 
 # ---------------------------------------------------------
 # Logging configuration
@@ -46,114 +112,612 @@ logger = logging.getLogger(__name__)
 # ---------------------------------------------------------
 # Paths
 # ---------------------------------------------------------
-BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_PATH = BASE_DIR / "data" / "dataset.csv"
 MODELS_DIR = BASE_DIR / "models"
 MODELS_DIR.mkdir(exist_ok=True)
+STATE_PATH = MODELS_DIR / "training_state.json"
+SIMILARITY_INDEX_PATH = MODELS_DIR / "similarity_index.joblib"
+DRIFT_REFERENCE_PATH = MODELS_DIR / "drift_reference.npz"
+CHALLENGERS_DIR = MODELS_DIR / "challengers"
+INTERVAL_CALIBRATION_PATH = MODELS_DIR / "interval_calibration.json"
+EXPLAINER_CACHE_PATH = MODELS_DIR / "explainer.joblib"
+FEATURE_SPEC_PATH = MODELS_DIR / "feature_spec.json"
+CACHE_DIR = BASE_DIR / ".cache" / "features"
+
+features = ["age", "bmi", "glucose", "insulin", "hdl", "ldl"]
+target = "target"
+
+# Miscoverage of the calibrated prediction intervals (90% coverage)
+INTERVAL_ALPHA = 0.1
+
+PREPROCESSING_CONFIG = {
+    "features": features,
+    "target": target,
+    "imputer": "median",
+    "scaler": "standard",
+    "sklearn": sklearn.__version__,
+}
 
 
 # ---------------------------------------------------------
 # Load dataset
 # ---------------------------------------------------------
-logger.info("Loading dataset from %s", DATA_PATH)
-df = pd.read_csv(DATA_PATH)
-df.columns = df.columns.str.lower()
+def load_dataset() -> pd.DataFrame:
+    logger.info("Loading dataset from %s", DATA_PATH)
+    df = pd.read_csv(DATA_PATH)
+    df.columns = df.columns.str.lower()
+    logger.info("Dataset loaded with shape: %s", df.shape)
+    return df
 
-features = ["age", "bmi", "glucose", "insulin", "hdl", "ldl"]
-target = "target"
 
-X = df[features]
-y = df[target]
+# ---------------------------------------------------------
+# Evaluation
+# ---------------------------------------------------------
+def evaluate(model, X_test, y_test) -> dict:
+    y_pred = model.predict(X_test)
+    return {
+        "MAE": float(mean_absolute_error(y_test, y_pred)),
+        "RMSE": float(mean_squared_error(y_test, y_pred) ** 0.5),
+        "R2": float(r2_score(y_test, y_pred)),
+    }
+
+
+# ---------------------------------------------------------
+# Training state
+# ---------------------------------------------------------
+def save_state(state: dict) -> None:
+    STATE_PATH.write_text(json.dumps(state, indent=2))
+    logger.info("Training state saved to %s", STATE_PATH)
+
 
-logger.info("Dataset loaded with shape: %s", df.shape)
+def load_state() -> dict:
+    if not STATE_PATH.exists():
+        raise FileNotFoundError(
+            f"No training state at {STATE_PATH}. Run a full training first."
+        )
+    return json.loads(STATE_PATH.read_text())
 
 
 # ---------------------------------------------------------
-# Preprocessing
+# Similar-patient index
 # ---------------------------------------------------------
-logger.info("Applying preprocessing (median imputation + scaling)")
+def refresh_similarity_index(cohort: pd.DataFrame, pipeline: FeaturePipeline) -> None:
+    """Extend the stored index with new cohort rows, or rebuild it for new preprocessors."""
+    update_index(
+        SIMILARITY_INDEX_PATH,
+        cohort,
+        outcome=target,
+        feature_names=features,
+        transform=transform_fn(pipeline),
+        preprocessor_version=files_digest(
+            [MODELS_DIR / "scaler.pkl", MODELS_DIR / "imputer.pkl", FEATURE_SPEC_PATH]
+        )[:12],
+    )
 
-imputer = SimpleImputer(strategy="median")
-scaler = StandardScaler()
 
-X_imputed = imputer.fit_transform(X)
-X_scaled = scaler.fit_transform(X_imputed)
+# ---------------------------------------------------------
+# Challengers
+# ---------------------------------------------------------
+def save_challengers(models: dict, results_df: pd.DataFrame, best_model_name: str) -> None:
+    """
+    Keep the runner-up models as challenger bundles for shadow scoring.
+    They share the champion's preprocessors, so a bundle is the model plus
+    its hold-out metrics. Bundles from earlier runs are replaced.
+    """
+    if CHALLENGERS_DIR.exists():
+        shutil.rmtree(CHALLENGERS_DIR)
+
+    for _, row in results_df.iterrows():
+        name = row["model"]
+        if name == best_model_name:
+            continue
+        bundle = CHALLENGERS_DIR / name
+        bundle.mkdir(parents=True)
+        joblib.dump(models[name], bundle / "model.pkl")
+        metrics = row[["MAE", "RMSE", "R2"]].astype(float).to_dict()
+        (bundle / "metrics.json").write_text(json.dumps(metrics, indent=2))
+        logger.info("Challenger saved: %s", bundle)
 
 
 # ---------------------------------------------------------
-# Train/test split
+# Prediction intervals
 # ---------------------------------------------------------
-logger.info("Performing train/test split (80/20)")
-X_train, X_test, y_train, y_test = train_test_split(
-    X_scaled, y, test_size=0.2, random_state=42
-)
+def save_interval_calibration(model, X_cal: np.ndarray, y_cal) -> None:
+    """
+    Split-conformal calibration of the saved model on hold-out rows it was
+    not trained on. Forest residuals are normalized by the per-tree spread.
+    """
+    members = ForestMembers.from_model(model)
+    spread = IntervalEstimator(members).spread(X_cal) if members is not None else None
+
+    calibration = IntervalCalibration.fit(
+        np.asarray(y_cal),
+        model.predict(X_cal),
+        alpha=INTERVAL_ALPHA,
+        model_version=file_digest(MODELS_DIR / "model.pkl")[:12],
+        spread=spread,
+    )
+    calibration.save(INTERVAL_CALIBRATION_PATH)
+    logger.info(
+        "Interval calibration saved (%s, q_hat=%.4f, n=%d)",
+        calibration.method, calibration.q_hat, calibration.n,
+    )
 
 
 # ---------------------------------------------------------
-# Model definitions
+# SHAP explainer cache
 # ---------------------------------------------------------
-models = {
-    "LinearRegression": LinearRegression(),
-    "RandomForestRegressor": RandomForestRegressor(
-        n_estimators=300, random_state=42, n_jobs=-1
-    ),
-    "XGBRegressor": XGBRegressor(
-        n_estimators=300,
-        max_depth=5,
-        learning_rate=0.05,
-        subsample=0.9,
-        colsample_bytree=0.9,
-        random_state=42,
-    ),
-}
+def save_explainer_cache(model) -> None:
+    """
+    Convert tree models for SHAP once here, so serving processes load the
+    prepared explainer instead of rebuilding it at start-up.
+    """
+    EXPLAINER_CACHE_PATH.unlink(missing_ok=True)
+    try:
+        start = time.perf_counter()
+        explainer = shap.TreeExplainer(model)
+        build_ms = (time.perf_counter() - start) * 1000.0
+    except Exception as e:
+        logger.info("No tree explainer for %s (%s); explainer cache skipped.", type(model).__name__, e)
+        return
+
+    if build_ms < settings.EXPLAINER_CACHE_MIN_MS:
+        logger.info("SHAP explainer builds in %.0f ms; not worth caching.", build_ms)
+        return
+
+    save_explainer(explainer, EXPLAINER_CACHE_PATH, file_digest(MODELS_DIR / "model.pkl")[:12])
+    logger.info("SHAP explainer cached at %s", EXPLAINER_CACHE_PATH)
 
-results = []
+
+# ---------------------------------------------------------
+# Drift reference
+# ---------------------------------------------------------
+def save_drift_reference(X_imputed: np.ndarray, predictions: np.ndarray, keep_edges: bool = False) -> None:
+    """
+    Histogram sketch of the imputed training inputs and predictions. With
+    ``keep_edges`` the stored bin layout is reused, so live sketches
+    collected against it stay comparable after an incremental update.
+    """
+    columns = features + ["prediction"]
+    values = np.column_stack([X_imputed, predictions])
+
+    previous = Sketch.load(DRIFT_REFERENCE_PATH) if keep_edges else None
+    if previous is not None and previous.columns == columns:
+        reference = previous.empty_like()
+        reference.update(values)
+    else:
+        reference = Sketch.from_reference(columns, values)
+
+    reference.save(DRIFT_REFERENCE_PATH)
+    logger.info("Drift reference saved to %s", DRIFT_REFERENCE_PATH)
 
 
 # ---------------------------------------------------------
-# Train and evaluate models
+# Preprocessing
 # ---------------------------------------------------------
-logger.info("Training and evaluating models...")
+def transform_fn(pipeline: FeaturePipeline):
+    """Raw cohort frame -> scaled model matrix, as PredictionService prepares rows."""
+    return lambda frame: pipeline.transform(frame[features].to_numpy(dtype=np.float64))
 
-for name, model in models.items():
-    logger.info("Training %s", name)
-    model.fit(X_train, y_train)
 
-    y_pred = model.predict(X_test)
+def preprocess(spec: FeatureSpec, use_cache: bool = True):
+    """Return (X_scaled, y, imputer, scaler), reusing cached matrices when possible."""
+    cache = FeatureCache(CACHE_DIR)
+    config = {**PREPROCESSING_CONFIG, "derived": spec.derived}
+    key = cache.key(DATA_PATH, config)
 
-    mae = mean_absolute_error(y_test, y_pred)
-    rmse = mean_squared_error(y_test, y_pred) ** 0.5
-    r2 = r2_score(y_test, y_pred)
+    if use_cache:
+        cached = cache.load(key)
+        if cached is not None:
+            return (
+                cached.arrays["X_scaled"],
+                cached.arrays["y"],
+                cached.preprocessors["imputer"],
+                cached.preprocessors["scaler"],
+            )
 
-    results.append({
-        "model": name,
-        "MAE": mae,
-        "RMSE": rmse,
-        "R2": r2,
-    })
+    df = load_dataset()
+    X = df[features]
+    y = df[target].to_numpy()
 
-results_df = pd.DataFrame(results).sort_values(by="RMSE")
-logger.info("Model comparison:\n%s", results_df)
+    logger.info("Applying preprocessing (median imputation, %d derived features, scaling)", len(spec.derived))
 
+    imputer = SimpleImputer(strategy="median")
+    scaler = StandardScaler()
 
+    X_imputed = imputer.fit_transform(X)
+    X_scaled = scaler.fit_transform(add_derived(spec, X_imputed))
+
+    if use_cache:
+        cache.store(
+            key,
+            {"X_scaled": X_scaled, "y": y},
+            {"imputer": imputer, "scaler": scaler},
+            meta={"dataset": file_digest(DATA_PATH), "config": config},
+        )
+
+    return X_scaled, y, imputer, scaler
+
+
+# ---------------------------------------------------------
+# Distillation
+# ---------------------------------------------------------
+def augment(X: np.ndarray, n_samples: int, rng: np.random.Generator) -> np.ndarray:
+    """Synthetic inputs around the real rows: jittered copies and pairwise mixups."""
+    half = n_samples // 2
+    base = X[rng.integers(0, len(X), size=half)]
+    jittered = base + rng.normal(0.0, 0.25, size=base.shape)
+
+    a = X[rng.integers(0, len(X), size=n_samples - half)]
+    b = X[rng.integers(0, len(X), size=n_samples - half)]
+    lam = rng.random((n_samples - half, 1))
+    mixed = lam * a + (1.0 - lam) * b
+
+    return np.vstack([jittered, mixed])
+
+
+def single_row_latency_ms(model, X: np.ndarray, repeats: int = 50) -> float:
+    timings = []
+    for i in range(repeats):
+        row = X[i % len(X)].reshape(1, -1)
+        start = time.perf_counter()
+        model.predict(row)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return float(np.median(timings))
+
+
+def distill_student(teacher, X_train: np.ndarray, X_test: np.ndarray) -> None:
+    """Fit a compact student on the teacher's outputs and save it with a fidelity report."""
+    logger.info("Distilling student model from %s", type(teacher).__name__)
+    rng = np.random.default_rng(42)
+
+    X_fit = np.vstack([X_train, augment(X_train, max(2000, 20 * len(X_train)), rng)])
+    X_eval = np.vstack([X_test, augment(X_test, max(500, 5 * len(X_test)), rng)])
+
+    student = GradientBoostingRegressor(
+        n_estimators=100, max_depth=3, learning_rate=0.1, random_state=42
+    )
+    student.fit(X_fit, teacher.predict(X_fit))
+
+    teacher_eval = teacher.predict(X_eval)
+    student_eval = student.predict(X_eval)
+
+    report = {
+        "teacher": type(teacher).__name__,
+        "student": type(student).__name__,
+        "r2_vs_teacher": float(r2_score(teacher_eval, student_eval)),
+        "max_abs_deviation": float(np.max(np.abs(teacher_eval - student_eval))),
+        "teacher_latency_ms": single_row_latency_ms(teacher, X_test),
+        "student_latency_ms": single_row_latency_ms(student, X_test),
+        "eval_rows": int(len(X_eval)),
+    }
+    logger.info("Student fidelity report: %s", report)
+
+    joblib.dump(student, MODELS_DIR / "student.pkl")
+    (MODELS_DIR / "student_report.json").write_text(json.dumps(report, indent=2))
+
+
+# ---------------------------------------------------------
+# ONNX export
+# ---------------------------------------------------------
+def export_onnx(model, X_check: np.ndarray) -> None:
+    """
+    Write the model as an ONNX graph over the prepared feature matrix
+    (app/services/backends.py) and log its deviation from the model on
+    ``X_check``. Preprocessing stays in PredictionService, which prepares
+    rows once for prediction, explanation and intervals alike.
+    """
+    onnx_path = MODELS_DIR / "model.onnx"
+    if not export_model_onnx(model, X_check.shape[1], onnx_path):
+        onnx_path.unlink(missing_ok=True)
+        return
+    logger.info("ONNX graph exported to %s", onnx_path)
+
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        return
+
+    onnx_pred = OnnxBackend(onnx_path).predict(X_check)
+    deviation = float(np.max(np.abs(onnx_pred - model.predict(X_check))))
+    logger.info("ONNX export parity: max abs deviation %.2e", deviation)
+
+
+# ---------------------------------------------------------
+# Model-derived artifacts
 # ---------------------------------------------------------
-# Select best model
+def save_model_artifacts(
+    spec: FeatureSpec,
+    imputer,
+    scaler,
+    model,
+    cohort: pd.DataFrame,
+    X_train: np.ndarray,
+    X_test: np.ndarray,
+    distill: bool,
+) -> None:
+    """
+    Regenerate what is built from the saved model: the ONNX graph, the
+    effects tables for ``cohort`` (imputed raw biomarkers) and the student.
+    Without distillation an existing student is removed, since it would
+    preview a different model.
+    """
+    export_onnx(model, X_test)
+
+    transform = transform_fn(FeaturePipeline(spec, imputer, scaler))
+    logger.info("Computing partial-dependence and ALE tables")
+    effects = compute_effects(
+        lambda frame: model.predict(transform(frame)),
+        cohort,
+        features,
+    )
+    EffectsTable.save(
+        MODELS_DIR / "effects.npz", effects, file_digest(MODELS_DIR / "model.pkl")[:12]
+    )
+
+    if distill:
+        distill_student(model, X_train, X_test)
+    else:
+        for name in ("student.pkl", "student_report.json"):
+            (MODELS_DIR / name).unlink(missing_ok=True)
+
+
 # ---------------------------------------------------------
-best_model_name = results_df.iloc[0]["model"]
-best_model = models[best_model_name]
+# Full training
+# ---------------------------------------------------------
+def train_full(spec: FeatureSpec, use_cache: bool = True, distill: bool = True) -> None:
+    X_scaled, y, imputer, scaler = preprocess(spec, use_cache)
+    pipeline = FeaturePipeline(spec, imputer, scaler)
+    n_rows = len(y)
+    n_raw = len(features)
+
+    # Train/test split
+    logger.info("Performing train/test split (80/20)")
+    X_train, X_test, y_train, y_test, _, test_index = train_test_split(
+        X_scaled, y, np.arange(n_rows), test_size=0.2, random_state=42
+    )
+
+    # Model definitions
+    models = {
+        "LinearRegression": LinearRegression(),
+        "RandomForestRegressor": RandomForestRegressor(
+            n_estimators=300, random_state=42, n_jobs=-1
+        ),
+        "XGBRegressor": XGBRegressor(
+            n_estimators=300,
+            max_depth=5,
+            learning_rate=0.05,
+            subsample=0.9,
+            colsample_bytree=0.9,
+            random_state=42,
+        ),
+    }
+
+    # Train and evaluate models
+    logger.info("Training and evaluating models...")
+
+    results = []
+    for name, model in models.items():
+        logger.info("Training %s", name)
+        model.fit(X_train, y_train)
+        results.append({"model": name, **evaluate(model, X_test, y_test)})
+
+    results_df = pd.DataFrame(results).sort_values(by="RMSE")
+    logger.info("Model comparison:\n%s", results_df)
+
+    # Select best model
+    best_model_name = results_df.iloc[0]["model"]
+    best_model = models[best_model_name]
+    best_metrics = results_df.iloc[0][["MAE", "RMSE", "R2"]].astype(float).to_dict()
+
+    logger.info("Selected best model: %s", best_model_name)
+
+    # Save model and preprocessors
+    logger.info("Saving model and preprocessors to %s", MODELS_DIR)
+
+    joblib.dump(best_model, MODELS_DIR / "model.pkl")
+    joblib.dump(scaler, MODELS_DIR / "scaler.pkl")
+    joblib.dump(imputer, MODELS_DIR / "imputer.pkl")
+    spec.save(FEATURE_SPEC_PATH)
+    save_challengers(models, results_df, best_model_name)
+    save_interval_calibration(best_model, X_test, y_test)
+    save_explainer_cache(best_model)
+
+    # Imputed raw biomarkers of the cohort (the leading columns of the model matrix)
+    cohort = pd.DataFrame(scaler.inverse_transform(X_scaled)[:, :n_raw], columns=features)
+    save_model_artifacts(spec, imputer, scaler, best_model, cohort, X_train, X_test, distill)
+
+    cohort[target] = np.asarray(y)
+    refresh_similarity_index(cohort, pipeline)
+    save_drift_reference(scaler.inverse_transform(X_train)[:, :n_raw], best_model.predict(X_train))
+
+    save_state({
+        "model": best_model_name,
+        "rows_seen": int(n_rows),
+        "test_index": sorted(int(i) for i in test_index),
+        "metrics": best_metrics,
+    })
 
-logger.info("Selected best model: %s", best_model_name)
+    logger.info("Training complete. Files saved:")
+    for f in MODELS_DIR.glob("*"):
+        logger.info(" - %s", f)
 
 
 # ---------------------------------------------------------
-# Save model and preprocessors
+# Incremental training
 # ---------------------------------------------------------
-logger.info("Saving model and preprocessors to %s", MODELS_DIR)
+def update_model(model, X_new, y_new, X_train, y_train, extra_trees: int):
+    """Return an updated copy of ``model`` trained on the appended rows."""
+    if isinstance(model, XGBRegressor):
+        updated = XGBRegressor(**model.get_params())
+        updated.set_params(n_estimators=extra_trees)
+        updated.fit(X_new, y_new, xgb_model=model.get_booster())
+        return updated
+
+    if isinstance(model, RandomForestRegressor):
+        updated = copy.deepcopy(model)
+        updated.set_params(
+            warm_start=True, n_estimators=model.n_estimators + extra_trees
+        )
+        updated.fit(X_new, y_new)
+        return updated
+
+    # Closed-form models have no incremental update; refitting on the
+    # training rows is a single small least-squares solve.
+    updated = copy.deepcopy(model)
+    updated.fit(X_train, y_train)
+    return updated
+
+
+def update_challengers(X_new, y_new, X_train, y_train, X_holdout, y_holdout, extra_trees: int) -> None:
+    """Apply the same incremental update to every challenger bundle and re-score it on the hold-out rows."""
+    if not CHALLENGERS_DIR.exists():
+        return
+    for bundle in sorted(p for p in CHALLENGERS_DIR.iterdir() if (p / "model.pkl").exists()):
+        challenger = joblib.load(bundle / "model.pkl")
+        updated = update_model(challenger, X_new, y_new, X_train, y_train, extra_trees)
+        joblib.dump(updated, bundle / "model.pkl")
+        metrics = evaluate(updated, X_holdout, y_holdout)
+        (bundle / "metrics.json").write_text(json.dumps(metrics, indent=2))
+        logger.info("Challenger updated: %s %s", bundle.name, metrics)
+
+
+def train_incremental(extra_trees: int, tolerance: float, distill: bool = True) -> bool:
+    """
+    Update the saved model with the rows appended since the last run.
+
+    Preprocessing is frozen on purpose: the saved imputer medians and
+    scaler statistics are not updated from the new rows. The existing
+    trees and coefficients were fit on values scaled with those
+    statistics, so changing them would move every input relative to the
+    learned split thresholds. The appended rows are transformed with the
+    same pipeline instead. Statistics only move with a full retrain.
+    Returns False if the updated model misses the hold-out tolerance.
+    """
+    state = load_state()
+    df = load_dataset()
+
+    rows_seen = state["rows_seen"]
+    new_rows = df.iloc[rows_seen:]
+    if new_rows.empty:
+        logger.info("No new rows since last run (rows_seen=%d).", rows_seen)
+        return True
+
+    logger.info("Incremental update with %d new rows", len(new_rows))
+
+    model = joblib.load(MODELS_DIR / "model.pkl")
+    scaler = joblib.load(MODELS_DIR / "scaler.pkl")
+    imputer = joblib.load(MODELS_DIR / "imputer.pkl")
+
+    # Models trained before feature specs existed use the raw biomarkers only
+    spec = FeatureSpec.load(FEATURE_SPEC_PATH)
+    if spec is None:
+        spec = FeatureSpec(features)
+        spec.save(FEATURE_SPEC_PATH)
+    pipeline = FeaturePipeline(spec, imputer, scaler)
+    transform = transform_fn(pipeline)
+
+    X_new = transform(new_rows)
+    y_new = new_rows[target]
+
+    test_mask = np.zeros(len(df), dtype=bool)
+    test_mask[state["test_index"]] = True
+    holdout = df[test_mask]
+    train_rows = df[~test_mask]
+
+    X_train, X_holdout = transform(train_rows), transform(holdout)
+    updated = update_model(model, X_new, y_new, X_train, train_rows[target], extra_trees)
+
+    previous = state["metrics"]
+    metrics = evaluate(updated, X_holdout, holdout[target])
+    logger.info("Hold-out metrics: previous=%s updated=%s", previous, metrics)
+
+    if metrics["RMSE"] > previous["RMSE"] * (1.0 + tolerance):
+        logger.warning(
+            "Updated model RMSE %.4f exceeds previous %.4f by more than %.0f%%. "
+            "Keeping the current model; consider a full retrain.",
+            metrics["RMSE"], previous["RMSE"], tolerance * 100,
+        )
+        return False
+
+    joblib.dump(updated, MODELS_DIR / "model.pkl")
+    save_interval_calibration(updated, X_holdout, holdout[target])
+    save_explainer_cache(updated)
+
+    cohort = pd.DataFrame(
+        pipeline.unscaled(df[features].to_numpy(dtype=np.float64))[:, :len(features)], columns=features
+    )
+    save_model_artifacts(spec, imputer, scaler, updated, cohort, X_train, X_holdout, distill)
+    update_challengers(X_new, y_new, X_train, train_rows[target], X_holdout, holdout[target], extra_trees)
+
+    refresh_similarity_index(df, pipeline)
+    # Imputed like the full-training reference and the live sketches
+    save_drift_reference(
+        pipeline.unscaled(train_rows[features].to_numpy(dtype=np.float64))[:, :len(features)],
+        updated.predict(X_train),
+        keep_edges=True,
+    )
+    state.update({
+        "rows_seen": int(len(df)),
+        "metrics": metrics,
+    })
+    state.pop("feature_stats", None)
+    save_state(state)
+
+    logger.info("Incremental update complete: %s", MODELS_DIR / "model.pkl")
+    return True
 
-joblib.dump(best_model, MODELS_DIR / "model.pkl")
-joblib.dump(scaler, MODELS_DIR / "scaler.pkl")
-joblib.dump(imputer, MODELS_DIR / "imputer.pkl")
 
-logger.info("Training complete. Files saved:")
-for f in MODELS_DIR.glob("*"):
-    logger.info(" - %s", f)
+# ---------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Train ClarityPredict models.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Update the saved model with rows appended since the last run.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore and do not write the preprocessed feature cache.",
+    )
+    parser.add_argument(
+        "--skip-distill",
+        action="store_true",
+        help="Do not fit the fast preview (student) model.",
+    )
+    parser.add_argument(
+        "--derived-features",
+        default=settings.DERIVED_FEATURES,
+        help="Comma-separated derived features to add (homa_ir, ldl_hdl_ratio, bmi_category) or 'all'.",
+    )
+    parser.add_argument(
+        "--extra-trees",
+        type=int,
+        default=50,
+        help="Boosting rounds / forest trees to add in incremental mode.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.02,
+        help="Allowed relative hold-out RMSE increase in incremental mode.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    if args.incremental:
+        if not train_incremental(args.extra_trees, args.tolerance, distill=not args.skip_distill):
+            sys.exit(1)
+    else:
+        spec = FeatureSpec.parse(features, args.derived_features)
+        train_full(spec, use_cache=not args.no_cache, distill=not args.skip_distill)
+
+
+if __name__ == "__main__":
+    main()
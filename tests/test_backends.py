@@ -0,0 +1,73 @@
+# test_backends.py
+# Parity of the NumPy and ONNX inference backends with native predict
+
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from xgboost import XGBRegressor
+
+from app.services.backends import NativeBackend, NumpyBackend, OnnxBackend, export_onnx
+
+MODELS = {
+    "linear": lambda: LinearRegression(),
+    "forest": lambda: RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0),
+    "boosting": lambda: GradientBoostingRegressor(n_estimators=20, max_depth=3, random_state=0),
+    "xgboost": lambda: XGBRegressor(n_estimators=20, max_depth=3, random_state=0, n_jobs=1),
+}
+
+
+def fitted(kind: str):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 5))
+    y = X[:, 0] * 2.0 + np.sin(X[:, 1]) + 0.1 * rng.normal(size=400)
+    return MODELS[kind]().fit(X, y), X
+
+
+def check_rows(model, X: np.ndarray) -> np.ndarray:
+    """Held-out rows plus rows sitting exactly on the learned split thresholds."""
+    rows = np.random.default_rng(1).normal(size=(200, X.shape[1]))
+    if hasattr(model, "estimators_"):
+        trees = np.ravel(model.estimators_)[:5]
+        on_split = np.repeat(X[:1], 20, axis=0)
+        for k, tree in enumerate(trees):
+            internal = np.flatnonzero(tree.tree_.children_left >= 0)[:4]
+            for j, node in enumerate(internal):
+                on_split[4 * k + j, tree.tree_.feature[node]] = tree.tree_.threshold[node]
+        rows = np.vstack([rows, on_split])
+    return rows
+
+
+@pytest.mark.parametrize("kind", list(MODELS))
+def test_numpy_backend_matches_native(kind):
+    model, X = fitted(kind)
+    rows = check_rows(model, X)
+    np.testing.assert_allclose(
+        NumpyBackend(model).predict(rows), NativeBackend(model).predict(rows), rtol=1e-5, atol=1e-5
+    )
+
+
+def test_numpy_backend_routes_missing_values_like_xgboost():
+    model, X = fitted("xgboost")
+    rows = check_rows(model, X)
+    rows[::3, 0] = np.nan
+    np.testing.assert_allclose(
+        NumpyBackend(model).predict(rows), NativeBackend(model).predict(rows), rtol=1e-5, atol=1e-5
+    )
+
+
+@pytest.mark.parametrize("kind", list(MODELS))
+def test_onnx_backend_matches_native(kind, tmp_path):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("skl2onnx")
+    if kind == "xgboost":
+        pytest.importorskip("onnxmltools")
+
+    model, X = fitted(kind)
+    path = tmp_path / "model.onnx"
+    assert export_onnx(model, X.shape[1], path)
+
+    rows = check_rows(model, X)
+    np.testing.assert_allclose(
+        OnnxBackend(path).predict(rows), NativeBackend(model).predict(rows), rtol=1e-5, atol=1e-5
+    )
@@ -0,0 +1,123 @@
+# test_batch_jobs.py
+# Batch scoring of CSV and Parquet uploads that contain invalid rows
+
+import io
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from app.services.batch_jobs import BatchJobManager, count_rows
+from app.utils.validators import compile_schema
+
+FEATURES = ["age", "bmi", "glucose"]
+
+
+class SumService:
+    """Stand-in for PredictionService: the prediction is the sum of the inputs."""
+
+    expected_features = FEATURES
+    model_features = FEATURES
+    dtype = np.dtype(np.float64)
+    intervals = None
+    monitor = None
+
+    def __init__(self):
+        self.schema = compile_schema().subset(FEATURES)
+
+    def validate(self, frame: pd.DataFrame):
+        return self.schema.validate(frame)
+
+    def prepare_batch(self, frame: pd.DataFrame) -> pd.DataFrame:
+        return frame[FEATURES].astype(np.float64)
+
+    def predict_batch(self, prepared: pd.DataFrame) -> np.ndarray:
+        return prepared.to_numpy().sum(axis=1)
+
+
+def upload_frame() -> pd.DataFrame:
+    """Five rows; rows 1 and 3 are invalid. Column names differ in case and spacing."""
+    return pd.DataFrame({
+        "patient": ["a", "b", "c", "d", "e"],
+        " Age ": [40, 150, 55, 61, 30],
+        "BMI": [22.0, 25.0, 30.0, 28.0, 19.5],
+        "glucose": ["90", "95", "100", "high", "85"],
+    })
+
+
+def encode(frame: pd.DataFrame, fmt: str) -> io.BytesIO:
+    buf = io.BytesIO()
+    if fmt == "csv":
+        buf.write(frame.to_csv(index=False).encode())
+    else:
+        pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), buf)
+    buf.seek(0)
+    return buf
+
+
+def read_output(path, fmt: str) -> pd.DataFrame:
+    return pd.read_csv(path) if fmt == "csv" else pq.read_table(path).to_pandas()
+
+
+def wait(job, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while job.active and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not job.active
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_invalid_rows_are_reported_and_valid_rows_scored(fmt, tmp_path):
+    manager = BatchJobManager(SumService(), tmp_path, chunk_rows=2, workers=1)
+    job = manager.submit(encode(upload_frame(), fmt), f"cohort.{fmt}")
+    wait(job)
+
+    assert job.status == "done", job.error
+    assert (job.total, job.done, job.invalid) == (5, 5, 2)
+
+    out = read_output(job.output_path, fmt)
+    assert list(out["patient"]) == ["a", "b", "c", "d", "e"]
+    np.testing.assert_allclose(out["prediction"].to_numpy()[[0, 2, 4]], [152.0, 185.0, 134.5])
+    assert out["prediction"].isna().tolist() == [False, True, False, True, False]
+
+    errors = out["error"]
+    assert errors.isna().tolist() == [True, False, True, False, True]
+    assert "age: outside plausible range" in errors.iloc[1]
+    assert "glucose: not a number" in errors.iloc[3]
+    manager.close()
+
+
+def test_parquet_output_keeps_input_schema(tmp_path):
+    frame = upload_frame()
+    frame["note"] = pd.Series([None] * 5, dtype="string")  # all null in every chunk
+    upload = encode(frame, "parquet")
+    declared = pq.read_schema(upload).field("note").type
+    upload.seek(0)
+
+    manager = BatchJobManager(SumService(), tmp_path, chunk_rows=2, workers=1)
+    job = manager.submit(upload, "cohort.parquet")
+    wait(job)
+
+    schema = pq.read_schema(job.output_path)
+    assert schema.field("note").type == declared != pa.null()
+    assert schema.field("prediction").type == pa.float64()
+    assert schema.names[-1] == "error"
+    manager.close()
+
+
+def test_missing_columns_reject_the_upload(tmp_path):
+    manager = BatchJobManager(SumService(), tmp_path, workers=1)
+    frame = upload_frame().drop(columns=["BMI"])
+    with pytest.raises(ValueError, match="bmi"):
+        manager.submit(encode(frame, "csv"), "cohort.csv")
+    assert list(tmp_path.iterdir()) == []
+    manager.close()
+
+
+def test_count_rows_handles_newlines_in_quoted_values(tmp_path):
+    path = tmp_path / "input.csv"
+    path.write_text('note,age\n"line one\nline two",40\nplain,50\n')
+    assert count_rows(path, "csv") == 2
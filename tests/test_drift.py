@@ -0,0 +1,72 @@
+# test_drift.py
+# Mergeable drift sketches, drift scores and sketch retention
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.drift import DriftMonitor, Sketch, ks, load_window, prune_sketches, psi
+
+COLUMNS = ["a", "b"]
+EDGES = np.array([[1.0, 2.0, 3.0], [10.0, 20.0, np.inf]])
+
+
+def sketch_of(values) -> Sketch:
+    sketch = Sketch.empty(COLUMNS, EDGES)
+    sketch.update(np.asarray(values, dtype=np.float64))
+    return sketch
+
+
+def test_update_bins_values_and_missing():
+    sketch = sketch_of([[0.5, 5.0], [1.0, 10.0], [2.5, 25.0], [3.0, np.nan], [np.nan, 15.0]])
+    # Bin j counts values with j edges <= value; the last bin counts missing values
+    np.testing.assert_array_equal(sketch.counts[0], [1, 1, 1, 1, 1])
+    np.testing.assert_array_equal(sketch.counts[1], [1, 2, 1, 0, 1])
+
+
+def test_merge_adds_counts_of_split_batches():
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0, 30, size=(1000, 2))
+    values[::7, 1] = np.nan
+
+    merged = sketch_of(values[:300])
+    merged.merge(sketch_of(values[300:]))
+    np.testing.assert_array_equal(merged.counts, sketch_of(values).counts)
+
+
+def test_merge_rejects_other_layout():
+    other = Sketch.empty(COLUMNS, EDGES + 1.0)
+    with pytest.raises(ValueError):
+        sketch_of([[1.0, 1.0]]).merge(other)
+
+
+def test_psi_and_ks_on_known_histograms():
+    reference = Sketch(COLUMNS, EDGES, np.array([[25, 25, 25, 25, 0], [50, 50, 0, 0, 0]]))
+    current = Sketch(COLUMNS, EDGES, np.array([[25, 25, 25, 25, 0], [20, 80, 0, 0, 0]]))
+
+    expected_psi = (0.2 - 0.5) * np.log(0.2 / 0.5) + (0.8 - 0.5) * np.log(0.8 / 0.5)
+    np.testing.assert_allclose(psi(reference, current), [0.0, expected_psi])
+    np.testing.assert_allclose(ks(reference, current), [0.0, 0.3])
+
+
+def test_prune_keeps_retention_window(tmp_path):
+    today = date.today()
+    for age in (0, 29, 30, 45):
+        sketch_of([[1.0, 1.0]]).save(tmp_path / f"{today - timedelta(days=age):%Y%m%d}-host-1-x.npz")
+
+    assert prune_sketches(tmp_path, retention_days=30) == 2
+    assert len(list(tmp_path.glob("*.npz"))) == 2
+
+    reference = sketch_of([[1.0, 1.0]])
+    assert load_window(tmp_path, reference, days=30).totals[0] == 2
+
+
+def test_monitor_writes_mergeable_sketch(tmp_path):
+    reference = Sketch.from_reference(["x", "prediction"], np.random.default_rng(0).normal(size=(500, 2)))
+    monitor = DriftMonitor(reference, tmp_path, flush_interval=3600)
+    monitor.observe(np.zeros((4, 1)), np.ones(4))
+    monitor.flush()
+
+    window = load_window(tmp_path, reference, days=1)
+    assert window.totals.tolist() == [4, 4]
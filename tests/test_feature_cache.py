@@ -0,0 +1,39 @@
+# test_feature_cache.py
+# Cache hits, corrupt entries and eviction of the training feature cache
+
+import numpy as np
+
+from app.services.feature_cache import FeatureCache
+
+
+def store(cache: FeatureCache, key: str):
+    return cache.store(key, {"X_scaled": np.arange(6.0).reshape(3, 2)}, {"scaler": "s"}, meta={"k": key})
+
+
+def test_store_and_load_round_trip(tmp_path):
+    cache = FeatureCache(tmp_path)
+    store(cache, "a")
+
+    hit = cache.load("a")
+    np.testing.assert_array_equal(hit.arrays["X_scaled"], np.arange(6.0).reshape(3, 2))
+    assert hit.preprocessors == {"scaler": "s"}
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = FeatureCache(tmp_path)
+    store(cache, "a")
+    (tmp_path / "a" / "preprocessors.joblib").write_bytes(b"truncated")
+
+    assert cache.load("a") is None
+    assert not (tmp_path / "a").exists()
+    assert store(cache, "a") is not None
+
+
+def test_keeps_most_recently_used_entries(tmp_path):
+    cache = FeatureCache(tmp_path, max_entries=2)
+    store(cache, "a")
+    store(cache, "b")
+    cache.load("a")
+    store(cache, "c")
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a", "c"]
@@ -0,0 +1,77 @@
+# test_features.py
+# The fused FeaturePipeline against the sklearn imputer and scaler it replaces
+
+import numpy as np
+import pytest
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import StandardScaler
+
+from app.services.features import FeaturePipeline, FeatureSpec, add_derived
+
+RAW = ["age", "bmi", "glucose", "insulin", "hdl", "ldl"]
+
+
+def raw_rows(n: int = 500, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.integers(18, 90, n),
+        rng.uniform(15, 45, n),
+        rng.uniform(60, 250, n),
+        rng.uniform(1, 200, n),
+        rng.uniform(20, 100, n),
+        rng.uniform(40, 250, n),
+    ]).astype(np.float64)
+    X[rng.random(X.shape) < 0.1] = np.nan
+    return X
+
+
+def fitted(spec: FeatureSpec, X: np.ndarray):
+    imputer = SimpleImputer(strategy="median").fit(X)
+    scaler = StandardScaler().fit(add_derived(spec, imputer.transform(X)))
+    return imputer, scaler
+
+
+def test_transform_matches_imputer_then_scaler():
+    spec = FeatureSpec(RAW)
+    X = raw_rows()
+    imputer, scaler = fitted(spec, X)
+
+    rows = raw_rows(seed=1)
+    expected = scaler.transform(imputer.transform(rows))
+    np.testing.assert_allclose(FeaturePipeline(spec, imputer, scaler).transform(rows), expected, rtol=0, atol=1e-12)
+
+
+def test_transform_with_derived_matches_add_derived():
+    spec = FeatureSpec.parse(RAW, "all")
+    X = raw_rows()
+    imputer, scaler = fitted(spec, X)
+
+    rows = raw_rows(seed=1)
+    pipeline = FeaturePipeline(spec, imputer, scaler)
+    expected = scaler.transform(add_derived(spec, imputer.transform(rows)))
+    np.testing.assert_allclose(pipeline.transform(rows), expected, rtol=0, atol=1e-12)
+    assert pipeline.columns == RAW + ["homa_ir", "ldl_hdl_ratio", "bmi_category"]
+
+
+def test_undefined_derived_values_get_the_training_mean():
+    spec = FeatureSpec(RAW, ["ldl_hdl_ratio"])
+    imputer, scaler = fitted(spec, raw_rows())
+
+    row = np.array([[50, 25.0, 100.0, 50.0, 0.0, 120.0]])
+    assert FeaturePipeline(spec, imputer, scaler).transform(row)[0, -1] == 0.0
+
+
+def test_bmi_category_edges_are_left_closed():
+    spec = FeatureSpec(RAW, ["bmi_category"])
+    rows = raw_rows(4)
+    rows[:, 1] = [18.4, 18.5, 25.0, 30.0]
+    assert add_derived(spec, rows)[:, -1].tolist() == [0.0, 1.0, 2.0, 3.0]
+
+
+def test_pipeline_rejects_mismatched_preprocessors():
+    X = raw_rows()
+    imputer, scaler = fitted(FeatureSpec(RAW), X)
+    with pytest.raises(ValueError, match="Scaler was fitted on 6 columns"):
+        FeaturePipeline(FeatureSpec(RAW, ["homa_ir"]), imputer, scaler)
+    with pytest.raises(ValueError, match="needs raw features"):
+        FeatureSpec(["age", "bmi"], ["homa_ir"])
@@ -0,0 +1,80 @@
+# test_intervals.py
+# Coverage of split-conformal prediction intervals on a toy forest
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from app.services.intervals import (
+    ForestMembers,
+    IntervalCalibration,
+    IntervalEstimator,
+    conformal_quantile,
+)
+
+ALPHA = 0.1
+
+
+def toy_split(seed: int = 0):
+    """Train, calibration and test rows with heteroscedastic noise."""
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(-2.0, 2.0, size=(3000, 3))
+    y = X[:, 0] * 2.0 + np.sin(X[:, 1]) + (0.2 + np.abs(X[:, 2])) * rng.normal(size=len(X))
+    return (X[:1000], y[:1000]), (X[1000:2000], y[1000:2000]), (X[2000:], y[2000:])
+
+
+@pytest.fixture(scope="module")
+def forest():
+    (X_train, y_train), cal, test = toy_split()
+    model = RandomForestRegressor(n_estimators=30, max_depth=8, min_samples_leaf=5, random_state=0)
+    return model.fit(X_train, y_train), cal, test
+
+
+def test_conformal_quantile_rank():
+    scores = np.arange(1.0, 20.0)  # n = 19, ceil(20 * 0.9) = 18th smallest
+    assert conformal_quantile(scores, 0.1) == 18.0
+    assert conformal_quantile(scores[:5], 0.1) == float("inf")
+
+
+@pytest.mark.parametrize("normalized", [False, True])
+def test_conformal_coverage_on_toy_forest(forest, normalized):
+    model, (X_cal, y_cal), (X_test, y_test) = forest
+    members = ForestMembers.from_model(model)
+    spread = IntervalEstimator(members).spread(X_cal) if normalized else None
+
+    calibration = IntervalCalibration.fit(y_cal, model.predict(X_cal), ALPHA, "test", spread=spread)
+    assert calibration.method == ("normalized" if normalized else "absolute")
+
+    estimator = IntervalEstimator(members if normalized else None, calibration)
+    predictions, lower, upper = estimator.predict(X_test, model.predict(X_test))
+
+    covered = np.mean((y_test >= lower) & (y_test <= upper))
+    # 1000 test rows: the binomial standard error at 90% is about 0.01
+    assert covered >= 1.0 - ALPHA - 0.03
+    assert np.all(lower <= predictions) and np.all(predictions <= upper)
+
+
+def test_normalized_widths_follow_tree_spread(forest):
+    model, (X_cal, y_cal), (X_test, _) = forest
+    members = ForestMembers.from_model(model)
+    spread = IntervalEstimator(members).spread(X_cal)
+    calibration = IntervalCalibration.fit(y_cal, model.predict(X_cal), ALPHA, "test", spread=spread)
+
+    _, lower, upper = IntervalEstimator(members, calibration).predict(X_test)
+    expected = 2.0 * calibration.q_hat * (members.outputs(X_test).std(axis=0) + calibration.beta)
+    np.testing.assert_allclose(upper - lower, expected)
+
+
+def test_forest_members_mean_is_forest_prediction(forest):
+    model, _, (X_test, _) = forest
+    members = ForestMembers.from_model(model)
+    np.testing.assert_allclose(members.outputs(X_test).mean(axis=0), model.predict(X_test), rtol=1e-6)
+
+
+def test_calibration_round_trip(forest, tmp_path):
+    model, (X_cal, y_cal), _ = forest
+    calibration = IntervalCalibration.fit(y_cal, model.predict(X_cal), ALPHA, "v1")
+    path = tmp_path / "intervals.json"
+    calibration.save(path)
+    assert IntervalCalibration.load(path) == calibration
+    assert IntervalCalibration.load(tmp_path / "missing.json") is None
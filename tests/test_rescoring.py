@@ -0,0 +1,64 @@
+# test_rescoring.py
+# Regression tests for incremental re-scoring of prediction history
+
+import numpy as np
+import pandas as pd
+
+from app.services.history_store import HistoryStore
+from app.services.rescoring import RescoringJob
+
+FEATURES = ["age", "bmi"]
+
+
+class SumService:
+    """Stand-in for PredictionService: the prediction is the sum of the inputs."""
+
+    model_version = "v2"
+
+    def prepare_batch(self, frame: pd.DataFrame) -> pd.DataFrame:
+        return frame
+
+    def predict_batch(self, prepared: pd.DataFrame) -> np.ndarray:
+        return prepared.to_numpy().sum(axis=1)
+
+
+def test_correction_after_completed_run_is_rescored(tmp_path):
+    store = HistoryStore(tmp_path / "history.sqlite", FEATURES)
+    for i in range(10):
+        store.record("p1", [i, 1.0], 0.0, "v1", ts=float(i))
+    store.flush()
+
+    job = RescoringJob(store, SumService(), chunk_size=3, workers=2, with_shap=False)
+    assert job.run().done == 10
+
+    # Correct a record below the last id written by the completed run
+    first = store.trajectory("p1")
+    store.update_inputs(int(first["id"].iloc[2]), [100.0, 1.0])
+    progress = job.run()
+
+    assert progress.done == 1
+    after = store.trajectory("p1")
+    assert after["prediction"].iloc[2] == 101.0
+    assert store.count_stale("v2") == 0
+    store.close()
+
+
+def test_correction_during_scoring_is_not_overwritten(tmp_path):
+    store = HistoryStore(tmp_path / "history.sqlite", FEATURES)
+    for i in range(4):
+        store.record("p1", [i, 1.0], 0.0, "v1", ts=float(i))
+    store.flush()
+
+    # Score a chunk, then correct one of its records before the write lands
+    ids, inputs = store.stale_chunk("v2", 0, 10)
+    predictions = SumService().predict_batch(pd.DataFrame(inputs, columns=FEATURES))
+    store.update_inputs(int(ids[1]), [50.0, 1.0])
+
+    assert store.apply_rescore(ids, inputs, predictions, "v2") == 3
+    assert store.count_stale("v2") == 1
+
+    RescoringJob(store, SumService(), chunk_size=3, workers=1, with_shap=False).run()
+    after = store.trajectory("p1")
+    assert after["prediction"].iloc[1] == 51.0
+    assert store.count_stale("v2") == 0
+    store.close()